@@ -0,0 +1,122 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+from typing import Literal, Optional
+import asyncio
+
+from ..core.auth import get_current_admin_user
+from ..core.auth_cache import invalidate_user
+from ..core.config import settings
+from ..core.database import get_db
+from ..core.profiler import ProfilerBusy, collapsed_stacks, stack_sampler
+from ..models.schemas import LLMUsageGroup, LLMUsageReport, UpdateLLMQuota
+from ..models.user import User
+from ..services.llm_usage import llm_usage_ledger
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0),
+    rate: float = Query(100.0, gt=0, description="Samples per second"),
+    lines: bool = Query(False, description="Include line numbers in frames"),
+    idle: bool = Query(False, description="Include threads waiting on I/O, locks or queues"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Sample the Python stacks of this worker process (admin only).
+    
+    Returns collapsed stacks ("thread;outer;...;inner count" per line) for
+    flamegraph.pl, speedscope or inferno. Other requests keep being served
+    while sampling; only one profile can run at a time per worker.
+    """
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if seconds > settings.PROFILER_MAX_SECONDS or rate > settings.PROFILER_MAX_RATE_HZ:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.PROFILER_MAX_SECONDS}s at {settings.PROFILER_MAX_RATE_HZ} samples/s"
+        )
+    
+    try:
+        # The sampler runs in its own thread so the event loop can be sampled too
+        stacks, samples = await asyncio.to_thread(stack_sampler.sample, seconds, rate, lines, idle)
+    except ProfilerBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+            headers={"Retry-After": str(int(settings.PROFILER_MAX_SECONDS))}
+        )
+    
+    return PlainTextResponse(collapsed_stacks(stacks), headers={"X-Profile-Samples": str(samples)})
+
+@router.get("/usage", response_model=LLMUsageReport)
+async def get_llm_usage(
+    group_by: Literal["user", "mission", "template", "model", "day"] = Query("user", alias="groupBy"),
+    since: Optional[datetime] = Query(None, description="UTC, defaults to 7 days ago"),
+    until: Optional[datetime] = Query(None, description="UTC, exclusive"),
+    user_id: Optional[int] = Query(None, alias="userId"),
+    mission_id: Optional[str] = Query(None, alias="missionId"),
+    template: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """LLM calls, tokens and latency aggregated by user, mission, template, model or day (admin only).
+    
+    Groups are sorted by total tokens, or chronologically for groupBy=day.
+    """
+    if since is None:
+        since = datetime.utcnow() - timedelta(days=7)
+    rows = await llm_usage_ledger.report(
+        group_by, since, until, user_id=user_id, mission_id=mission_id, template=template, limit=limit
+    )
+    
+    groups = [
+        LLMUsageGroup(
+            key=None if row["key"] is None else str(row["key"]),
+            calls=row["calls"],
+            errors=row["errors"] or 0,
+            promptTokens=row["prompt_tokens"] or 0,
+            completionTokens=row["completion_tokens"] or 0,
+            totalTokens=row["total_tokens"] or 0,
+            avgLatencyMs=row["avg_latency_ms"] or 0.0,
+            maxLatencyMs=row["max_latency_ms"] or 0.0,
+            avgTtftMs=row["avg_ttft_ms"]
+        )
+        for row in rows
+    ]
+    return LLMUsageReport(groupBy=group_by, since=since, until=until, groups=groups)
+
+@router.put("/usage/quota/{user_id}")
+async def update_llm_quota(
+    user_id: int,
+    quota_data: UpdateLLMQuota,
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Set a user's daily LLM token quota (admin only)."""
+    user = await db.get(User, user_id)
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    user.llm_daily_token_quota = quota_data.dailyTokenQuota
+    
+    try:
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Failed to update quota"
+        )
+    finally:
+        # The quota is read from the cached user on each LLM call, and the
+        # user's total for the day is re-read against the new quota
+        invalidate_user(user_id)
+        llm_usage_ledger.invalidate(user_id)
+    
+    return {"message": "LLM quota updated successfully"}
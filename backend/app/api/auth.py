@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from sqlalchemy.orm import Session
+import ipaddress
+
+from fastapi import APIRouter, HTTPException, status, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
+from ..core.config import settings
 from ..core.database import get_db
 from ..core.auth import (
     authenticate_user, 
@@ -9,8 +12,11 @@ from ..core.auth import (
     create_refresh_token,
     store_refresh_token,
     verify_refresh_token,
-    get_password_hash
+    get_user_by_email,
+    get_password_hash_async
 )
+from ..core.executors import ExecutorBusy
+from ..core.rate_limit import login_rate_limiter, RateLimitExceeded
 from ..models.user import User
 from ..models.schemas import (
     LoginCredentials, 
@@ -23,11 +29,64 @@ from ..models.schemas import (
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+def password_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry",
+        headers={"Retry-After": "1"}
+    )
+
+def too_many_attempts(exc: RateLimitExceeded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many login attempts, please retry later",
+        headers={"Retry-After": exc.retry_after_header}
+    )
+
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(item.strip(), strict=False)
+    for item in settings.TRUSTED_PROXIES.split(",") if item.strip()
+]
+
+def is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+def client_ip(request: Request) -> str:
+    """Client address for rate limiting.
+
+    Behind a trusted proxy, the client is the right-most X-Forwarded-For
+    address that is not a trusted proxy itself: addresses further left
+    come from the client and may be forged.
+    """
+    host = request.client.host if request.client else ""
+    if not is_trusted_proxy(host):
+        return host
+    forwarded = [
+        address.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for address in header.split(",")
+        if address.strip()
+    ]
+    for address in reversed(forwarded):
+        if not is_trusted_proxy(address):
+            return address
+    return forwarded[0] if forwarded else host
+
 @router.post("/login", response_model=AuthResponse)
-async def login(credentials: LoginCredentials, db: Session = Depends(get_db)):
+async def login(credentials: LoginCredentials, request: Request, db: AsyncSession = Depends(get_db)):
     """Authenticate user and return access and refresh tokens."""
+    # Rejected before any bcrypt work
+    try:
+        await login_rate_limiter.check(client_ip(request), credentials.email)
+    except RateLimitExceeded as e:
+        raise too_many_attempts(e)
+    
     try:
-        user = authenticate_user(db, credentials.email, credentials.password)
+        user = await authenticate_user(db, credentials.email, credentials.password)
         
         if not user:
             raise HTTPException(
@@ -42,6 +101,8 @@ async def login(credentials: LoginCredentials, db: Session = Depends(get_db)):
             )
     except HTTPException:
         raise
+    except ExecutorBusy:
+        raise password_pool_busy()
     except Exception as e:
         print(f"Login error: {e}")
         raise HTTPException(
@@ -49,12 +110,14 @@ async def login(credentials: LoginCredentials, db: Session = Depends(get_db)):
             detail="Authentication service error"
         )
     
+    await login_rate_limiter.reset(credentials.email)
+    
     # Create tokens
     access_token = create_access_token(data={"sub": str(user.id)})
     refresh_token = create_refresh_token()
     
     # Store refresh token in database
-    store_refresh_token(db, user.id, refresh_token)
+    await store_refresh_token(db, user.id, refresh_token)
     
     # Convert user to UserProfile format expected by frontend
     user_profile = UserProfile.from_user(user)
@@ -66,18 +129,29 @@ async def login(credentials: LoginCredentials, db: Session = Depends(get_db)):
     )
 
 @router.post("/register", response_model=AuthResponse)
-async def register(user_data: RegisterData, db: Session = Depends(get_db)):
+async def register(user_data: RegisterData, request: Request, db: AsyncSession = Depends(get_db)):
     """Register a new user."""
+    # Registration hashes a password too: it shares the per-IP budget
+    try:
+        await login_rate_limiter.check(client_ip(request))
+    except RateLimitExceeded as e:
+        raise too_many_attempts(e)
+    
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await get_user_by_email(db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Email already registered"
         )
+    # Do not hold a pooled connection while bcrypt runs
+    await db.close()
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = await get_password_hash_async(user_data.password)
+    except ExecutorBusy:
+        raise password_pool_busy()
     
     db_user = User(
         email=user_data.email,
@@ -90,10 +164,10 @@ async def register(user_data: RegisterData, db: Session = Depends(get_db)):
     
     try:
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Email already registered"
@@ -104,7 +178,7 @@ async def register(user_data: RegisterData, db: Session = Depends(get_db)):
     refresh_token = create_refresh_token()
     
     # Store refresh token in database
-    store_refresh_token(db, db_user.id, refresh_token)
+    await store_refresh_token(db, db_user.id, refresh_token)
     
     # Convert user to UserProfile format expected by frontend
     user_profile = UserProfile.from_user(db_user)
@@ -116,9 +190,9 @@ async def register(user_data: RegisterData, db: Session = Depends(get_db)):
     )
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
+async def refresh_token(token_data: TokenRefresh, db: AsyncSession = Depends(get_db)):
     """Refresh access token using refresh token."""
-    user = verify_refresh_token(db, token_data.refreshToken)
+    user = await verify_refresh_token(db, token_data.refreshToken)
     
     if not user:
         raise HTTPException(
@@ -6,8 +6,11 @@ from pydantic import BaseModel
 
 from ..core.database import get_db
 from ..core.auth import get_current_user
+from ..core.storage import get_storage
+from ..core.timing import span
 from ..models.user import User
-from ..services.mistral_service import mistral_service
+from ..services.llm_usage import LLMQuotaExceeded, usage_scope
+from ..services.mistral_service import get_mistral_service
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -26,10 +29,41 @@ class ChatMessagesRequest(BaseModel):
     chatId: str
     page: int = 1
 
-# Temporary in-memory storage (replace with database later)
-fake_chats: Dict[str, Dict] = {}
-fake_messages: Dict[str, List[Dict]] = {}
-chat_counter = 0
+# Previous messages sent to the model with each prompt (MistralService.chat keeps the last 10)
+CHAT_CONTEXT_MESSAGES = 10
+
+def to_chat_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored message in the shape the chat API (and the helpers below) use"""
+    return {
+        "_id": f"msg_{message['index'] + 1}",
+        "message": message["content"],
+        "type": "user" if message["role"] == "user" else "bot",
+        "createdAt": message["created_at"]
+    }
+
+def chat_summary(chat: Dict[str, Any], user: User) -> Dict[str, Any]:
+    return {
+        "_id": chat["_id"],
+        "chatName": chat["name"],
+        "createdAt": chat["created_at"],
+        "user": {
+            "_id": str(user.id),
+            "firstname": user.firstname,
+            "lastname": user.lastname
+        }
+    }
+
+async def get_user_chat(chat_id: str, current_user: User) -> Dict[str, Any]:
+    """Get a chat, checking that it belongs to the user"""
+    chat = await get_storage().get_conversation(chat_id)
+    
+    if chat is None or chat["mission_id"] is not None:
+        raise HTTPException(status_code=404, detail="Chat not found")
+    
+    if chat["user_id"] != current_user.id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    return chat
 
 # Helper functions for audit workflow
 def determine_audit_phase(user_input: str, conversation_history: List[Dict]) -> str:
@@ -217,20 +251,8 @@ def generate_ancs_report(mission_data: Dict[str, Any]) -> str:
 @router.get("/list")
 async def get_chat_list(current_user: User = Depends(get_current_user)):
     """Get list of user's chats"""
-    user_chats = []
-    for chat_id, chat in fake_chats.items():
-        if chat["user_id"] == current_user.id:
-            user_chats.append({
-                "_id": chat_id,
-                "chatName": chat["chatName"],
-                "createdAt": chat["createdAt"],
-                "user": {
-                    "_id": str(current_user.id),
-                    "firstname": current_user.firstname,
-                    "lastname": current_user.lastname
-                }
-            })
-    return user_chats
+    chats = await get_storage().list_conversations(current_user.id)
+    return [chat_summary(chat, current_user) for chat in chats]
 
 @router.post("/create")
 async def create_chat(
@@ -238,31 +260,9 @@ async def create_chat(
     current_user: User = Depends(get_current_user)
 ):
     """Create a new chat"""
-    global chat_counter
-    chat_counter += 1
-    chat_id = f"chat_{chat_counter}"
-    
-    new_chat = {
-        "chatName": request.chatName,
-        "user_id": current_user.id,
-        "createdAt": datetime.utcnow().isoformat(),
-    }
+    chat = await get_storage().create_conversation(current_user.id, name=request.chatName)
     
-    fake_chats[chat_id] = new_chat
-    fake_messages[chat_id] = []
-    
-    return {
-        "chat": {
-            "_id": chat_id,
-            "chatName": request.chatName,
-            "createdAt": new_chat["createdAt"],
-            "user": {
-                "_id": str(current_user.id),
-                "firstname": current_user.firstname,
-                "lastname": current_user.lastname
-            }
-        }
-    }
+    return {"chat": chat_summary(chat, current_user)}
 
 @router.post("/message")
 async def send_message(
@@ -271,44 +271,44 @@ async def send_message(
 ):
     """Send a message in a chat"""
     chat_id = request.chatId
+    await get_user_chat(chat_id, current_user)
+    storage = get_storage()
+    asked_at = datetime.utcnow()
     
-    if chat_id not in fake_chats:
-        raise HTTPException(status_code=404, detail="Chat not found")
-    
-    if fake_chats[chat_id]["user_id"] != current_user.id:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    # Create user message
-    user_message = {
-        "_id": f"msg_{len(fake_messages[chat_id]) + 1}",
-        "message": request.prompt,
-        "type": "user",
-        "createdAt": datetime.utcnow().isoformat()
-    }
-    
-    fake_messages[chat_id].append(user_message)
-    
-    # Get conversation history for context
-    conversation_history = fake_messages[chat_id][:-1]  # Exclude the just-added user message
+    with span("history"):
+        # Get conversation history for context (only the messages the model sees)
+        recent = await storage.recent_messages(chat_id, CHAT_CONTEXT_MESSAGES)
+        conversation_history = [to_chat_message(message) for message in recent]
     
     # Generate AI response using Mistral service
     try:
         # Always use general chat functionality
-        ai_response = await mistral_service.chat(request.prompt, conversation_history)
+        with usage_scope(current_user):
+            ai_response = await get_mistral_service().chat(request.prompt, conversation_history)
             
+    except LLMQuotaExceeded as e:
+        # Nothing is stored, so a retry does not duplicate the prompt
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         # Fallback to simple response if Mistral fails
         ai_response = f"Je suis désolé, je n'ai pas pu traiter votre demande. Erreur: {str(e)}"
     
-    # Create bot response
-    bot_response = {
-        "_id": f"msg_{len(fake_messages[chat_id]) + 1}",
-        "message": ai_response,
-        "type": "bot", 
-        "createdAt": datetime.utcnow().isoformat()
-    }
+    # Store the user message and the bot response together, so that
+    # concurrent sends to the same chat cannot interleave them
+    with span("history"):
+        stored = await storage.append_messages(chat_id, [
+            {"role": "user", "content": request.prompt, "created_at": asked_at},
+            {"role": "assistant", "content": ai_response}
+        ])
     
-    fake_messages[chat_id].append(bot_response)
+    if stored is None:
+        # Chat deleted while the response was generated
+        raise HTTPException(status_code=404, detail="Chat not found")
+    bot_response = to_chat_message(stored[-1])
     
     return {
         "message": {
@@ -326,14 +326,9 @@ async def get_chat_messages(
 ):
     """Get messages for a chat"""
     chat_id = request.chatId
+    await get_user_chat(chat_id, current_user)
     
-    if chat_id not in fake_chats:
-        raise HTTPException(status_code=404, detail="Chat not found")
-    
-    if fake_chats[chat_id]["user_id"] != current_user.id:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    messages = fake_messages.get(chat_id, [])
+    messages = [to_chat_message(message) for message in await get_storage().list_messages(chat_id)]
     
     return {
         "data": messages
@@ -346,15 +341,8 @@ async def delete_chat(
 ):
     """Delete a chat"""
     chat_id = request.chatId
+    await get_user_chat(chat_id, current_user)
     
-    if chat_id not in fake_chats:
-        raise HTTPException(status_code=404, detail="Chat not found")
-    
-    if fake_chats[chat_id]["user_id"] != current_user.id:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    del fake_chats[chat_id]
-    if chat_id in fake_messages:
-        del fake_messages[chat_id]
+    await get_storage().delete_conversation(chat_id)
     
     return {"message": "Chat deleted successfully"}
\ No newline at end of file
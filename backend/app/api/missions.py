@@ -1,31 +1,68 @@
-from fastapi import APIRouter, HTTPException, Body, UploadFile, File, Depends
-from fastapi.responses import StreamingResponse
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Body, UploadFile, File, Depends, Query
+from fastapi.responses import StreamingResponse, Response, FileResponse
+from starlette.background import BackgroundTask
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
+import aiofiles
 import json
 import io
+import os
 
 from ..core.database import get_db
 from ..core.auth import get_current_user
+from ..core.config import settings
+from ..core.executors import ExecutorBusy, ExecutorTimeout, WorkerCrashed
+from ..core.storage import get_storage
 from ..models.user import User
+from ..services.evidence_service import evidence_service
+from ..services.excel_service import excel_service
+from ..services.pdf_service import pdf_service
+from ..services.llm_usage import LLMQuotaExceeded, usage_scope
+from ..services.mistral_service import get_mistral_service
+from ..services.synthesis_service import synthesis_service
 
 router = APIRouter(prefix="/api/missions", tags=["missions"])
 
-# Temporary in-memory storage for missions (replace with proper DB later if needed)
-fake_missions: Dict[str, Dict] = {}
-mission_counter = 0
+# Formes de valeur acceptées : (test, description pour le message d'erreur)
+VALUE_SHAPES = {
+    "text": (lambda value: isinstance(value, str), "a string"),
+    "object": (lambda value: isinstance(value, dict), "an object"),
+    "objects": (
+        lambda value: isinstance(value, list) and all(isinstance(item, dict) for item in value),
+        "a list of objects"
+    ),
+    "texts": (
+        lambda value: isinstance(value, list) and all(isinstance(item, str) for item in value),
+        "a list of strings"
+    ),
+}
+
+# Champs de mission modifiables (livrables et informations du rapport) et
+# forme de leur valeur : les exports et la synthèse les lisent sans autre contrôle
+MISSION_UPDATABLE_FIELDS = {
+    "title": "text",
+    "description": "text",
+    "status": "text",
+    "cadrage": "object",
+    "checklist": "objects",
+    "constats": "objects",
+    "synthesis": "text",
+    "entite": "text",
+    "referentiel": "text",
+    "auditeur": "text",
+    "contexte": "text",
+    "perimetre": "object",
+    "recommendations": "texts",
+    "conclusion": "text",
+}
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 @router.get("/", response_model=List[Dict[str, Any]])
 async def get_all_missions(current_user: User = Depends(get_current_user)):
     """Récupérer toutes les missions"""
-    user_missions = []
-    for mission_id, mission in fake_missions.items():
-        if mission["user_id"] == current_user.id:
-            mission_copy = mission.copy()
-            mission_copy["_id"] = mission_id
-            user_missions.append(mission_copy)
-    return user_missions
+    return await get_storage().list_missions(current_user.id)
 
 @router.post("/", response_model=Dict[str, Any])
 async def create_mission(
@@ -34,43 +71,51 @@ async def create_mission(
     current_user: User = Depends(get_current_user)
 ):
     """Créer une nouvelle mission d'audit"""
-    global mission_counter
-    mission_counter += 1
-    mission_id = f"mission_{mission_counter}"
-    
-    new_mission = {
-        "title": title,
-        "description": description,
-        "status": "initial",
-        "user_id": current_user.id,
-        "created_at": datetime.utcnow().isoformat(),
-        "conversation_history": []
-    }
-    
-    fake_missions[mission_id] = new_mission
+    mission = await get_storage().create_mission(current_user.id, title, description)
     
     return {
-        "mission_id": mission_id,
+        "mission_id": mission["_id"],
         "status": "initial",
         "message": "Mission créée avec succès"
     }
 
+async def get_user_mission(mission_id: str, current_user: User) -> Dict[str, Any]:
+    """Récupérer une mission en vérifiant qu'elle appartient à l'utilisateur"""
+    mission = await get_storage().get_mission(mission_id)
+    if mission is None:
+        raise HTTPException(status_code=404, detail="Mission not found")
+    
+    if mission["user_id"] != current_user.id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return mission
+
 @router.get("/{mission_id}")
 async def get_mission(
     mission_id: str,
     current_user: User = Depends(get_current_user)
 ):
-    """Récupérer une mission par son ID"""
-    if mission_id not in fake_missions:
-        raise HTTPException(status_code=404, detail="Mission not found")
+    """Récupérer une mission par son ID (sans les messages, voir /messages)"""
+    return await get_user_mission(mission_id, current_user)
+
+@router.patch("/{mission_id}")
+async def update_mission(
+    mission_id: str,
+    updates: Dict[str, Any] = Body(...),
+    current_user: User = Depends(get_current_user)
+):
+    """Mettre à jour les livrables d'une mission (cadrage, checklist, constats...)"""
+    mission = await get_user_mission(mission_id, current_user)
     
-    mission = fake_missions[mission_id]
-    if mission["user_id"] != current_user.id:
-        raise HTTPException(status_code=403, detail="Access denied")
+    unknown = set(updates) - MISSION_UPDATABLE_FIELDS.keys()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
     
-    mission_copy = mission.copy()
-    mission_copy["_id"] = mission_id
-    return mission_copy
+    for field, value in updates.items():
+        is_valid, expected = VALUE_SHAPES[MISSION_UPDATABLE_FIELDS[field]]
+        if not is_valid(value):
+            raise HTTPException(status_code=422, detail=f"Field {field} must be {expected}")
+    
+    return await get_storage().update_mission(mission_id, updates)
 
 @router.post("/{mission_id}/message")
 async def add_message(
@@ -79,34 +124,267 @@ async def add_message(
     current_user: User = Depends(get_current_user)
 ):
     """Ajouter un message à la conversation"""
-    if mission_id not in fake_missions:
-        raise HTTPException(status_code=404, detail="Mission not found")
-    
-    mission = fake_missions[mission_id]
-    if mission["user_id"] != current_user.id:
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    # Add user message to history
-    user_message = {
-        "role": "user",
-        "content": content,
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    mission["conversation_history"].append(user_message)
+    mission = await get_user_mission(mission_id, current_user)
+    storage = get_storage()
     
+    # Add user message and the bot response to history, together
     # Simple bot response (you can integrate your existing mission logic here)
-    bot_response = {
-        "role": "assistant", 
-        "content": f"Merci pour votre message: {content}. Je traite votre demande...",
-        "timestamp": datetime.utcnow().isoformat()
-    }
-    mission["conversation_history"].append(bot_response)
+    stored = await storage.append_messages(mission["conversation_id"], [
+        {"role": "user", "content": content},
+        {"role": "assistant", "content": f"Merci pour votre message: {content}. Je traite votre demande..."}
+    ])
+    bot_response = stored[-1]
     
     # Update mission status
-    mission["status"] = "active"
-    mission["updated_at"] = datetime.utcnow().isoformat()
+    await storage.update_mission(mission_id, {"status": "active"})
     
     return {
         "message": bot_response["content"],
         "status": "active"
-    }
\ No newline at end of file
+    }
+
+@router.get("/{mission_id}/messages")
+async def list_messages(
+    mission_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user)
+):
+    """Lister les messages de la conversation d'une mission, par page"""
+    mission = await get_user_mission(mission_id, current_user)
+    storage = get_storage()
+    
+    conversation = await storage.get_conversation(mission["conversation_id"])
+    messages = await storage.list_messages(mission["conversation_id"], offset, limit)
+    return {"messages": messages, "total": conversation["message_count"] if conversation else 0}
+
+@router.post("/{mission_id}/evidence")
+async def upload_evidence(
+    mission_id: str,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user)
+):
+    """Téléverser une preuve (XLSX, CSV, PDF, logs) et en extraire le texte"""
+    mission = await get_user_mission(mission_id, current_user)
+    
+    upload_path = evidence_service.new_upload_path()
+    try:
+        # Copie en flux vers le disque : le fichier n'est jamais chargé entièrement en mémoire
+        size = 0
+        async with aiofiles.open(upload_path, "wb") as out:
+            while chunk := await file.read(1024 * 1024):
+                size += len(chunk)
+                if size > settings.EVIDENCE_MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Evidence files are limited to {settings.EVIDENCE_MAX_UPLOAD_BYTES} bytes"
+                    )
+                await out.write(chunk)
+        
+        # Hachage et extraction dans le pool de processus
+        manifest = await evidence_service.ingest(upload_path, file.filename or "preuve")
+    except ExecutorBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Evidence service busy, retry later",
+            headers={"Retry-After": "5"}
+        )
+    except WorkerCrashed:
+        raise HTTPException(status_code=500, detail="Evidence extraction failed")
+    finally:
+        # L'extraction déplace ou supprime le fichier ; s'il est encore là, elle a échoué
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+    
+    evidence = {
+        "sha256": manifest["sha256"],
+        "filename": manifest["filename"],
+        "size": manifest["size"],
+        "chunks": manifest["chunks"],
+        "chars": manifest["chars"],
+        "truncated": manifest["truncated"],
+        "error": manifest["error"],
+        "uploaded_at": datetime.utcnow().isoformat()
+    }
+    if not any(item["sha256"] == evidence["sha256"] for item in mission.get("evidence", [])):
+        await get_storage().append_to_mission(mission_id, "evidence", evidence)
+    
+    return {"evidence": evidence, "cached": manifest["cached"]}
+
+@router.get("/{mission_id}/evidence")
+async def list_evidence(
+    mission_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Lister les preuves d'une mission"""
+    mission = await get_user_mission(mission_id, current_user)
+    return {"evidence": mission.get("evidence", [])}
+
+@router.post("/{mission_id}/constats")
+async def create_constat(
+    mission_id: str,
+    vulnerability: str = Body(..., embed=True),
+    evidence_ids: Optional[List[str]] = Body(None, embed=True),
+    current_user: User = Depends(get_current_user)
+):
+    """Générer un constat à partir d'une vulnérabilité et des preuves de la mission"""
+    mission = await get_user_mission(mission_id, current_user)
+    
+    evidence = mission.get("evidence", [])
+    if evidence_ids is not None:
+        evidence = [item for item in evidence if item["sha256"] in evidence_ids]
+    
+    context = {
+        "mission": mission["title"],
+        "description": mission["description"],
+        "preuves": evidence_service.build_prompt_context(evidence)
+    }
+    
+    try:
+        with usage_scope(current_user, mission_id=mission_id):
+            constat = await get_mistral_service().generate_constat(vulnerability, context)
+    except LLMQuotaExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Constat generation failed: {str(e)}")
+    
+    await get_storage().append_to_mission(mission_id, "constats", constat)
+    
+    return {"constat": constat}
+
+@router.post("/{mission_id}/synthesis")
+async def generate_synthesis(
+    mission_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Générer la synthèse executive de la mission à partir de ses constats, résumés par lots"""
+    mission = await get_user_mission(mission_id, current_user)
+    
+    try:
+        with usage_scope(current_user, mission_id=mission_id):
+            result = await synthesis_service.synthesize(mission)
+    except LLMQuotaExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Synthesis generation failed: {str(e)}")
+    
+    return result
+
+async def render_export(render, data: Any, filename: str, media_type: str) -> Response:
+    """Exécuter un rendu dans le pool dédié et renvoyer le fichier"""
+    try:
+        output = await render(data)
+    except ExecutorBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Export service busy, retry later",
+            headers={"Retry-After": "5"}
+        )
+    except ExecutorTimeout:
+        raise HTTPException(status_code=504, detail="Export rendering timed out")
+    except WorkerCrashed:
+        raise HTTPException(status_code=500, detail="Export rendering failed")
+    
+    return Response(
+        content=output.getvalue(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/{mission_id}/export/cadrage")
+async def export_cadrage(
+    mission_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Exporter le cadrage de la mission en Excel"""
+    mission = await get_user_mission(mission_id, current_user)
+    return await render_export(
+        excel_service.generate_cadrage_excel, mission.get("cadrage", {}),
+        f"cadrage_{mission_id}.xlsx", XLSX_MEDIA_TYPE
+    )
+
+@router.get("/{mission_id}/export/checklist")
+async def export_checklist(
+    mission_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Exporter la checklist de la mission en Excel"""
+    mission = await get_user_mission(mission_id, current_user)
+    return await render_export(
+        excel_service.generate_checklist_excel, mission.get("checklist", []),
+        f"checklist_{mission_id}.xlsx", XLSX_MEDIA_TYPE
+    )
+
+@router.get("/{mission_id}/export/constats/{index}")
+async def export_constat(
+    mission_id: str,
+    index: int,
+    current_user: User = Depends(get_current_user)
+):
+    """Exporter une fiche de constat en Excel"""
+    mission = await get_user_mission(mission_id, current_user)
+    constats = mission.get("constats", [])
+    if index < 0 or index >= len(constats):
+        raise HTTPException(status_code=404, detail="Constat not found")
+    
+    return await render_export(
+        excel_service.generate_constat_excel, constats[index],
+        f"constat_{mission_id}_{index + 1}.xlsx", XLSX_MEDIA_TYPE
+    )
+
+@router.get("/{mission_id}/export/workbook")
+async def export_workbook(
+    mission_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Exporter la mission complète dans un seul classeur, envoyé au fil de sa génération"""
+    mission = await get_user_mission(mission_id, current_user)
+    
+    # La mission lue est une copie : les modifications pendant l'envoi ne l'affectent pas
+    mission_data = {
+        "cadrage": mission.get("cadrage", {}),
+        "checklist": mission.get("checklist", []),
+        "constats": mission.get("constats", [])
+    }
+    
+    return StreamingResponse(
+        excel_service.stream_mission_workbook(mission_data),
+        media_type=XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="mission_{mission_id}.xlsx"'}
+    )
+
+@router.get("/{mission_id}/export/report")
+async def export_report(
+    mission_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Exporter le rapport ANCS de la mission en PDF"""
+    mission = await get_user_mission(mission_id, current_user)
+    
+    report_data = dict(mission)
+    report_data.setdefault("perimetre", mission.get("cadrage", {}))
+    
+    # Rendu dans un processus isolé : une donnée invalide ou un plantage n'affecte pas l'API
+    try:
+        path = await pdf_service.generate_ancs_report_file(report_data)
+    except ExecutorBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Report service busy, retry later",
+            headers={"Retry-After": "5"}
+        )
+    except ExecutorTimeout:
+        raise HTTPException(status_code=504, detail="Report rendering timed out")
+    except WorkerCrashed:
+        raise HTTPException(status_code=500, detail="Report rendering failed")
+    except ValueError as e:
+        # reportlab refuse ainsi un balisage invalide dans les textes de la mission ;
+        # les autres erreurs sont des erreurs du serveur
+        raise HTTPException(status_code=422, detail=f"Invalid report data: {str(e)}")
+    
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"rapport_{mission_id}.pdf",
+        background=BackgroundTask(os.remove, path)
+    )
@@ -1,24 +1,93 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from datetime import datetime
+import base64
+import string
 
 from ..core.database import get_db
 from ..core.auth import get_current_user, get_current_admin_user
-from ..models.user import User
+from ..core.auth_cache import invalidate_user
+from ..core.config import settings
+from ..core.executors import ExecutorBusy
+from ..services.llm_usage import effective_quota, llm_usage_ledger, next_quota_reset
+from ..services.user_import_service import parse_import_file, user_import_service
+from ..models.user import User, UserCount, user_count_keys
 from ..models.schemas import (
     UserProfile, 
     UserProfileResponse, 
     UpdateProfile, 
     UpdateUserStatus,
-    UserListResponse
+    UserListResponse,
+    UserImportResponse,
+    LLMUsageToday
 )
 
 router = APIRouter(prefix="/user", tags=["users"])
 
+def import_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Import files are limited to {settings.BULK_IMPORT_MAX_BYTES} bytes"
+    )
+
+async def read_import_body(request: Request) -> bytes:
+    """Request body, refused as soon as it exceeds BULK_IMPORT_MAX_BYTES."""
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.BULK_IMPORT_MAX_BYTES:
+            raise import_too_large()
+    return bytes(body)
+
+def encode_cursor(user: User) -> str:
+    """Opaque cursor pointing just after user in (created_at, id) order."""
+    raw = f"{user.created_at.isoformat()}|{user.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(user_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+# SQLite's lower() only folds ASCII letters; search terms are folded the
+# same way, so "É" matches "Élodie" (but not "élodie")
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def sqlite_lower(value: str) -> str:
+    return value.translate(ASCII_LOWER)
+
+def prefix_match(column, prefix: str):
+    """Case-insensitive prefix test written as a range, so lower(column) indexes apply.
+
+    prefix must be folded with sqlite_lower, like lower(column).
+    """
+    lowered = func.lower(column)
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(lowered >= prefix, lowered < upper_bound)
+
+async def count_users(db: AsyncSession, role: Optional[str], is_active: Optional[bool]) -> int:
+    """Number of users matching the filters, read from the user_counts table."""
+    if role is not None and is_active is not None:
+        key = user_count_keys(role, is_active)[3]
+    elif role is not None:
+        key = f"role:{role}"
+    elif is_active is not None:
+        key = f"active:{int(is_active)}"
+    else:
+        key = "all"
+    result = await db.execute(select(UserCount.count).where(UserCount.key == key))
+    return result.scalar() or 0
+
 @router.get("/profile", response_model=UserProfileResponse)
 async def get_user_profile(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """Get current user's profile."""
     user_profile = UserProfile.from_user(current_user)
@@ -29,9 +98,17 @@ async def get_user_profile(
 async def update_user_profile(
     profile_data: UpdateProfile,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update current user's profile."""
+    # current_user may come from the auth cache (detached); edit a fresh copy
+    current_user = await db.get(User, current_user.id)
+    if current_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
     # Update only provided fields
     if profile_data.firstname is not None:
         current_user.firstname = profile_data.firstname
@@ -39,10 +116,13 @@ async def update_user_profile(
         current_user.lastname = profile_data.lastname
     if profile_data.email is not None:
         # Check if email is already taken by another user
-        existing_user = db.query(User).filter(
-            User.email == profile_data.email,
-            User.id != current_user.id
-        ).first()
+        result = await db.execute(
+            select(User.id).where(
+                User.email == profile_data.email,
+                User.id != current_user.id
+            )
+        )
+        existing_user = result.first()
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -51,14 +131,16 @@ async def update_user_profile(
         current_user.email = profile_data.email
     
     try:
-        db.commit()
-        db.refresh(current_user)
+        await db.commit()
+        await db.refresh(current_user)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to update profile"
         )
+    finally:
+        invalidate_user(current_user.id)
     
     user_profile = UserProfile(
         id=current_user.id,
@@ -72,27 +154,142 @@ async def update_user_profile(
     
     return UserProfileResponse(user=user_profile)
 
+@router.get("/usage", response_model=LLMUsageToday)
+async def get_user_llm_usage(
+    current_user: User = Depends(get_current_user)
+):
+    """Get current user's LLM token usage today and daily quota."""
+    used = await llm_usage_ledger.tokens_used_today(current_user.id)
+    quota = effective_quota(current_user.llm_daily_token_quota)
+    
+    return LLMUsageToday(
+        usedTokens=used,
+        dailyTokenQuota=quota,
+        remainingTokens=None if quota is None else max(0, quota - used),
+        resetsAt=next_quota_reset()
+    )
+
 @router.get("/all", response_model=UserListResponse)
 async def get_all_users(
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = Query(None, alias="isActive"),
+    q: Optional[str] = Query(None, min_length=1, max_length=100),
+    include_total: bool = Query(False, alias="includeTotal"),
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all users (admin only)."""
-    users = db.query(User).all()
+    """List users (admin only), one page at a time.
     
-    user_profiles = [UserProfile.from_user(user) for user in users]
+    Pages follow (created_at, id) order; pass the returned nextCursor to get
+    the next one. q is a prefix of the email, first name or last name,
+    case-insensitive for ASCII letters (as SQLite's lower()). The total (includeTotal) comes from counters and is only
+    available when q is not used.
+    """
+    query = select(User).order_by(User.created_at, User.id).limit(limit + 1)
+    if role is not None:
+        query = query.where(User.role == role)
+    if is_active is not None:
+        query = query.where(User.is_active == is_active)
+    if q:
+        prefix = sqlite_lower(q)
+        query = query.where(or_(
+            prefix_match(User.email, prefix),
+            prefix_match(User.firstname, prefix),
+            prefix_match(User.lastname, prefix)
+        ))
+    if cursor:
+        created_at, user_id = decode_cursor(cursor)
+        query = query.where(or_(
+            User.created_at > created_at,
+            and_(User.created_at == created_at, User.id > user_id)
+        ))
     
-    return UserListResponse(users=user_profiles)
+    result = await db.execute(query)
+    users = result.scalars().all()
+    next_cursor = encode_cursor(users[limit - 1]) if len(users) > limit else None
+    
+    user_profiles = [UserProfile.from_user(user) for user in users[:limit]]
+    total = await count_users(db, role, is_active) if include_total and not q else None
+    
+    return UserListResponse(users=user_profiles, nextCursor=next_cursor, total=total)
+
+@router.post("/import", response_model=UserImportResponse)
+async def import_users(
+    request: Request,
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create users in bulk (admin only).
+    
+    Accepts a CSV (header row: email, firstname, lastname, password, role)
+    or a JSON list, either as the request body (text/csv or application/json)
+    or as a multipart "file" field, of at most BULK_IMPORT_MAX_BYTES.
+    Returns one report entry per row.
+    """
+    content_type = request.headers.get("content-type", "")
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > settings.BULK_IMPORT_MAX_BYTES:
+        raise import_too_large()
+    
+    if content_type.startswith("multipart/form-data"):
+        # The form parser reads the whole body: only a declared length bounds it
+        if content_length is None:
+            raise HTTPException(
+                status_code=status.HTTP_411_LENGTH_REQUIRED,
+                detail="Content-Length required for multipart uploads"
+            )
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Missing file field"
+            )
+        content = await upload.read()
+        is_json = (upload.filename or "").lower().endswith(".json") or upload.content_type == "application/json"
+    elif "json" in content_type or "csv" in content_type or content_type.startswith("text/plain"):
+        content = await read_import_body(request)
+        is_json = "json" in content_type
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send CSV or JSON"
+        )
+    
+    try:
+        rows = parse_import_file(content, "json" if is_json else "csv")
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unreadable import file: {e}"
+        )
+    
+    if len(rows) > settings.BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BULK_IMPORT_MAX_ROWS} users per import"
+        )
+    
+    try:
+        return await user_import_service.import_users(db, rows)
+    except ExecutorBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Import service is busy, please retry",
+            headers={"Retry-After": "5"}
+        )
 
 @router.patch("/{user_id}/status")
 async def update_user_status(
     user_id: int,
     status_data: UpdateUserStatus,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user active status (admin only)."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
     if not user:
         raise HTTPException(
@@ -110,13 +307,15 @@ async def update_user_status(
     user.is_active = status_data.isActive
     
     try:
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to update user status"
         )
+    finally:
+        invalidate_user(user_id)
     
     return {"message": "User status updated successfully"}
\ No newline at end of file
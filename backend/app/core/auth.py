@@ -1,18 +1,29 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import hashlib
 import secrets
+import time
 
 from .config import settings
-from .database import get_db
+from .database import AsyncSessionLocal
+from .auth_cache import user_cache, token_cache
+from .executors import password_executor
+from .passwords import BCRYPT_ROUNDS
+from .timing import span
 from ..models.user import User, RefreshToken
 
 # Password hashing - simplified for compatibility
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12)
+# (hashes below min_rounds, e.g. from an older, cheaper policy, are upgraded at login)
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS
+)
 
 # JWT Bearer token
 security = HTTPBearer()
@@ -27,10 +38,27 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         simple_hash = hashlib.sha256(plain_password.encode()).hexdigest()
         return simple_hash == hashed_password
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also return a new hash if the stored one is below the current cost."""
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception:
+        return verify_password(plain_password, hashed_password), None
+
 def get_password_hash(password: str) -> str:
     """Hash a password."""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password executor, off the event loop."""
+    with span("bcrypt"):
+        return await password_executor.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password executor, off the event loop."""
+    with span("bcrypt"):
+        return await password_executor.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -47,6 +75,10 @@ def create_refresh_token() -> str:
     """Create a secure refresh token."""
     return secrets.token_urlsafe(32)
 
+def hash_refresh_token(refresh_token: str) -> str:
+    """Fixed-length digest under which a refresh token is stored and looked up."""
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
 def verify_token(token: str) -> Optional[dict]:
     """Verify and decode a JWT token."""
     try:
@@ -55,48 +87,129 @@ def verify_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
-    """Authenticate a user by email and password."""
-    user = db.query(User).filter(User.email == email).first()
+def verify_token_cached(token: str) -> Optional[dict]:
+    """Decode a JWT, reusing the decoded payload for tokens already seen."""
+    signature = token.rsplit(".", 1)[-1]
+    cached = token_cache.get(signature)
+    if cached is not None:
+        cached_token, payload = cached
+        if cached_token == token and payload.get("exp", 0) > time.time():
+            return payload
+    
+    payload = verify_token(token)
+    if payload is not None:
+        token_cache.set(signature, (token, payload), ttl=payload.get("exp", 0) - time.time())
+    return payload
+
+async def load_user(user_id: int) -> Optional[User]:
+    """Load a user in a short-lived session; the returned row is detached."""
+    with span("db.user"):
+        async with AsyncSessionLocal() as db:
+            return await db.get(User, user_id)
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    with span("db.user"):
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    """Authenticate a user, running the bcrypt check on the password executor."""
+    user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    # Return the connection to the pool while bcrypt runs; the loaded user
+    # stays usable and the session reconnects on its next query
+    await db.close()
+    with span("bcrypt"):
+        verified, new_hash = await password_executor.run(
+            verify_and_update_password, password, user.hashed_password
+        )
+    if not verified:
         return None
+    if new_hash:
+        await db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
+        await db.commit()
+        user.hashed_password = new_hash
     return user
 
-def store_refresh_token(db: Session, user_id: int, refresh_token: str) -> None:
+async def store_refresh_token(db: AsyncSession, user_id: int, refresh_token: str) -> None:
     """Store refresh token in database."""
     # Remove old refresh tokens for this user
-    db.query(RefreshToken).filter(RefreshToken.user_id == user_id).delete()
+    await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
     
     # Create new refresh token
     expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     db_token = RefreshToken(
-        token=refresh_token,
+        token_hash=hash_refresh_token(refresh_token),
         user_id=user_id,
         expires_at=expires_at
     )
     db.add(db_token)
-    db.commit()
+    await db.commit()
 
-def verify_refresh_token(db: Session, refresh_token: str) -> Optional[User]:
+async def verify_refresh_token(db: AsyncSession, refresh_token: str) -> Optional[User]:
     """Verify refresh token and return associated user."""
-    db_token = db.query(RefreshToken).filter(
-        RefreshToken.token == refresh_token,
-        RefreshToken.expires_at > datetime.utcnow()
-    ).first()
+    result = await db.execute(
+        select(RefreshToken.user_id).where(
+            RefreshToken.token_hash == hash_refresh_token(refresh_token),
+            RefreshToken.expires_at > datetime.utcnow()
+        )
+    )
+    user_id = result.scalar()
     
-    if not db_token:
+    if user_id is None:
         return None
     
-    user = db.query(User).filter(User.id == db_token.user_id).first()
-    return user
+    return await db.get(User, user_id)
+
+async def purge_expired_refresh_tokens(batch_size: int = settings.REFRESH_TOKEN_PURGE_BATCH) -> int:
+    """Delete expired refresh tokens in batches; returns the number removed.
+    
+    Each batch is its own short transaction, so logins are never blocked
+    behind one long delete.
+    """
+    removed = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            expired_ids = select(RefreshToken.id).where(
+                RefreshToken.expires_at <= datetime.utcnow()
+            ).limit(batch_size)
+            result = await db.execute(
+                delete(RefreshToken).where(RefreshToken.id.in_(expired_ids))
+            )
+            deleted = result.rowcount
+            await db.commit()
+        removed += deleted
+        if deleted < batch_size:
+            return removed
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+async def refresh_token_purge_loop(stop: asyncio.Event):
+    """Purge expired refresh tokens every REFRESH_TOKEN_PURGE_INTERVAL seconds until stop is set.
+    
+    Stopping lets a running purge finish its batch: cancelling it mid-query
+    could leave a pooled connection (and its aiosqlite thread) open.
+    """
+    while not stop.is_set():
+        try:
+            removed = await purge_expired_refresh_tokens()
+            if removed:
+                print(f"Purged {removed} expired refresh tokens")
+        except Exception as e:
+            print(f"Refresh token purge error: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.REFRESH_TOKEN_PURGE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> User:
-    """Get current authenticated user from JWT token."""
+    """Get current authenticated user from JWT token.
+    
+    Decoded tokens and users are cached in process, so the common case
+    does not touch the database. Routes that modify the user must reload
+    it in their own session and call invalidate_user.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -104,7 +217,8 @@ def get_current_user(
     )
     
     token = credentials.credentials
-    payload = verify_token(token)
+    with span("auth"):
+        payload = verify_token_cached(token)
     
     if payload is None:
         raise credentials_exception
@@ -118,9 +232,15 @@ def get_current_user(
     except (ValueError, TypeError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = user_cache.get(user_id)
     if user is None:
-        raise credentials_exception
+        # Read before loading: if the user is invalidated meanwhile (e.g.
+        # deactivated), the row loaded may be stale and is not cached
+        generation = user_cache.generation(user_id)
+        user = await load_user(user_id)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(user_id, user, generation=generation)
     
     if not user.is_active:
         raise HTTPException(
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from .config import settings
+
+class TTLCache:
+    """Bounded in-process cache whose entries expire after a fixed TTL.
+
+    Entries are evicted least-recently-used first once ``maxsize`` is
+    reached. The cache is per process: with several workers, an update made
+    in one worker reaches the others only when their entries expire, so the
+    TTL bounds how stale a principal can be.
+
+    A caller that loads a value on a miss reads generation() first and
+    passes it to set, so a load that raced with an invalidation does not
+    cache the stale value. Generations come from one clock advanced by
+    each invalidate; the last ``maxsize`` invalidations are remembered,
+    and a load older than a forgotten one is not cached (a miss, never a
+    stale value).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # key -> clock at its last invalidation, oldest first
+        self._invalidations: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._clock = 0
+        # Loads started before this clock may have raced with a forgotten invalidation
+        self._floor = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def generation(self, key: Hashable) -> int:
+        """Current generation of key, to pass to set after loading its value."""
+        with self._lock:
+            return self._clock
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None):
+        """Store value; ``ttl`` may shorten (never extend) the default lifetime.
+
+        With ``generation``, the value is dropped if key was invalidated since.
+        """
+        lifetime = self.ttl if ttl is None else min(ttl, self.ttl)
+        if lifetime <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and (
+                generation < self._floor or self._invalidations.get(key, 0) > generation
+            ):
+                return
+            self._entries[key] = (value, time.monotonic() + lifetime)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._clock += 1
+            self._invalidations[key] = self._clock
+            self._invalidations.move_to_end(key)
+            while len(self._invalidations) > max(self.maxsize, 1):
+                _, clock = self._invalidations.popitem(last=False)
+                self._floor = clock
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Authenticated users (detached User rows) keyed by user id
+user_cache = TTLCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL)
+
+# Decoded access tokens keyed by their signature segment
+token_cache = TTLCache(settings.AUTH_TOKEN_CACHE_SIZE, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+def invalidate_user(user_id: int):
+    """Drop a cached user so the next request reloads it from the database."""
+    user_cache.invalidate(user_id)
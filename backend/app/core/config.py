@@ -5,10 +5,145 @@ class Settings(BaseSettings):
     MISTRAL_API_KEY: str
     MISTRAL_MODEL: str = "mistral-large-latest"
     DATABASE_URL: str = "sqlite:///audit_automation.db"
+    # SQLite connection profile: "performance" (WAL, synchronous=NORMAL,
+    # mmap, larger cache), "durable" (WAL, synchronous=FULL) or "default"
+    DB_PROFILE: str = "performance"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    # Connection pool per engine (SQLite serializes writers, keep it small)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 30.0
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Expired refresh tokens are deleted periodically, in batches
+    REFRESH_TOKEN_PURGE_INTERVAL: float = 3600.0
+    REFRESH_TOKEN_PURGE_BATCH: int = 1000
+
+    # In-process caches of authenticated users and decoded access tokens
+    AUTH_USER_CACHE_TTL: float = 60.0
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+
+    # Login rate limiting, checked before any bcrypt work: token bucket per
+    # client IP, sliding window per email. Backend "memory" (per process)
+    # or "sqlite" (shared by all workers through LOGIN_RATE_LIMIT_DB).
+    # Expired state is pruned every LOGIN_RATE_LIMIT_PRUNE_INTERVAL seconds
+    # and each backend tracks at most LOGIN_RATE_LIMIT_MAX_KEYS keys
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_LIMIT_BACKEND: str = "memory"
+    LOGIN_RATE_LIMIT_DB: str = "rate_limit.db"
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = 100000
+    LOGIN_RATE_LIMIT_PRUNE_INTERVAL: float = 60.0
+    LOGIN_IP_BURST: int = 20
+    LOGIN_IP_PER_MINUTE: float = 30.0
+    LOGIN_EMAIL_MAX_ATTEMPTS: int = 10
+    LOGIN_EMAIL_WINDOW_SECONDS: float = 300.0
+    # Reverse proxies in front of the API (comma-separated addresses or
+    # CIDR ranges). Requests from them are limited by the client address
+    # they report in X-Forwarded-For; otherwise all clients behind a proxy
+    # share its bucket. Leave empty when uvicorn already resolves it
+    # (--proxy-headers with --forwarded-allow-ips)
+    TRUSTED_PROXIES: str = ""
+
+    # bcrypt hashing/verification pool (runs off the event loop)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_DEPTH: int = 64
+
+    # Admin bulk user import. Passwords are hashed at the normal bcrypt
+    # cost, in parallel worker processes; uploads above
+    # BULK_IMPORT_MAX_BYTES are refused before parsing
+    BULK_IMPORT_MAX_ROWS: int = 10000
+    BULK_IMPORT_MAX_BYTES: int = 5 * 1024 * 1024
+    BULK_IMPORT_BATCH_SIZE: int = 500
+    BULK_IMPORT_WORKERS: int = 0  # 0 = one per CPU core
+    BULK_IMPORT_QUEUE_DEPTH: int = 64
+
+    # Startup profile: "full" applies pending migrations and creates the admin
+    # user on boot, "fast" only checks the schema version (database
+    # provisioned beforehand with init_db.py)
+    STARTUP_PROFILE: str = "full"
+
+    # Request metrics middleware and the Prometheus /metrics endpoint
+    # (per worker process: scrape each worker or aggregate in Prometheus)
+    METRICS_ENABLED: bool = True
+
+    # Server-Timing response header with the stages of each request (auth,
+    # database, Mistral, rendering). Off by default: it shows internal
+    # timings to clients; /auth routes never get it
+    SERVER_TIMING_ENABLED: bool = False
+    # Log requests slower than this with their breakdown (0 = disabled)
+    SLOW_REQUEST_THRESHOLD_MS: float = 0.0
+
+    # Admin sampling profiler (/admin/profile) and its limits per call
+    PROFILER_ENABLED: bool = True
+    PROFILER_MAX_SECONDS: float = 60.0
+    PROFILER_MAX_RATE_HZ: float = 250.0
+
+    # LLM usage ledger: every Mistral call is recorded with its tokens,
+    # latency, template, user and mission, and written in batches.
+    # LLM_DAILY_TOKEN_QUOTA is the per-user default (0 = unlimited), which
+    # admins can override per user. Each worker re-reads the day's totals
+    # every LLM_USAGE_QUOTA_REFRESH seconds to see the other workers' usage
+    LLM_DAILY_TOKEN_QUOTA: int = 0
+    LLM_USAGE_BATCH_SIZE: int = 100
+    LLM_USAGE_FLUSH_INTERVAL: float = 5.0
+    LLM_USAGE_QUOTA_REFRESH: float = 30.0
+
+    # Mission synthesis: findings are summarized in batches of
+    # SYNTHESIS_BATCH_SIZE (at most SYNTHESIS_CONCURRENCY LLM calls at a
+    # time), summaries merged SYNTHESIS_FANIN at a time, then reduced
+    # into the executive summary
+    SYNTHESIS_BATCH_SIZE: int = 10
+    SYNTHESIS_FANIN: int = 8
+    SYNTHESIS_CONCURRENCY: int = 4
+
+    # Storage of missions and conversations: "sqlite" (tables in
+    # DATABASE_URL) or "document" (the document database below). The
+    # document backend keeps messages in buckets of CONVERSATION_BUCKET_SIZE
+    STORAGE_BACKEND: str = "sqlite"
+    CONVERSATION_BUCKET_SIZE: int = 100
+
+    # Document database: MongoDB through Motor, or the in-memory mock
+    # (app.core.mock_database) for tests and local development
+    USE_MOCK_DB: bool = True
+    MONGODB_URL: str = "mongodb://localhost:27017"
+    DATABASE_NAME: str = "audit_automation"
+
+    # Evidence files (preuves) uploaded to missions
+    EVIDENCE_DIR: str = "evidence"
+    EVIDENCE_WORKERS: int = 2
+    EVIDENCE_QUEUE_DEPTH: int = 8
+    EVIDENCE_MAX_UPLOAD_BYTES: int = 100 * 1024 * 1024
+    EVIDENCE_CHUNK_CHARS: int = 8000
+    EVIDENCE_MAX_CHARS_PER_FILE: int = 2000000
+    EVIDENCE_PROMPT_CHARS: int = 6000
+
+    # Excel exports: "streaming" (cached styled templates) or "pandas" (legacy DataFrame path)
+    EXCEL_WRITER_MODE: str = "streaming"
+    ARTIFACT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Excel/PDF rendering pool: "process" (default) keeps openpyxl and
+    # pandas off the API process's GIL, at the cost of pickling each
+    # export's data and result; "thread" avoids that copy but rendering
+    # then competes with request handling for the GIL
+    RENDER_POOL_KIND: str = "process"
+    RENDER_POOL_WORKERS: int = 2
+    RENDER_QUEUE_DEPTH: int = 8
+
+    # ANCS PDF rendering: warm worker processes (0 = one per CPU core)
+    PDF_WORKERS: int = 0
+    PDF_QUEUE_DEPTH: int = 16
+    PDF_JOB_TIMEOUT: float = 120.0
+    PDF_OUTPUT_DIR: str = "reports"
+    PDF_PREWARM: bool = True
+    # Large-report mode: chunked LongTables and spooled output
+    PDF_LARGE_REPORT_THRESHOLD: int = 50
+    PDF_FINDINGS_PER_CHUNK: int = 100
+    PDF_SPOOL_MAX_BYTES: int = 8 * 1024 * 1024
 
     class Config:
         env_file = ".env"
@@ -1,28 +1,167 @@
-from sqlalchemy import create_engine
+import os
+from typing import Optional
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings
 
-# Create SQLAlchemy engine
+# Async drivers used when DATABASE_URL names none
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its async driver (sqlite:/// -> sqlite+aiosqlite:///)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False) if driver else url
+
+# SQLite pragmas applied to every new connection, per DB_PROFILE
+SQLITE_PROFILES = {
+    # SQLite defaults (rollback journal, synchronous=FULL)
+    "default": {},
+    # WAL lets readers proceed during a write; NORMAL only syncs at checkpoints
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,  # negative: size in KiB
+        "temp_store": "MEMORY",
+    },
+    # WAL concurrency without giving up a sync on every commit
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+    },
+}
+
+def sqlite_pragmas(profile: str) -> dict:
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE: {profile}")
+    return SQLITE_PROFILES[profile]
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Pool sizing; in-memory SQLite keeps SQLAlchemy's single-connection pool."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+    if is_async:
+        # aiosqlite otherwise defaults to NullPool: a new connection (and
+        # its worker thread) for every session
+        options["poolclass"] = AsyncAdaptedQueuePool
+    return options
+
+def apply_sqlite_profile(engine, profile: str):
+    """Run the profile's PRAGMA statements on each new pooled connection."""
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas(profile)
+    if not pragmas:
+        return
+    
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+# Create SQLAlchemy engine (schema creation, seeding and scripts)
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
+    connect_args={"check_same_thread": False},  # Needed for SQLite
+    **engine_options(settings.DATABASE_URL)
 )
+apply_sqlite_profile(engine, settings.DB_PROFILE)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API; queries no longer block the event loop
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    **engine_options(settings.DATABASE_URL, is_async=True)
+)
+apply_sqlite_profile(async_engine.sync_engine, settings.DB_PROFILE)
+
+# Objects stay readable after commit without a lazy reload (not possible in async code)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class for models
 Base = declarative_base()
 
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+# Alembic migrations (backend/migrations); alembic.ini is only read by the CLI
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "migrations")
+
+# Revision matching the schema create_all built before migrations existed
+BASELINE_REVISION = "0001"
+
+class SchemaOutOfDate(RuntimeError):
+    """Raised at startup when the database is not at the latest migration."""
+
+def alembic_config():
+    from alembic.config import Config
+    
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    return config
+
+def schema_head() -> str:
+    """Latest migration revision shipped with the code."""
+    from alembic.script import ScriptDirectory
+    
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+def current_schema_version() -> Optional[str]:
+    """Revision recorded in alembic_version; None for an empty or pre-migration database."""
+    with engine.connect() as conn:
+        try:
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        except DBAPIError:
+            return None
+
+def check_schema_version():
+    """Compare the stored revision with the code's, without reflecting any table."""
+    current, head = current_schema_version(), schema_head()
+    if current != head:
+        raise SchemaOutOfDate(
+            f"Database schema is at {current or 'no revision'}, expected {head}: "
+            "run `python init_db.py` (or `alembic upgrade head`)"
+        )
+
+def upgrade_schema():
+    """Apply pending migrations; a no-op (one query) when already up to date."""
+    current, head = current_schema_version(), schema_head()
+    if current == head:
+        return
+    
+    from alembic import command
+    
+    config = alembic_config()
+    if current is None and inspect(engine).has_table("users"):
+        # Created by create_all or the old create_db scripts: the later
+        # revisions detect what already exists
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
 
 # Initialize database
 def init_db():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    upgrade_schema()
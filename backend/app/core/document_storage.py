@@ -0,0 +1,213 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .config import settings
+from .mock_database import ReturnDocument, close_mongo_connection, connect_to_mongo, db as mongo
+from .storage import MISSION_CORE_FIELDS, MISSION_PRIVATE_FIELDS, StorageBackend, check_field_names, new_id
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _public(document: Dict[str, Any]) -> Dict[str, Any]:
+    document["created_at"] = _iso(document.get("created_at"))
+    document["updated_at"] = _iso(document.get("updated_at"))
+    return document
+
+def _public_mission(mission: Dict[str, Any], include_private: bool = False) -> Dict[str, Any]:
+    if not include_private:
+        for field in MISSION_PRIVATE_FIELDS:
+            mission.pop(field, None)
+    return _public(mission)
+
+def bucket_id(conversation_id: str, seq: int) -> str:
+    return f"{conversation_id}:{seq}"
+
+class DocumentStorage(StorageBackend):
+    """Missions and conversations in MongoDB, or in the in-memory mock (USE_MOCK_DB).
+
+    Collections:
+      missions       one document per mission, deliverables as top-level fields
+      conversations  {_id, user_id, mission_id, name, message_count, ...}
+      message_buckets
+                     {_id: "<conversation_id>:<seq>", conversation_id, seq, messages}
+                     holding messages seq * CONVERSATION_BUCKET_SIZE onwards
+
+    Appending messages increments the conversation's message_count (which
+    gives them their indexes) and pushes them into their bucket, created on
+    first use: two small writes, however long the conversation. Buckets
+    have predictable ids, so reading a page of messages is a primary key
+    lookup of the buckets that cover it.
+    """
+
+    name = "document"
+
+    def __init__(self):
+        self.bucket_size = settings.CONVERSATION_BUCKET_SIZE
+
+    @property
+    def _db(self):
+        if mongo.db is None:
+            raise RuntimeError("Document storage is not open")
+        return mongo.db
+
+    async def open(self):
+        await connect_to_mongo()
+        await self._db.missions.create_index([("user_id", 1)])
+        await self._db.conversations.create_index([("user_id", 1)])
+        await self._db.conversations.create_index([("mission_id", 1)])
+        await self._db.message_buckets.create_index([("conversation_id", 1)])
+
+    async def close(self):
+        await close_mongo_connection()
+
+    # Missions
+
+    async def create_mission(self, user_id: int, title: str, description: str) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        mission = {
+            "_id": new_id(),
+            "user_id": user_id,
+            "title": title,
+            "description": description,
+            "status": "initial",
+            "conversation_id": new_id(),
+            "evidence": [],
+            "constats": [],
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self._db.conversations.insert_one({
+            "_id": mission["conversation_id"],
+            "user_id": user_id,
+            "mission_id": mission["_id"],
+            "name": None,
+            "message_count": 0,
+            "created_at": now,
+            "updated_at": now,
+        })
+        await self._db.missions.insert_one(mission)
+        return _public_mission(dict(mission))
+
+    async def get_mission(self, mission_id: str, include_private: bool = False) -> Optional[Dict[str, Any]]:
+        mission = await self._db.missions.find_one({"_id": mission_id})
+        return _public_mission(mission, include_private) if mission is not None else None
+
+    async def list_missions(self, user_id: int) -> List[Dict[str, Any]]:
+        missions = await self._db.missions.find({"user_id": user_id}).sort("created_at", 1).to_list(None)
+        return [_public_mission(mission) for mission in missions]
+
+    async def update_mission(self, mission_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        check_field_names(key for key in fields if key not in MISSION_CORE_FIELDS)
+        changes = {key: value for key, value in fields.items() if key not in ("_id", "user_id", "created_at")}
+        changes["updated_at"] = datetime.utcnow()
+        mission = await self._db.missions.find_one_and_update(
+            {"_id": mission_id}, {"$set": changes}, return_document=ReturnDocument.AFTER
+        )
+        return _public_mission(mission) if mission is not None else None
+
+    async def append_to_mission(self, mission_id: str, field: str, item: Any) -> bool:
+        check_field_names([field])
+        result = await self._db.missions.update_one(
+            {"_id": mission_id}, {"$push": {field: item}, "$set": {"updated_at": datetime.utcnow()}}
+        )
+        return result.matched_count > 0
+
+    # Conversations
+
+    async def create_conversation(
+        self, user_id: int, name: Optional[str] = None, mission_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        conversation = {
+            "_id": new_id(),
+            "user_id": user_id,
+            "mission_id": mission_id,
+            "name": name,
+            "message_count": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self._db.conversations.insert_one(conversation)
+        return _public(dict(conversation))
+
+    async def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        conversation = await self._db.conversations.find_one({"_id": conversation_id})
+        return _public(conversation) if conversation is not None else None
+
+    async def list_conversations(self, user_id: int) -> List[Dict[str, Any]]:
+        conversations = await self._db.conversations.find(
+            {"user_id": user_id, "mission_id": None}
+        ).sort("created_at", 1).to_list(None)
+        return [_public(conversation) for conversation in conversations]
+
+    async def delete_conversation(self, conversation_id: str) -> bool:
+        result = await self._db.conversations.delete_one({"_id": conversation_id})
+        await self._db.message_buckets.delete_many({"conversation_id": conversation_id})
+        return result.deleted_count > 0
+
+    async def append_messages(
+        self, conversation_id: str, messages: List[Dict[str, Any]]
+    ) -> Optional[List[Dict[str, Any]]]:
+        now = datetime.utcnow()
+        # The incremented counter reserves consecutive positions for the
+        # messages, even with concurrent appends
+        conversation = await self._db.conversations.find_one_and_update(
+            {"_id": conversation_id},
+            {"$inc": {"message_count": len(messages)}, "$set": {"updated_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if conversation is None:
+            return None
+        first = conversation["message_count"] - len(messages)
+        stored = []
+        by_bucket: Dict[int, List[Dict[str, Any]]] = {}
+        for index, item in enumerate(messages, start=first):
+            message = {
+                "index": index,
+                "role": item["role"],
+                "content": item["content"],
+                "created_at": item.get("created_at") or now,
+            }
+            if item.get("files"):
+                message["files"] = item["files"]
+            stored.append(message)
+            by_bucket.setdefault(index // self.bucket_size, []).append(message)
+        for seq, bucket_messages in by_bucket.items():
+            await self._db.message_buckets.update_one(
+                {"_id": bucket_id(conversation_id, seq)},
+                {
+                    "$push": {"messages": {"$each": bucket_messages}},
+                    "$set": {"conversation_id": conversation_id, "seq": seq}
+                },
+                upsert=True
+            )
+        for message in stored:
+            message["created_at"] = _iso(message["created_at"])
+        return stored
+
+    async def list_messages(
+        self, conversation_id: str, offset: int = 0, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        offset = max(0, offset)
+        if limit is None:
+            conversation = await self.get_conversation(conversation_id)
+            if conversation is None:
+                return []
+            end = conversation["message_count"]
+        else:
+            end = offset + limit
+        if end <= offset:
+            return []
+        first, last = offset // self.bucket_size, (end - 1) // self.bucket_size
+        buckets = await self._db.message_buckets.find(
+            {"_id": {"$in": [bucket_id(conversation_id, seq) for seq in range(first, last + 1)]}}
+        ).to_list(None)
+        messages = [
+            message for bucket in buckets for message in bucket["messages"]
+            if offset <= message["index"] < end
+        ]
+        # Concurrent appends can reach a bucket out of order
+        messages.sort(key=lambda message: message["index"])
+        for message in messages:
+            message["created_at"] = _iso(message["created_at"])
+        return messages
@@ -0,0 +1,254 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from .config import settings
+
+class ExecutorBusy(Exception):
+    """Raised when a bounded executor already has its maximum number of queued tasks."""
+
+class ExecutorTimeout(Exception):
+    """Raised when a task exceeds the executor's per-task timeout."""
+
+class WorkerCrashed(Exception):
+    """Raised when a worker process died while running a task."""
+
+def _timed_call(func: Callable, *args) -> tuple:
+    """Run func in the worker and report its own execution time."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def _noop() -> None:
+    return None
+
+def _init_process_worker(pid_queue, initializer: Optional[Callable]) -> None:
+    """Process worker start: report the worker's pid, then run the pool initializer."""
+    pid_queue.put(os.getpid())
+    if initializer is not None:
+        initializer()
+
+class _Pool:
+    """One underlying pool, with its tasks in flight and (processes) its worker pids."""
+
+    __slots__ = ("executor", "pid_queue", "pids", "active", "retired")
+
+    def __init__(self, executor: Executor, pid_queue=None):
+        self.executor = executor
+        self.pid_queue = pid_queue
+        self.pids = set()
+        self.active = 0
+        self.retired = False
+
+    def terminate(self):
+        """Kill the pool's worker processes (hung ones included) and shut it down."""
+        if self.pid_queue is not None:
+            while not self.pid_queue.empty():
+                self.pids.add(self.pid_queue.get())
+            for pid in self.pids:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except (ProcessLookupError, PermissionError):
+                    pass
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class BoundedExecutor:
+    """Thread or process pool with a bounded queue and per-task timing.
+
+    At most ``workers + queue_depth`` tasks may be in flight; further
+    submissions fail fast with ExecutorBusy instead of piling up. Only
+    ``workers`` tasks are handed to the pool at a time, the others wait
+    their turn here, so the per-task timeout counts execution time only.
+    The underlying pool is only created on first use.
+
+    Process pools are started with the "spawn" method and an optional
+    initializer to preload heavy state in each worker. When a task times
+    out, its pool is retired: new tasks go to a fresh pool, the other
+    tasks of the retired pool run to completion, then its workers (the
+    stuck one included) are killed. A worker that dies on its own breaks
+    its whole pool (a ProcessPoolExecutor limitation): the tasks running
+    in it fail with WorkerCrashed and the next task starts a new pool.
+    Thread pools cannot interrupt a task: on timeout the caller is
+    released but the thread runs to completion.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        workers: int,
+        queue_depth: int,
+        initializer: Optional[Callable] = None,
+        timeout: Optional[float] = None
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.initializer = initializer
+        self.timeout = timeout
+        self._pool: Optional[_Pool] = None
+        self._retired = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._crashes = 0
+        self._run_seconds = 0.0
+        self._wait_seconds = 0.0
+        self._max_run_seconds = 0.0
+
+    def _get_pool(self) -> _Pool:
+        if self._pool is None:
+            if self.kind == "process":
+                context = multiprocessing.get_context("spawn")
+                pid_queue = context.SimpleQueue()
+                self._pool = _Pool(ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_process_worker,
+                    initargs=(pid_queue, self.initializer)
+                ), pid_queue)
+            else:
+                self._pool = _Pool(ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix=self.name,
+                    initializer=self.initializer
+                ))
+        return self._pool
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # One semaphore per event loop (scripts and tests may run several)
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.workers)
+            self._slots_loop = loop
+        return self._slots
+
+    def _retire(self, pool: _Pool):
+        """Send new tasks to a fresh pool; this one is killed once its other tasks are done."""
+        if self._pool is pool:
+            self._pool = None
+        if not pool.retired:
+            pool.retired = True
+            self._retired.add(pool)
+
+    def _release(self, pool: _Pool):
+        pool.active -= 1
+        if pool.retired and pool.active == 0:
+            self._retired.discard(pool)
+            pool.terminate()
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    async def run(self, func: Callable, *args) -> Any:
+        """Run func(*args) on the pool without blocking the event loop."""
+        if self._in_flight >= self.capacity:
+            self._rejected += 1
+            raise ExecutorBusy(f"{self.name} executor is at capacity ({self.capacity} tasks)")
+
+        self._in_flight += 1
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            async with self._get_slots():
+                pool = self._get_pool()
+                pool.active += 1
+                try:
+                    result, run_seconds = await asyncio.wait_for(
+                        loop.run_in_executor(pool.executor, _timed_call, func, *args),
+                        timeout=self.timeout
+                    )
+                except asyncio.TimeoutError:
+                    self._failed += 1
+                    self._timeouts += 1
+                    if self.kind == "process":
+                        self._retire(pool)
+                    raise ExecutorTimeout(f"{self.name} task exceeded {self.timeout}s")
+                except BrokenProcessPool:
+                    self._failed += 1
+                    self._crashes += 1
+                    self._retire(pool)
+                    raise WorkerCrashed(f"{self.name} worker process died")
+                except Exception:
+                    self._failed += 1
+                    raise
+                finally:
+                    self._release(pool)
+        finally:
+            self._in_flight -= 1
+
+        total_seconds = time.perf_counter() - start
+        self._completed += 1
+        self._run_seconds += run_seconds
+        self._wait_seconds += max(total_seconds - run_seconds, 0.0)
+        self._max_run_seconds = max(self._max_run_seconds, run_seconds)
+        return result
+
+    async def warm_up(self):
+        """Start every worker now (running the initializer) instead of on first task."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_pool().executor
+        await asyncio.gather(*(loop.run_in_executor(executor, _noop) for _ in range(self.workers)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "timeouts": self._timeouts,
+            "crashes": self._crashes,
+            "run_seconds_total": self._run_seconds,
+            "wait_seconds_total": self._wait_seconds,
+            "run_seconds_max": self._max_run_seconds,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.executor.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        for pool in self._retired:
+            pool.terminate()
+        self._retired.clear()
+
+# Excel and PDF rendering
+render_executor = BoundedExecutor(
+    "render",
+    settings.RENDER_POOL_KIND,
+    settings.RENDER_POOL_WORKERS,
+    settings.RENDER_QUEUE_DEPTH
+)
+
+# bcrypt hashing and verification; bcrypt releases the GIL, so threads
+# run hashes in parallel without the cost of worker processes
+password_executor = BoundedExecutor(
+    "password",
+    "thread",
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_QUEUE_DEPTH
+)
+
+# Password hashing for bulk user imports, one process per core
+bulk_hash_executor = BoundedExecutor(
+    "bulk-hash",
+    "process",
+    settings.BULK_IMPORT_WORKERS or os.cpu_count() or 1,
+    settings.BULK_IMPORT_QUEUE_DEPTH
+)
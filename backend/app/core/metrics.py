@@ -0,0 +1,259 @@
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from starlette.routing import BaseRoute
+
+# Request latency buckets in seconds; the upper ones cover LLM calls and
+# large report exports
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Scope key under which an instrumented route records its path template
+ROUTE_TEMPLATE_KEY = "metrics.route"
+
+# Requests that matched no route share one label, so unknown paths cannot
+# create new series
+UNMATCHED_ROUTE = "unmatched"
+
+KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class Metric:
+    """Base for a metric family; series are keyed by a tuple of label values.
+
+    Updates come from the event loop thread only and take no lock.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, labels: Tuple[str, ...], value: float):
+        self._values[labels] = value
+
+class Histogram(Metric):
+    """Fixed-bucket histogram; observe() is one bisect and three additions."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        bounds = list(self.buckets) + [float("inf")]
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Metric families plus collectors that compute values at scrape time."""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Metric]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for metric in collector():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by method, route template and status code.",
+    ("method", "route", "status")
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route template, in seconds.",
+    ("method", "route")
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled by method and route template.",
+    ("method", "route")
+))
+
+_START_TIME = time.time()
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def _resident_memory_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+def process_metrics() -> List[Metric]:
+    """CPU time, RSS and start time of this worker process (not its pools' processes)."""
+    cpu = Counter("process_cpu_seconds_total", "Total user and system CPU time spent in seconds.")
+    cpu.inc(amount=time.process_time())
+    start = Gauge("process_start_time_seconds", "Start time of the process since unix epoch in seconds.")
+    start.set((), _START_TIME)
+    metrics = [cpu, start]
+    rss = _resident_memory_bytes()
+    if rss is not None:
+        resident = Gauge("process_resident_memory_bytes", "Resident memory size in bytes.")
+        resident.set((), rss)
+        metrics.append(resident)
+    return metrics
+
+def executor_metrics(executors: Sequence) -> Callable[[], List[Metric]]:
+    """Collector reporting the stats() of BoundedExecutor instances."""
+    def collect() -> List[Metric]:
+        in_flight = Gauge("executor_tasks_in_flight", "Tasks running or queued on the executor.", ("executor",))
+        capacity = Gauge("executor_capacity", "Maximum tasks in flight before submissions are rejected.", ("executor",))
+        completed = Counter("executor_tasks_completed_total", "Tasks completed by the executor.", ("executor",))
+        failed = Counter("executor_tasks_failed_total", "Tasks that raised, timed out or lost their worker.", ("executor",))
+        rejected = Counter("executor_tasks_rejected_total", "Submissions rejected because the executor was full.", ("executor",))
+        run_seconds = Counter("executor_task_run_seconds_total", "Time spent running tasks, in seconds.", ("executor",))
+        wait_seconds = Counter("executor_task_wait_seconds_total", "Time tasks spent queued, in seconds.", ("executor",))
+        for executor in executors:
+            stats = executor.stats()
+            labels = (stats["name"],)
+            in_flight.set(labels, stats["in_flight"])
+            capacity.set(labels, executor.capacity)
+            completed.inc(labels, stats["completed"])
+            failed.inc(labels, stats["failed"])
+            rejected.inc(labels, stats["rejected"])
+            run_seconds.inc(labels, stats["run_seconds_total"])
+            wait_seconds.inc(labels, stats["wait_seconds_total"])
+        return [in_flight, capacity, completed, failed, rejected, run_seconds, wait_seconds]
+    return collect
+
+registry.add_collector(process_metrics)
+
+def _method_label(method: str) -> str:
+    return method if method in KNOWN_METHODS else "OTHER"
+
+class MetricsMiddleware:
+    """Pure ASGI middleware counting requests and timing them by route template.
+
+    The route label comes from the scope key set by instrument_routes, so
+    no path matching happens here and the labels stay bounded by the
+    number of routes. Streaming responses are timed until their last chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500  # reported if the app raises before starting a response
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            labels = (_method_label(scope["method"]), scope.get(ROUTE_TEMPLATE_KEY, UNMATCHED_ROUTE))
+            http_request_duration.observe(labels, time.perf_counter() - start)
+            http_requests.inc(labels + (str(status),))
+
+def instrument_routes(routes: Iterable[BaseRoute]):
+    """Wrap each route's ASGI app to label the request and track it in flight.
+
+    Call once all routes are registered; routes added later are reported
+    as unmatched.
+    """
+    for route in routes:
+        path = getattr(route, "path", None)
+        inner = getattr(route, "app", None)
+        if path is None or inner is None or getattr(inner, "_metrics_route", None):
+            continue
+
+        def make_app(inner, template):
+            async def instrumented(scope, receive, send):
+                scope[ROUTE_TEMPLATE_KEY] = template
+                if scope["type"] != "http":
+                    await inner(scope, receive, send)
+                    return
+                labels = (_method_label(scope["method"]), template)
+                http_requests_in_flight.inc(labels)
+                try:
+                    await inner(scope, receive, send)
+                finally:
+                    http_requests_in_flight.dec(labels)
+            instrumented._metrics_route = template
+            return instrumented
+
+        route.app = make_app(inner, path)
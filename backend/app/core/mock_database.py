@@ -1,11 +1,17 @@
-import os
-from motor.motor_asyncio import AsyncIOMotorClient
+import copy
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from .config import settings
 
+try:
+    from bson import ObjectId
+except ImportError:  # bson (pymongo) n'est requis qu'avec MongoDB
+    ObjectId = None
+
 USE_MOCK = settings.USE_MOCK_DB
 
 class Database:
-    client: AsyncIOMotorClient = None
+    client = None  # AsyncIOMotorClient, None avec la base en mémoire
     db = None
 
 db = Database()
@@ -18,6 +24,8 @@ async def connect_to_mongo():
         db.client = None  # Mock client
         db.db = MockDatabase()
     else:
+        # Motor n'est requis que pour une vraie base MongoDB
+        from motor.motor_asyncio import AsyncIOMotorClient
         db.client = AsyncIOMotorClient(settings.MONGODB_URL)
         db.db = db.client[settings.DATABASE_NAME]
         print("Connected to MongoDB")
@@ -27,78 +35,584 @@ async def close_mongo_connection():
         db.client.close()
         print("Disconnected from MongoDB")
 
-# Mock Database simple pour les tests
-class MockDatabase:
-    def __init__(self):
-        self.collections = {}
-    
-    def __getitem__(self, name):
-        if name not in self.collections:
-            self.collections[name] = MockCollection()
-        return self.collections[name]
-    
-    def __getattr__(self, name):
-        return self[name]
 
-class MockCollection:
-    def __init__(self):
-        self.documents = []
-        self._id_counter = 0
-    
-    async def insert_one(self, document):
-        from bson import ObjectId
-        doc = document.copy()
-        doc["_id"] = ObjectId()
-        self.documents.append(doc)
-        return type('obj', (object,), {'inserted_id': doc["_id"]})
-    
-    async def find_one(self, filter_dict):
-        for doc in self.documents:
-            if "_id" in filter_dict and doc.get("_id") == filter_dict["_id"]:
-                return doc
-        return None
-    
-    def find(self, filter_dict=None):
-        """Return a mock cursor"""
-        if filter_dict is None:
-            filter_dict = {}
-        
-        # Filter documents based on filter_dict
-        results = []
-        for doc in self.documents:
-            if not filter_dict:
-                results.append(doc)
+# ---------------------------------------------------------------------------
+# Moteur de documents en mémoire (API asynchrone compatible Motor)
+# ---------------------------------------------------------------------------
+
+class OperationFailure(Exception):
+    """Requête non prise en charge par la base en mémoire."""
+
+class MockWriteError(Exception):
+    """Écriture refusée (équivalent de pymongo.errors.WriteError)."""
+
+class DuplicateKeyError(MockWriteError):
+    """Valeur déjà présente dans un index unique (ou _id déjà utilisé)."""
+
+class ReturnDocument:
+    """Valeurs de return_document pour find_one_and_update (comme pymongo)."""
+    BEFORE = False
+    AFTER = True
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+class InsertManyResult:
+    def __init__(self, inserted_ids: list):
+        self.inserted_ids = inserted_ids
+
+class UpdateResult:
+    def __init__(self, matched_count: int, modified_count: int, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+
+class DeleteResult:
+    def __init__(self, deleted_count: int):
+        self.deleted_count = deleted_count
+
+def new_object_id():
+    """ObjectId si bson est installé, sinon un identifiant hexadécimal unique."""
+    return ObjectId() if ObjectId is not None else uuid.uuid4().hex
+
+_MISSING = object()
+
+def _get_path(doc: dict, path: str):
+    """Valeur d'un champ ("a.b" pour un sous-document), _MISSING si absent."""
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+def _parent_for_write(doc: dict, path: str) -> Tuple[dict, str]:
+    """Sous-document contenant le dernier segment de path, créé au besoin."""
+    parts = path.split(".")
+    target = doc
+    for part in parts[:-1]:
+        child = target.get(part)
+        if child is None:
+            child = target[part] = {}
+        elif not isinstance(child, dict):
+            raise MockWriteError(f"Cannot create field '{parts[-1]}' in non-document '{part}'")
+        target = child
+    return target, parts[-1]
+
+def _copy_for_write(doc: dict, paths: Iterable[str]) -> dict:
+    """Copie de doc où seuls les conteneurs le long de paths sont copiés.
+
+    Les écritures ne modifient que ces conteneurs : la copie peut recevoir
+    la mise à jour sans toucher doc, le reste du document étant partagé.
+    """
+    new = dict(doc)
+    fresh = {id(new)}
+    for path in paths:
+        parent = new
+        for part in path.split("."):
+            value = parent.get(part)
+            if id(value) not in fresh:
+                if isinstance(value, dict):
+                    value = dict(value)
+                elif isinstance(value, list):
+                    value = list(value)
+                else:
+                    break
+                fresh.add(id(value))
+                parent[part] = value
+            if not isinstance(value, dict):
+                break
+            parent = value
+    return new
+
+def _index_keys(value) -> List[Any]:
+    """Clés d'index d'une valeur : chaque élément d'une liste (multikey), comme MongoDB."""
+    if value is _MISSING:
+        return [None]  # Les documents sans le champ sont indexés sous None
+    values = value if isinstance(value, list) else [value]
+    keys = []
+    for item in values:
+        try:
+            hash(item)
+        except TypeError:
+            continue  # Sous-documents : seulement trouvés par parcours
+        keys.append(item)
+    return keys
+
+def _is_hashable(value) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+def _compare(value, op: str, operand) -> bool:
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        return value <= operand
+    except TypeError:
+        return False  # Types non comparables : pas de correspondance, comme MongoDB
+
+def _equals(value, expected) -> bool:
+    if value is _MISSING:
+        return expected is None
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    return value == expected
+
+def _match_condition(value, condition) -> bool:
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for op, operand in condition.items():
+            if op == "$eq":
+                matched = _equals(value, operand)
+            elif op == "$ne":
+                matched = not _equals(value, operand)
+            elif op == "$in":
+                matched = any(_equals(value, item) for item in operand)
+            elif op == "$nin":
+                matched = not any(_equals(value, item) for item in operand)
+            elif op == "$exists":
+                matched = (value is not _MISSING) == bool(operand)
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                matched = _compare(value, op, operand)
             else:
-                match = True
-                for key, value in filter_dict.items():
-                    if doc.get(key) != value:
-                        match = False
-                        break
-                if match:
-                    results.append(doc)
-        
-        return MockCursor(results)
-    
-    async def update_one(self, filter_dict, update_dict):
-        for doc in self.documents:
-            if "_id" in filter_dict and doc.get("_id") == filter_dict["_id"]:
-                if "$set" in update_dict:
-                    doc.update(update_dict["$set"])
-                if "$push" in update_dict:
-                    for key, value in update_dict["$push"].items():
-                        if key not in doc:
-                            doc[key] = []
-                        doc[key].append(value)
-                return type('obj', (object,), {'modified_count': 1})
-        return type('obj', (object,), {'modified_count': 0})
+                raise OperationFailure(f"Unsupported query operator {op}")
+            if not matched:
+                return False
+        return True
+    return _equals(value, condition)
+
+def matches(doc: dict, filter_dict: Optional[dict]) -> bool:
+    """Le document satisfait-il le filtre (égalités et opérateurs de comparaison) ?"""
+    if not filter_dict:
+        return True
+    return all(_match_condition(_get_path(doc, path), condition) for path, condition in filter_dict.items())
+
+def _lookup_values(condition) -> Optional[list]:
+    """Valeurs à chercher dans un index pour une condition, None si non indexable."""
+    if isinstance(condition, dict):
+        if len(condition) != 1:
+            return None
+        (op, operand), = condition.items()
+        if op == "$eq":
+            values = [operand]
+        elif op == "$in":
+            values = list(operand)
+        else:
+            return None
+    else:
+        values = [condition]
+    if not all(_is_hashable(value) and not isinstance(value, list) for value in values):
+        return None
+    return values
+
+def _iter_keys(mapping: dict) -> Iterator[Any]:
+    """Clés de mapping à la demande ; si mapping change de taille pendant le
+    parcours (écriture entre deux lectures du curseur), reprend sur un
+    instantané en sautant les clés déjà rendues."""
+    seen = set()
+    try:
+        for key in mapping:
+            seen.add(key)
+            yield key
+    except RuntimeError:
+        for key in list(mapping):
+            if key not in seen:
+                seen.add(key)
+                yield key
+
+def _iter_keys_union(mappings: List[dict]) -> Iterator[Any]:
+    # $in : un document peut figurer sous plusieurs valeurs (champ multikey)
+    seen = set()
+    for mapping in mappings:
+        for key in _iter_keys(mapping):
+            if key not in seen:
+                seen.add(key)
+                yield key
+
+def _sort_key(value):
+    # Absent ou None d'abord, comme MongoDB ; les tuples évitent de comparer None à une valeur
+    return (0, None) if value is _MISSING or value is None else (1, value)
+
 
 class MockCursor:
-    """Mock cursor for find operations"""
-    def __init__(self, documents):
-        self.documents = documents
-    
-    async def to_list(self, length):
-        """Convert cursor to list"""
+    """Curseur paresseux : les documents sont filtrés et copiés à la demande.
+
+    to_list(length) s'arrête après length résultats au lieu de parcourir
+    toute la collection. Seul sort() oblige à lire tous les résultats.
+    """
+
+    def __init__(self, collection: "MockCollection", filter_dict: Optional[dict]):
+        self._collection = collection
+        self._filter = filter_dict or {}
+        self._sort: List[Tuple[str, int]] = []
+        self._skip = 0
+        self._limit = 0
+        self._iterator: Optional[Iterator[dict]] = None
+
+    def sort(self, key_or_list, direction: int = 1) -> "MockCursor":
+        if isinstance(key_or_list, str):
+            self._sort = [(key_or_list, direction)]
+        else:
+            self._sort = list(key_or_list)
+        return self
+
+    def skip(self, count: int) -> "MockCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "MockCursor":
+        self._limit = count
+        return self
+
+    def _documents(self) -> Iterator[dict]:
+        docs = self._collection._matching(self._filter)
+        if self._sort:
+            docs = list(docs)
+            # Tris stables successifs, de la clé secondaire à la clé principale
+            for path, direction in reversed(self._sort):
+                docs.sort(key=lambda doc: _sort_key(_get_path(doc, path)), reverse=direction < 0)
+            docs = iter(docs)
+        skipped = 0
+        returned = 0
+        for doc in docs:
+            if skipped < self._skip:
+                skipped += 1
+                continue
+            if self._limit and returned >= self._limit:
+                return
+            returned += 1
+            # Copie : modifier un résultat ne doit pas contourner les index
+            yield copy.deepcopy(doc)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        if self._iterator is None:
+            self._iterator = self._documents()
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length: Optional[int]) -> List[dict]:
+        """Les length résultats suivants (tous si length vaut None)."""
+        if self._iterator is None:
+            self._iterator = self._documents()
         if length is None:
-            return self.documents
-        return self.documents[:length]
\ No newline at end of file
+            return list(self._iterator)
+        results = []
+        for doc in self._iterator:
+            results.append(doc)
+            if len(results) >= length:
+                break
+        return results
+
+
+class MockCollection:
+    """Collection en mémoire indexée par _id, avec index secondaires optionnels.
+
+    Les documents sont rangés dans un dict par _id, ce qui rend les accès
+    par _id en O(1) quelle que soit la taille de la collection. Un index
+    secondaire associe chaque valeur d'un champ aux _id des documents qui
+    la portent ; les filtres d'égalité ou $in sur un champ indexé ne lisent
+    que ces documents, les autres filtres parcourent la collection. Les
+    mises à jour ne réindexent que les champs modifiés.
+    """
+
+    def __init__(self, name: str = "", indexes: Iterable = ()):
+        self.name = name
+        self._docs: Dict[Any, dict] = {}
+        # champ -> valeur -> _id des documents (dict ordonné utilisé comme ensemble)
+        self._indexes: Dict[str, Dict[Any, Dict[Any, None]]] = {}
+        self._unique: set = set()
+        for index in indexes:
+            field, unique = (index, False) if isinstance(index, str) else index
+            self._build_index(field, unique)
+
+    # -- Index ---------------------------------------------------------------
+
+    def _build_index(self, field: str, unique: bool):
+        index: Dict[Any, Dict[Any, None]] = {}
+        for doc_id, doc in self._docs.items():
+            for key in _index_keys(_get_path(doc, field)):
+                ids = index.setdefault(key, {})
+                if unique and ids and key is not None:
+                    raise DuplicateKeyError(f"Duplicate key {field}: {key!r}")
+                ids[doc_id] = None
+        self._indexes[field] = index
+        if unique:
+            self._unique.add(field)
+
+    async def create_index(self, keys, unique: bool = False) -> str:
+        """Index sur un champ : "user_id" ou [("user_id", 1)] (index simples uniquement)."""
+        if isinstance(keys, str):
+            field = keys
+        elif len(keys) == 1:
+            field = keys[0][0]
+        else:
+            raise MockWriteError("Compound indexes are not supported by the mock database")
+        if field != "_id" and field not in self._indexes:
+            self._build_index(field, unique)
+        return f"{field}_1"
+
+    def index_information(self) -> Dict[str, dict]:
+        info = {"_id_": {"key": [("_id", 1)], "unique": True}}
+        for field in self._indexes:
+            info[f"{field}_1"] = {"key": [(field, 1)], "unique": field in self._unique}
+        return info
+
+    def _indexed_fields(self, paths: Iterable[str]) -> List[str]:
+        """Champs indexés touchés par une écriture sur paths (préfixes compris)."""
+        fields = []
+        for field in self._indexes:
+            for path in paths:
+                if field == path or field.startswith(path + ".") or path.startswith(field + "."):
+                    fields.append(field)
+                    break
+        return fields
+
+    def _check_unique(self, doc_id, doc: dict, fields: Iterable[str]):
+        for field in fields:
+            if field not in self._unique:
+                continue
+            for key in _index_keys(_get_path(doc, field)):
+                if key is None:
+                    continue
+                owners = self._indexes[field].get(key)
+                if owners and any(owner != doc_id for owner in owners):
+                    raise DuplicateKeyError(f"Duplicate key {field}: {key!r}")
+
+    def _index_add(self, doc_id, doc: dict, fields: Iterable[str]):
+        for field in fields:
+            index = self._indexes[field]
+            for key in _index_keys(_get_path(doc, field)):
+                index.setdefault(key, {})[doc_id] = None
+
+    def _index_remove(self, doc_id, keys_by_field: Dict[str, List[Any]]):
+        for field, keys in keys_by_field.items():
+            index = self._indexes[field]
+            for key in keys:
+                ids = index.get(key)
+                if ids is not None:
+                    ids.pop(doc_id, None)
+                    if not ids:
+                        del index[key]
+
+    def _index_keys_of(self, doc: dict, fields: Iterable[str]) -> Dict[str, List[Any]]:
+        return {field: _index_keys(_get_path(doc, field)) for field in fields}
+
+    # -- Lecture -------------------------------------------------------------
+
+    def _candidate_ids(self, filter_dict: dict) -> Optional[Iterator[Any]]:
+        """_id à examiner d'après l'index le plus sélectif du filtre, None = toute la collection."""
+        best = None
+        best_size = 0
+        for path, condition in filter_dict.items():
+            if path != "_id" and path not in self._indexes:
+                continue
+            values = _lookup_values(condition)
+            if values is None:
+                continue
+            if path == "_id":
+                return iter([value for value in values if value in self._docs])
+            index = self._indexes[path]
+            buckets = [index[value] for value in values if value in index]
+            size = sum(len(bucket) for bucket in buckets)
+            if best is None or size < best_size:
+                best, best_size = buckets, size
+        if best is None:
+            return None
+        if len(best) == 1:
+            return _iter_keys(best[0])
+        return _iter_keys_union(best)
+
+    def _matching(self, filter_dict: dict) -> Iterator[dict]:
+        candidates = self._candidate_ids(filter_dict)
+        if candidates is None:
+            candidates = _iter_keys(self._docs)
+        for doc_id in candidates:
+            doc = self._docs.get(doc_id)
+            if doc is not None and matches(doc, filter_dict):
+                yield doc
+
+    def _first(self, filter_dict: Optional[dict]) -> Optional[dict]:
+        return next(self._matching(filter_dict or {}), None)
+
+    async def find_one(self, filter_dict: Optional[dict] = None) -> Optional[dict]:
+        doc = self._first(filter_dict)
+        return copy.deepcopy(doc) if doc is not None else None
+
+    def find(self, filter_dict: Optional[dict] = None) -> MockCursor:
+        """Curseur paresseux sur les documents correspondant au filtre."""
+        return MockCursor(self, filter_dict)
+
+    async def count_documents(self, filter_dict: Optional[dict] = None) -> int:
+        if not filter_dict:
+            return len(self._docs)
+        return sum(1 for _ in self._matching(filter_dict))
+
+    # -- Écriture ------------------------------------------------------------
+
+    def _insert(self, document: dict):
+        # Comme pymongo, l'_id généré est aussi ajouté au document passé
+        if "_id" not in document:
+            document["_id"] = new_object_id()
+        doc = copy.deepcopy(document)
+        doc_id = doc["_id"]
+        if doc_id in self._docs:
+            raise DuplicateKeyError(f"Duplicate key _id: {doc_id!r}")
+        self._check_unique(doc_id, doc, self._indexes)
+        self._docs[doc_id] = doc
+        self._index_add(doc_id, doc, self._indexes)
+        return doc_id
+
+    async def insert_one(self, document: dict) -> InsertOneResult:
+        return InsertOneResult(self._insert(document))
+
+    async def insert_many(self, documents: Iterable[dict]) -> InsertManyResult:
+        return InsertManyResult([self._insert(document) for document in documents])
+
+    def _apply_update(self, doc: dict, update_dict: dict) -> bool:
+        """Applique $set, $unset, $inc et $push en place ; renvoie True si le document a changé."""
+        changed = False
+        for op, fields in update_dict.items():
+            if op not in ("$set", "$unset", "$inc", "$push"):
+                raise MockWriteError(f"Unsupported update operator {op}")
+            for path, value in fields.items():
+                if path == "_id" or path.startswith("_id."):
+                    raise MockWriteError("Performing an update on the path '_id' would modify the immutable field '_id'")
+                if op == "$unset":
+                    parent = doc
+                    parts = path.split(".")
+                    for part in parts[:-1]:
+                        parent = parent.get(part) if isinstance(parent, dict) else None
+                    if isinstance(parent, dict) and parts[-1] in parent:
+                        del parent[parts[-1]]
+                        changed = True
+                    continue
+                parent, key = _parent_for_write(doc, path)
+                if op == "$set":
+                    if parent.get(key, _MISSING) != value:
+                        parent[key] = copy.deepcopy(value)
+                        changed = True
+                elif op == "$inc":
+                    parent[key] = parent.get(key, 0) + value
+                    changed = changed or value != 0
+                else:
+                    target = parent.setdefault(key, [])
+                    if not isinstance(target, list):
+                        raise MockWriteError(f"The field '{path}' must be an array")
+                    if isinstance(value, dict) and "$each" in value:
+                        target.extend(copy.deepcopy(value["$each"]))
+                        changed = changed or bool(value["$each"])
+                    else:
+                        target.append(copy.deepcopy(value))
+                        changed = True
+        return changed
+
+    def _update_doc(self, doc_id, doc: dict, update_dict: dict) -> bool:
+        """Met à jour doc tout ou rien : une erreur ne laisse ni écriture partielle ni index périmé."""
+        paths = [path for fields in update_dict.values() for path in fields]
+        # La mise à jour est appliquée à une copie, substituée au document
+        # seulement une fois tous les opérateurs et les index uniques validés
+        new_doc = _copy_for_write(doc, paths)
+        changed = self._apply_update(new_doc, update_dict)
+        fields = self._indexed_fields(paths) if changed else []
+        if fields:
+            self._check_unique(doc_id, new_doc, fields)
+            self._index_remove(doc_id, self._index_keys_of(doc, fields))
+        self._docs[doc_id] = new_doc
+        self._index_add(doc_id, new_doc, fields)
+        return changed
+
+    def _upsert(self, filter_dict: dict, update_dict: dict):
+        # Le nouveau document reprend les égalités du filtre, comme MongoDB
+        doc = {path: condition for path, condition in filter_dict.items()
+               if "." not in path and not (isinstance(condition, dict) and any(key.startswith("$") for key in condition))}
+        self._apply_update(doc, update_dict)
+        return self._insert(doc)
+
+    async def update_one(self, filter_dict: dict, update_dict: dict, upsert: bool = False) -> UpdateResult:
+        doc = self._first(filter_dict)
+        if doc is None:
+            if upsert:
+                return UpdateResult(0, 0, self._upsert(filter_dict, update_dict))
+            return UpdateResult(0, 0)
+        return UpdateResult(1, int(self._update_doc(doc["_id"], doc, update_dict)))
+
+    async def find_one_and_update(
+        self,
+        filter_dict: dict,
+        update_dict: dict,
+        upsert: bool = False,
+        return_document: bool = ReturnDocument.BEFORE
+    ) -> Optional[dict]:
+        """Met à jour un document et le renvoie (avant ou après), en une seule opération."""
+        doc = self._first(filter_dict)
+        if doc is None:
+            if not upsert:
+                return None
+            doc_id = self._upsert(filter_dict, update_dict)
+            return copy.deepcopy(self._docs[doc_id]) if return_document else None
+        if not return_document:
+            before = copy.deepcopy(doc)
+            self._update_doc(doc["_id"], doc, update_dict)
+            return before
+        self._update_doc(doc["_id"], doc, update_dict)
+        return copy.deepcopy(self._docs[doc["_id"]])
+
+    async def update_many(self, filter_dict: dict, update_dict: dict, upsert: bool = False) -> UpdateResult:
+        docs = list(self._matching(filter_dict))
+        if not docs and upsert:
+            return UpdateResult(0, 0, self._upsert(filter_dict, update_dict))
+        modified = sum(int(self._update_doc(doc["_id"], doc, update_dict)) for doc in docs)
+        return UpdateResult(len(docs), modified)
+
+    def _delete(self, doc: dict):
+        doc_id = doc["_id"]
+        self._index_remove(doc_id, self._index_keys_of(doc, self._indexes))
+        del self._docs[doc_id]
+
+    async def delete_one(self, filter_dict: dict) -> DeleteResult:
+        doc = self._first(filter_dict)
+        if doc is None:
+            return DeleteResult(0)
+        self._delete(doc)
+        return DeleteResult(1)
+
+    async def delete_many(self, filter_dict: dict) -> DeleteResult:
+        docs = list(self._matching(filter_dict))
+        for doc in docs:
+            self._delete(doc)
+        return DeleteResult(len(docs))
+
+
+class MockDatabase:
+    """Base en mémoire ; indexes déclare les index secondaires par collection.
+
+        MockDatabase(indexes={"missions": ["user_id"], "users": [("email", True)]})
+    """
+
+    def __init__(self, indexes: Optional[Dict[str, Iterable]] = None):
+        self.collections: Dict[str, MockCollection] = {}
+        self._declared_indexes = indexes or {}
+
+    def __getitem__(self, name) -> MockCollection:
+        if name not in self.collections:
+            self.collections[name] = MockCollection(name, self._declared_indexes.get(name, ()))
+        return self.collections[name]
+
+    def __getattr__(self, name) -> MockCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
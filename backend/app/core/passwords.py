@@ -0,0 +1,15 @@
+from typing import List
+
+from passlib.hash import bcrypt
+
+# bcrypt cost of every stored password, imported accounts included
+BCRYPT_ROUNDS = 12
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash a batch of passwords with bcrypt, at the normal cost.
+
+    Runs in the bulk-import worker processes; this module stays free of
+    application imports so that spawning a worker is cheap.
+    """
+    hasher = bcrypt.using(rounds=BCRYPT_ROUNDS)
+    return [hasher.hash(password) for password in passwords]
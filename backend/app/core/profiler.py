@@ -0,0 +1,99 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Leaf frames of threads that are waiting rather than running: the event
+# loop polling for I/O, idle pool workers and lock or queue waits
+IDLE_FRAMES = frozenset({
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("connection.py", "wait"),
+    # aiosqlite connection threads blocked on their request queue
+    ("core.py", "_connection_worker_thread"),
+})
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is already being taken in this process."""
+
+class StackSampler:
+    """Statistical profiler sampling every thread's Python stack.
+
+    A sampling thread reads sys._current_frames() at a fixed rate and
+    counts identical stacks. Nothing is installed in the profiled code
+    (no sys.setprofile or tracing), so there is no cost when no profile is
+    being taken and the cost while sampling is one stack walk per thread
+    per sample. Only one profile runs at a time per process, and only the
+    worker process that receives the request is sampled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def _collect(self, seconds: float, interval: float, with_lines: bool, include_idle: bool) -> tuple:
+        stacks: Counter = Counter()
+        # "function (file.py)" per code object, built once per profile
+        code_labels = {}
+        own_ident = threading.get_ident()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        next_sample = time.monotonic()
+        while next_sample < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident == own_ident:
+                    continue
+                leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+                if not include_idle and leaf in IDLE_FRAMES:
+                    continue
+                labels = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = code_labels.get(code)
+                    if label is None:
+                        label = code_labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)})"
+                    labels.append(f"{label[:-1]}:{frame.f_lineno})" if with_lines else label)
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                stacks[";".join(reversed(labels))] += 1
+            # Do not keep the profiled threads' frames alive between samples
+            del frames
+            samples += 1
+            next_sample += interval
+            delay = next_sample - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Sampling fell behind (GIL held by the profiled code): skip ahead
+                next_sample = time.monotonic()
+        return stacks, samples
+
+    def sample(
+        self,
+        seconds: float,
+        rate_hz: float,
+        with_lines: bool = False,
+        include_idle: bool = False
+    ) -> tuple:
+        """Sample for ``seconds`` at ``rate_hz``; returns (stack counts, number of samples).
+
+        Blocks the calling thread: call it from a worker thread, never from
+        the event loop (which would then only ever be seen sampling).
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running in this worker")
+        try:
+            return self._collect(seconds, 1.0 / rate_hz, with_lines, include_idle)
+        finally:
+            self._lock.release()
+
+def collapsed_stacks(stacks: Counter) -> str:
+    """Brendan Gregg's collapsed format ("root;...;leaf count"), read by flamegraph.pl and speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+stack_sampler = StackSampler()
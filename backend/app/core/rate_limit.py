@@ -0,0 +1,255 @@
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from .config import settings
+
+class RateLimitExceeded(Exception):
+    """Raised when a caller is over its limit; retry_after is in seconds."""
+
+    def __init__(self, retry_after: float, scope: str):
+        super().__init__(f"Rate limit exceeded for {scope}, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+        self.scope = scope
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+class MemoryRateLimitStore:
+    """Limiter state for a single process.
+
+    The number of tracked keys is bounded (least recently used keys are
+    dropped first) so a flood of random emails or addresses cannot grow
+    memory without limit.
+    """
+
+    blocking = False
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._windows: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _touch(self, entries: OrderedDict, key: str):
+        entries.move_to_end(key)
+        while len(entries) > self.max_keys:
+            entries.popitem(last=False)
+
+    def take_token(self, key: str, capacity: float, refill_per_second: float, now: float) -> float:
+        """Token bucket: consume one token, or return the wait before one is available."""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                self._touch(self._buckets, key)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            self._touch(self._buckets, key)
+            return (1 - tokens) / refill_per_second
+
+    def hit_window(self, key: str, limit: int, window: float, now: float) -> float:
+        """Sliding window: record one hit, or return the wait before the oldest hit expires."""
+        with self._lock:
+            hits = self._windows.get(key)
+            if hits is None:
+                hits = self._windows[key] = deque()
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            self._touch(self._windows, key)
+            if len(hits) >= limit:
+                return hits[0] + window - now
+            hits.append(now)
+            return 0.0
+
+    def clear_window(self, key: str):
+        with self._lock:
+            self._windows.pop(key, None)
+
+    def prune(self, now: float, window: float, bucket_idle: float):
+        """Drop windows with no hit left and buckets idle long enough to be full again."""
+        with self._lock:
+            for key in [key for key, hits in self._windows.items() if not hits or hits[-1] <= now - window]:
+                del self._windows[key]
+            for key in [key for key, (_, updated) in self._buckets.items() if updated <= now - bucket_idle]:
+                del self._buckets[key]
+
+class SQLiteRateLimitStore:
+    """Limiter state shared by every worker process through a SQLite file.
+
+    Rows of keys that are never seen again are removed by prune, and at
+    most max_keys keys are kept per table (least recently hit dropped
+    first), so a flood of random emails or addresses cannot grow the
+    file without limit.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_keys: int):
+        self.path = path
+        self.max_keys = max_keys
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_limit_hits (key TEXT NOT NULL, ts REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_hits_key_ts ON rate_limit_hits (key, ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_hits_ts ON rate_limit_hits (ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_buckets_updated ON rate_limit_buckets (updated)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self) -> sqlite3.Connection:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def take_token(self, key: str, capacity: float, refill_per_second: float, now: float) -> float:
+        conn = self._transaction()
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / refill_per_second
+            if tokens >= 1:
+                tokens -= 1
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def hit_window(self, key: str, limit: int, window: float, now: float) -> float:
+        conn = self._transaction()
+        try:
+            conn.execute("DELETE FROM rate_limit_hits WHERE key = ? AND ts <= ?", (key, now - window))
+            count, oldest = conn.execute(
+                "SELECT COUNT(*), MIN(ts) FROM rate_limit_hits WHERE key = ?", (key,)
+            ).fetchone()
+            if count >= limit:
+                conn.execute("COMMIT")
+                return oldest + window - now
+            conn.execute("INSERT INTO rate_limit_hits (key, ts) VALUES (?, ?)", (key, now))
+            conn.execute("COMMIT")
+            return 0.0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear_window(self, key: str):
+        self._connect().execute("DELETE FROM rate_limit_hits WHERE key = ?", (key,))
+
+    def prune(self, now: float, window: float, bucket_idle: float):
+        """Delete expired hits and full buckets of every key, then enforce max_keys."""
+        conn = self._transaction()
+        try:
+            conn.execute("DELETE FROM rate_limit_hits WHERE ts <= ?", (now - window,))
+            conn.execute("DELETE FROM rate_limit_buckets WHERE updated <= ?", (now - bucket_idle,))
+            conn.execute(
+                "DELETE FROM rate_limit_buckets WHERE key IN "
+                "(SELECT key FROM rate_limit_buckets ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+                (self.max_keys,)
+            )
+            conn.execute(
+                "DELETE FROM rate_limit_hits WHERE key IN "
+                "(SELECT key FROM rate_limit_hits GROUP BY key ORDER BY MAX(ts) DESC LIMIT -1 OFFSET ?)",
+                (self.max_keys,)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+class LoginRateLimiter:
+    """Limits login attempts per client IP (token bucket) and per email (sliding window).
+
+    Checks run before any password hashing, so rejected attempts cost no
+    bcrypt time. A successful login clears the email window. Every
+    LOGIN_RATE_LIMIT_PRUNE_INTERVAL seconds, a check also prunes the state
+    of keys that are no longer limited.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._last_prune = time.time()
+
+    def _prune_if_due(self, now: float):
+        if now - self._last_prune < settings.LOGIN_RATE_LIMIT_PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        # A bucket idle for this long has refilled: it is the same as no bucket
+        bucket_idle = settings.LOGIN_IP_BURST / (settings.LOGIN_IP_PER_MINUTE / 60)
+        self.store.prune(now, settings.LOGIN_EMAIL_WINDOW_SECONDS, bucket_idle)
+
+    def _check(self, ip: Optional[str], email: Optional[str]):
+        now = time.time()
+        self._prune_if_due(now)
+        if ip:
+            wait = self.store.take_token(
+                f"ip:{ip}",
+                settings.LOGIN_IP_BURST,
+                settings.LOGIN_IP_PER_MINUTE / 60,
+                now
+            )
+            if wait > 0:
+                raise RateLimitExceeded(wait, "client")
+        if email:
+            wait = self.store.hit_window(
+                f"email:{email.lower()}",
+                settings.LOGIN_EMAIL_MAX_ATTEMPTS,
+                settings.LOGIN_EMAIL_WINDOW_SECONDS,
+                now
+            )
+            if wait > 0:
+                raise RateLimitExceeded(wait, "account")
+
+    async def check(self, ip: Optional[str], email: Optional[str] = None):
+        """Raise RateLimitExceeded if the IP or the email is over its limit."""
+        if not settings.LOGIN_RATE_LIMIT_ENABLED:
+            return
+        if self.store.blocking:
+            await asyncio.to_thread(self._check, ip, email)
+        else:
+            self._check(ip, email)
+
+    async def reset(self, email: str):
+        if not settings.LOGIN_RATE_LIMIT_ENABLED:
+            return
+        key = f"email:{email.lower()}"
+        if self.store.blocking:
+            await asyncio.to_thread(self.store.clear_window, key)
+        else:
+            self.store.clear_window(key)
+
+def create_rate_limit_store():
+    if settings.LOGIN_RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteRateLimitStore(settings.LOGIN_RATE_LIMIT_DB, settings.LOGIN_RATE_LIMIT_MAX_KEYS)
+    if settings.LOGIN_RATE_LIMIT_BACKEND != "memory":
+        raise ValueError(f"Unknown rate limit backend: {settings.LOGIN_RATE_LIMIT_BACKEND}")
+    return MemoryRateLimitStore(settings.LOGIN_RATE_LIMIT_MAX_KEYS)
+
+login_rate_limiter = LoginRateLimiter(create_rate_limit_store())
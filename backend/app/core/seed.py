@@ -7,10 +7,10 @@ def create_admin_user():
     """Create a default admin user if it doesn't exist."""
     db = SessionLocal()
     try:
-        # Check if admin user already exists
-        admin_user = db.query(User).filter(User.email == "admin@example.com").first()
+        # Check if admin user already exists (id only; the password is hashed only on creation)
+        admin_exists = db.query(User.id).filter(User.email == "admin@example.com").first() is not None
         
-        if not admin_user:
+        if not admin_exists:
             # Create admin user
             admin_user = User(
                 email="admin@example.com",
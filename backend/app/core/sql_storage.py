@@ -0,0 +1,218 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select, update
+
+from .database import AsyncSessionLocal
+from .storage import MISSION_CORE_FIELDS, MISSION_PRIVATE_FIELDS, StorageBackend, check_field_names, new_id
+from ..models.mission import Conversation, ConversationMessage, Mission
+
+# Core fields a mission update may set; the others go to the data JSON column
+MISSION_COLUMNS = frozenset({"title", "description", "status"})
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+def mission_to_dict(row: Mission, include_private: bool = False) -> Dict[str, Any]:
+    mission = dict(row.data or {})
+    if not include_private:
+        for field in MISSION_PRIVATE_FIELDS:
+            mission.pop(field, None)
+    mission.update({
+        "_id": row.id,
+        "user_id": row.user_id,
+        "title": row.title,
+        "description": row.description,
+        "status": row.status,
+        "conversation_id": row.conversation_id,
+        "created_at": _iso(row.created_at),
+        "updated_at": _iso(row.updated_at),
+    })
+    return mission
+
+def conversation_to_dict(row: Conversation) -> Dict[str, Any]:
+    return {
+        "_id": row.id,
+        "user_id": row.user_id,
+        "mission_id": row.mission_id,
+        "name": row.name,
+        "message_count": row.message_count,
+        "created_at": _iso(row.created_at),
+        "updated_at": _iso(row.updated_at),
+    }
+
+def message_to_dict(row: ConversationMessage) -> Dict[str, Any]:
+    message = {
+        "index": row.position,
+        "role": row.role,
+        "content": row.content,
+        "created_at": _iso(row.created_at),
+    }
+    if row.files:
+        message["files"] = row.files
+    return message
+
+class SQLStorage(StorageBackend):
+    """Missions and conversations in the application database (SQLite).
+
+    Messages are one row each, keyed by (conversation_id, position):
+    appending is an UPDATE of the conversation's counter and one INSERT.
+    Deliverables are edited inside the data column with json_set and
+    json_insert, so adding a constat does not read the mission back and
+    concurrent writers (other workers included) cannot overwrite each
+    other's changes.
+    """
+
+    name = "sqlite"
+
+    # Missions
+
+    async def create_mission(self, user_id: int, title: str, description: str) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        mission = Mission(
+            id=new_id(),
+            user_id=user_id,
+            title=title,
+            description=description,
+            status="initial",
+            conversation_id=new_id(),
+            data={"evidence": [], "constats": []},
+            created_at=now,
+            updated_at=now
+        )
+        async with AsyncSessionLocal() as db:
+            db.add(Conversation(
+                id=mission.conversation_id, user_id=user_id, mission_id=mission.id,
+                message_count=0, created_at=now, updated_at=now
+            ))
+            db.add(mission)
+            await db.commit()
+        return mission_to_dict(mission)
+
+    async def get_mission(self, mission_id: str, include_private: bool = False) -> Optional[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            row = await db.get(Mission, mission_id)
+        return mission_to_dict(row, include_private) if row is not None else None
+
+    async def list_missions(self, user_id: int) -> List[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Mission).where(Mission.user_id == user_id).order_by(Mission.created_at, Mission.id)
+            )
+            return [mission_to_dict(row) for row in result.scalars()]
+
+    async def update_mission(self, mission_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        deliverables = {key: value for key, value in fields.items() if key not in MISSION_CORE_FIELDS}
+        check_field_names(deliverables)
+        values = {key: value for key, value in fields.items() if key in MISSION_COLUMNS}
+        values["updated_at"] = datetime.utcnow()
+        if deliverables:
+            arguments = []
+            for key, value in deliverables.items():
+                arguments.extend([f'$."{key}"', func.json(json.dumps(value, default=str))])
+            values["data"] = func.json_set(Mission.data, *arguments)
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(Mission).where(Mission.id == mission_id).values(**values).returning(Mission)
+            )
+            row = result.scalar()
+            await db.commit()
+        return mission_to_dict(row) if row is not None else None
+
+    async def append_to_mission(self, mission_id: str, field: str, item: Any) -> bool:
+        check_field_names([field])
+        path = f'$."{field}"'
+        # Appends to the list, creating it when the mission has none yet
+        data = func.json_insert(
+            func.json_set(Mission.data, path, func.json(func.coalesce(func.json_extract(Mission.data, path), "[]"))),
+            f"{path}[#]",
+            func.json(json.dumps(item, default=str))
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(Mission).where(Mission.id == mission_id).values(data=data, updated_at=datetime.utcnow())
+            )
+            await db.commit()
+        return result.rowcount > 0
+
+    # Conversations
+
+    async def create_conversation(
+        self, user_id: int, name: Optional[str] = None, mission_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        conversation = Conversation(
+            id=new_id(), user_id=user_id, mission_id=mission_id, name=name,
+            message_count=0, created_at=now, updated_at=now
+        )
+        async with AsyncSessionLocal() as db:
+            db.add(conversation)
+            await db.commit()
+        return conversation_to_dict(conversation)
+
+    async def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            row = await db.get(Conversation, conversation_id)
+        return conversation_to_dict(row) if row is not None else None
+
+    async def list_conversations(self, user_id: int) -> List[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Conversation)
+                .where(Conversation.user_id == user_id, Conversation.mission_id.is_(None))
+                .order_by(Conversation.created_at, Conversation.id)
+            )
+            return [conversation_to_dict(row) for row in result.scalars()]
+
+    async def delete_conversation(self, conversation_id: str) -> bool:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(ConversationMessage).where(ConversationMessage.conversation_id == conversation_id))
+            result = await db.execute(delete(Conversation).where(Conversation.id == conversation_id))
+            await db.commit()
+        return result.rowcount > 0
+
+    async def append_messages(
+        self, conversation_id: str, messages: List[Dict[str, Any]]
+    ) -> Optional[List[Dict[str, Any]]]:
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            # Taking the next positions also takes SQLite's write lock, so
+            # concurrent appends get distinct, consecutive positions
+            count = await db.scalar(
+                update(Conversation)
+                .where(Conversation.id == conversation_id)
+                .values(message_count=Conversation.message_count + len(messages), updated_at=now)
+                .returning(Conversation.message_count)
+            )
+            if count is None:
+                return None
+            rows = [
+                ConversationMessage(
+                    conversation_id=conversation_id,
+                    position=count - len(messages) + i,
+                    role=message["role"],
+                    content=message["content"],
+                    files=message.get("files") or None,
+                    created_at=message.get("created_at") or now
+                )
+                for i, message in enumerate(messages)
+            ]
+            db.add_all(rows)
+            await db.commit()
+        return [message_to_dict(row) for row in rows]
+
+    async def list_messages(
+        self, conversation_id: str, offset: int = 0, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        query = (
+            select(ConversationMessage)
+            .where(ConversationMessage.conversation_id == conversation_id, ConversationMessage.position >= offset)
+            .order_by(ConversationMessage.position)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(query)
+            return [message_to_dict(row) for row in result.scalars()]
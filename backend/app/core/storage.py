@@ -0,0 +1,150 @@
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from .config import settings
+
+# Mission fields stored as such by every backend; any other field is a
+# deliverable (cadrage, checklist, constats, evidence, report fields)
+MISSION_CORE_FIELDS = frozenset({
+    "_id", "user_id", "title", "description", "status", "conversation_id", "created_at", "updated_at"
+})
+
+# Deliverables kept for the server (intermediate results) that missions
+# returned by the backends leave out unless include_private is set
+MISSION_PRIVATE_FIELDS = frozenset({"synthesis_parts"})
+
+def new_id() -> str:
+    return uuid.uuid4().hex
+
+def check_field_names(fields) -> None:
+    # Deliverable names end up in JSON paths and document keys
+    for name in fields:
+        if not name.isidentifier():
+            raise ValueError(f"Invalid mission field name: {name!r}")
+
+class StorageBackend(ABC):
+    """Storage of missions and their conversations (chats included).
+
+    Missions, conversations and messages are plain dicts shaped like the
+    API responses: string "_id"s and ISO 8601 timestamps. Messages are
+    {"index", "role", "content", "created_at"[, "files"]}, index being
+    their 0-based position in the conversation. Each backend stores
+    messages so that appending one writes a bounded amount of data,
+    whatever the length of the conversation. Backends implement every
+    abstract method; append_message and recent_messages are built on them.
+    """
+
+    name = ""
+
+    async def open(self):
+        """Connect and create what the backend needs (called at startup)."""
+
+    async def close(self):
+        """Release connections (called at shutdown)."""
+
+    # Missions
+
+    @abstractmethod
+    async def create_mission(self, user_id: int, title: str, description: str) -> Dict[str, Any]:
+        """Create a mission and its conversation."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_mission(self, mission_id: str, include_private: bool = False) -> Optional[Dict[str, Any]]:
+        """The mission, with MISSION_PRIVATE_FIELDS only if include_private."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_missions(self, user_id: int) -> List[Dict[str, Any]]:
+        """The user's missions, oldest first."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_mission(self, mission_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Set fields (core fields or deliverables); returns the updated mission."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def append_to_mission(self, mission_id: str, field: str, item: Any) -> bool:
+        """Append item to a list deliverable (evidence, constats) without rewriting the others."""
+        raise NotImplementedError
+
+    # Conversations
+
+    @abstractmethod
+    async def create_conversation(
+        self, user_id: int, name: Optional[str] = None, mission_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_conversations(self, user_id: int) -> List[Dict[str, Any]]:
+        """The user's standalone conversations (chats, not mission conversations), oldest first."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_conversation(self, conversation_id: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def append_messages(
+        self, conversation_id: str, messages: List[Dict[str, Any]]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Append messages ({"role", "content"[, "files", "created_at"]}) at consecutive indexes.
+
+        The messages are written together: appends from concurrent
+        requests cannot fall between them. Returns them with their index,
+        None if the conversation does not exist.
+        """
+        raise NotImplementedError
+
+    async def append_message(
+        self,
+        conversation_id: str,
+        role: str,
+        content: str,
+        files: Optional[List[Dict[str, Any]]] = None,
+        created_at=None
+    ) -> Optional[Dict[str, Any]]:
+        """Append a message; returns it with its index, None if the conversation does not exist."""
+        stored = await self.append_messages(
+            conversation_id, [{"role": role, "content": content, "files": files, "created_at": created_at}]
+        )
+        return stored[0] if stored is not None else None
+
+    @abstractmethod
+    async def list_messages(
+        self, conversation_id: str, offset: int = 0, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Messages from index offset, in order (limit=None: to the end)."""
+        raise NotImplementedError
+
+    async def recent_messages(self, conversation_id: str, count: int) -> List[Dict[str, Any]]:
+        """The last count messages, in order."""
+        conversation = await self.get_conversation(conversation_id)
+        if conversation is None or count <= 0:
+            return []
+        return await self.list_messages(
+            conversation_id, max(0, conversation["message_count"] - count), count
+        )
+
+_storage: Optional[StorageBackend] = None
+
+def get_storage() -> StorageBackend:
+    """Backend selected by STORAGE_BACKEND, created on first use."""
+    global _storage
+    if _storage is None:
+        if settings.STORAGE_BACKEND == "sqlite":
+            from .sql_storage import SQLStorage
+            _storage = SQLStorage()
+        elif settings.STORAGE_BACKEND == "document":
+            from .document_storage import DocumentStorage
+            _storage = DocumentStorage()
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND {settings.STORAGE_BACKEND!r} (sqlite or document)")
+    return _storage
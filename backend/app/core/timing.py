@@ -0,0 +1,122 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from .config import settings
+
+class RequestTimings:
+    """Named stage durations of one request, in seconds.
+
+    Spans with the same name add up, so a stage entered several times
+    (e.g. two user lookups) is reported once with its total.
+    """
+
+    __slots__ = ("start", "stages")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in milliseconds."""
+        entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items()]
+        entries.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(entries)
+
+    def summary(self) -> str:
+        return ", ".join(f"{name}={seconds * 1000:.1f} ms" for name, seconds in self.stages.items())
+
+# Timings of the request being handled; None outside a request (scripts,
+# background tasks), where spans do nothing
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current_timings.get()
+
+class span:
+    """Record how long a block takes as a stage of the current request.
+
+        with span("db.user"):
+            ...
+        async with span("mistral"):
+            ...
+
+    Spans also work in threads started with asyncio.to_thread (which copy
+    the context), but not in executor pools: time the await instead.
+    """
+
+    __slots__ = ("name", "timings", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.timings = _current_timings.get()
+        if self.timings is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.start)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.__exit__(exc_type, exc, tb)
+
+# Routes that never get the header: on login, the bcrypt stage (and so
+# the total) only appears for existing accounts
+SERVER_TIMING_EXCLUDED_PREFIXES = ("/auth/",)
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware collecting spans and sending them as Server-Timing.
+
+    The header (SERVER_TIMING_ENABLED) is written when the response starts,
+    so it covers the stages run before the first byte (for streamed
+    exports, not the streaming itself); authentication routes never get
+    it. Requests slower than SLOW_REQUEST_THRESHOLD_MS are logged with
+    their full breakdown, measured to the end of the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        status = 500
+        send_header = settings.SERVER_TIMING_ENABLED and not scope["path"].startswith(SERVER_TIMING_EXCLUDED_PREFIXES)
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if send_header:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timings.reset(token)
+            threshold = settings.SLOW_REQUEST_THRESHOLD_MS
+            elapsed_ms = timings.elapsed() * 1000
+            if threshold > 0 and elapsed_ms >= threshold:
+                print(
+                    f"Slow request: {scope['method']} {scope['path']} -> {status} "
+                    f"in {elapsed_ms:.1f} ms ({timings.summary() or 'no spans'})"
+                )
@@ -1,20 +1,55 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 
-from .core.database import init_db
+from .core.config import settings
+from .core.database import init_db, check_schema_version, async_engine
 from .core.seed import create_admin_user
-from .api import auth, users, missions, chat
+from .core.auth import refresh_token_purge_loop
+from .core.storage import get_storage
+from .api import auth, users, missions, chat, admin
+from .core.executors import render_executor, password_executor, bulk_hash_executor
+from .core.metrics import MetricsMiddleware, executor_metrics, instrument_routes, registry
+from .core.timing import ServerTimingMiddleware
+from .services.evidence_service import evidence_executor
+from .services.llm_usage import llm_usage_ledger
+from .services.pdf_service import pdf_executor
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    init_db()  # Initialize SQLite database
-    create_admin_user()  # Create default admin user
+    if settings.STARTUP_PROFILE != "fast":
+        init_db()  # Apply pending migrations (one version query when up to date)
+        create_admin_user()  # Create default admin user
+    else:
+        # The fast profile expects the database to be provisioned by init_db.py
+        check_schema_version()
+    await get_storage().open()
+    prewarm_task = None
+    if settings.PDF_PREWARM:
+        # Start the PDF workers in the background so boot is not delayed
+        prewarm_task = asyncio.get_running_loop().create_task(pdf_executor.warm_up())
+    background_stop = asyncio.Event()
+    purge_task = asyncio.get_running_loop().create_task(refresh_token_purge_loop(background_stop))
+    usage_task = asyncio.get_running_loop().create_task(llm_usage_ledger.flush_loop(background_stop))
     yield
     # Shutdown
-    pass
+    background_stop.set()
+    await purge_task
+    await usage_task  # Writes the LLM usage still buffered
+    await get_storage().close()
+    if prewarm_task is not None and not prewarm_task.done():
+        prewarm_task.cancel()
+    evidence_executor.shutdown()
+    render_executor.shutdown()
+    password_executor.shutdown()
+    bulk_hash_executor.shutdown()
+    pdf_executor.shutdown()
+    # Pooled aiosqlite connections each own a thread; close them
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Audit Automation API",
@@ -30,13 +65,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+if settings.SERVER_TIMING_ENABLED or settings.SLOW_REQUEST_THRESHOLD_MS > 0:
+    app.add_middleware(ServerTimingMiddleware)
+
+if settings.METRICS_ENABLED:
+    # Outermost user middleware: its timings include CORS handling
+    app.add_middleware(MetricsMiddleware)
+    registry.add_collector(executor_metrics(
+        [render_executor, password_executor, bulk_hash_executor, pdf_executor, evidence_executor]
+    ))
+
 # Inclure les routes
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(chat.router)
 app.include_router(missions.router)
+app.include_router(admin.router)
 
 @app.get("/")
 async def root():
@@ -46,5 +93,13 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    # Label requests with their route template; must follow every route
+    instrument_routes(app.router.routes)
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -1,51 +1,52 @@
-from typing import List, Optional, Dict, Any, Annotated
-from datetime import datetime
-from pydantic import BaseModel, Field, BeforeValidator
-from bson import ObjectId
-
-# Pydantic v2 way of handling ObjectId
-def validate_object_id(v: Any) -> ObjectId:
-    if isinstance(v, ObjectId):
-        return v
-    if isinstance(v, str) and ObjectId.is_valid(v):
-        return ObjectId(v)
-    raise ValueError("Invalid ObjectId")
-
-PyObjectId = Annotated[ObjectId, BeforeValidator(validate_object_id)]
-
-class Message(BaseModel):
-    role: str
-    content: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
-    files: Optional[List[Dict[str, Any]]] = []
-
-class Conversation(BaseModel):
-    id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
-    mission_id: PyObjectId
-    messages: List[Message] = []
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
-    
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
-
-class Mission(BaseModel):
-    id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
-    title: str
-    description: str
-    status: str = "initial"  # initial, questioning, scoping, checklist, audit, synthesis, report
-    current_conversation_id: Optional[PyObjectId] = None
-    generated_files: List[Dict[str, str]] = []
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
-    
-    class Config:
-        populate_by_name = True
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
-
-class MissionCreate(BaseModel):
-    title: str
-    description: str
\ No newline at end of file
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from ..core.database import Base
+
+class Mission(Base):
+    """Audit mission row of the SQLite storage backend (app.core.sql_storage).
+
+    The deliverables (cadrage, checklist, constats, evidence, report
+    fields) change shape with the templates, so they live in the data
+    JSON column rather than in their own columns.
+    """
+    __tablename__ = "missions"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="initial")
+    conversation_id = Column(String(32), nullable=True)
+    data = Column(JSON, nullable=False, default=dict)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_missions_user_id_created_at", "user_id", "created_at"),
+    )
+
+class Conversation(Base):
+    """Chat or mission conversation; messages are stored one row each."""
+    __tablename__ = "conversations"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    mission_id = Column(String(32), nullable=True)  # None for standalone chats
+    name = Column(String, nullable=True)
+    message_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_conversations_user_id_created_at", "user_id", "created_at"),
+        Index("ix_conversations_mission_id", "mission_id"),
+    )
+
+class ConversationMessage(Base):
+    __tablename__ = "conversation_messages"
+
+    conversation_id = Column(String(32), primary_key=True)
+    position = Column(Integer, primary_key=True)  # 0-based, in order of arrival
+    role = Column(String, nullable=False)  # "user" or "assistant"
+    content = Column(Text, nullable=False)
+    files = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Optional, Literal
 from datetime import datetime
 
 # Auth Schemas
@@ -61,4 +61,66 @@ class UpdateProfile(BaseModel):
     email: Optional[EmailStr] = None
 
 class UserListResponse(BaseModel):
-    users: list[UserProfile]
\ No newline at end of file
+    users: list[UserProfile]
+    nextCursor: Optional[str] = None  # None on the last page
+    total: Optional[int] = None  # Only when requested and served by the counters
+
+# Bulk import Schemas
+class UserImportRow(BaseModel):
+    email: EmailStr
+    firstname: str
+    lastname: str
+    password: str
+    role: Literal["user", "admin"] = "user"
+
+    @field_validator("firstname", "lastname", "password")
+    @classmethod
+    def not_blank(cls, value: str) -> str:
+        if not value.strip():
+            raise ValueError("must not be empty")
+        return value
+
+    @field_validator("role", mode="before")
+    @classmethod
+    def default_role(cls, value):
+        return value or "user"
+
+class UserImportRowResult(BaseModel):
+    row: int
+    email: Optional[str] = None
+    status: str  # "created", "skipped" or "error"
+    detail: Optional[str] = None
+
+class UserImportResponse(BaseModel):
+    created: int
+    skipped: int
+    failed: int
+    rows: list[UserImportRowResult]
+
+# LLM usage Schemas
+class LLMUsageGroup(BaseModel):
+    key: Optional[str] = None  # user id, mission id, template, model or day; None for unattributed calls
+    calls: int
+    errors: int
+    promptTokens: int
+    completionTokens: int
+    totalTokens: int
+    avgLatencyMs: float
+    maxLatencyMs: float
+    avgTtftMs: Optional[float] = None  # Streamed calls only
+
+class LLMUsageReport(BaseModel):
+    groupBy: str
+    since: datetime
+    until: Optional[datetime] = None
+    groups: list[LLMUsageGroup]
+
+class LLMUsageToday(BaseModel):
+    usedTokens: int
+    dailyTokenQuota: Optional[int] = None  # None = unlimited
+    remainingTokens: Optional[int] = None
+    resetsAt: datetime
+
+class UpdateLLMQuota(BaseModel):
+    # None = back to the LLM_DAILY_TOKEN_QUOTA default, 0 = unlimited
+    dailyTokenQuota: Optional[int] = Field(None, ge=0)
\ No newline at end of file
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from ..core.database import Base
+
+class LLMUsage(Base):
+    """One LLM call: who made it, for which mission and template, and what it cost.
+
+    Append-only; rows are written in batches by the usage ledger
+    (app.services.llm_usage), so created_at is the time of the call rather
+    than of the insert.
+    """
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    user_id = Column(Integer, nullable=True)  # None for calls made outside a request
+    mission_id = Column(String, nullable=True)
+    template = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    total_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Float, nullable=False)
+    ttft_ms = Column(Float, nullable=True)  # Time to first token, streamed calls only
+    status = Column(String, nullable=False, default="ok")  # "ok" or "error"
+
+    __table_args__ = (
+        Index("ix_llm_usage_created_at", "created_at"),
+        # Daily quota sums and per-user / per-mission reports
+        Index("ix_llm_usage_user_id_created_at", "user_id", "created_at"),
+        Index("ix_llm_usage_mission_id_created_at", "mission_id", "created_at"),
+    )
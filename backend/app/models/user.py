@@ -1,7 +1,14 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from ..core.database import Base
 
+# SQLite stores created_at in CURRENT_TIMESTAMP's text format; binding
+# datetimes the same way keeps keyset cursors comparable to stored values
+SQLITE_TIMESTAMP = sqlite.DATETIME(
+    storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -12,14 +19,48 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     role = Column(String, default="user", nullable=False)  # "admin" or "user"
     is_active = Column(Boolean, default=True, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Daily LLM token budget; None = LLM_DAILY_TOKEN_QUOTA, 0 or less = unlimited
+    llm_daily_token_quota = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True).with_variant(SQLITE_TIMESTAMP, "sqlite"), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Keyset pagination of the admin listing, optionally filtered
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_role_created_at_id", "role", "created_at", "id"),
+        Index("ix_users_is_active_created_at_id", "is_active", "created_at", "id"),
+        # Case-insensitive prefix search (range scans on lower(column))
+        Index("ix_users_email_lower", func.lower(email)),
+        Index("ix_users_firstname_lower", func.lower(firstname)),
+        Index("ix_users_lastname_lower", func.lower(lastname)),
+    )
+
+class UserCount(Base):
+    """User counters kept in step with the users table by SQLite triggers (migration 0006).
+
+    The triggers fire for every write to users, ORM or Core, bulk included.
+
+    Keys: "all", "role:<role>", "active:<0|1>" and "role:<role>|active:<0|1>".
+    """
+    __tablename__ = "user_counts"
+
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
 
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(String, unique=True, index=True, nullable=False)
+    # SHA-256 hex digest of the token; the token itself is never stored
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
     user_id = Column(Integer, nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_refresh_tokens_user_id_expires_at", "user_id", "expires_at"),
+    )
+
+def user_count_keys(role: str, is_active: bool) -> list:
+    active = f"active:{int(bool(is_active))}"
+    return ["all", f"role:{role}", active, f"role:{role}|{active}"]
@@ -93,7 +93,57 @@ La synthèse doit inclure :
 5. Recommandations prioritaires
 6. Conclusion
 
+Longueur : 300-500 mots
+Ton : Professionnel et objectif
+""",
+
+    "summarize_constats": """
+Résume les constats d'audit suivants de la mission « {mission_title} ».
+Ils font partie d'un ensemble plus large qui sera synthétisé ensuite :
+
+{constats}
+
+Le résumé doit indiquer :
+- Les faiblesses relevées, regroupées par thème, avec leur criticité
+- Les références des constats critiques et majeurs
+- Les normes concernées
+- Les recommandations principales
+
+Longueur : 150 mots maximum
+Ton : Factuel, sans introduction ni conclusion
+""",
+
+    "merge_summaries": """
+Fusionne les résumés partiels suivants des constats de la mission d'audit « {mission_title} »
+en un seul résumé, sans perdre les constats critiques et majeurs :
+
+{summaries}
+
+Regroupe les faiblesses par thème, conserve les références des constats
+critiques et majeurs ainsi que les recommandations principales.
+
+Longueur : 250 mots maximum
+Ton : Factuel, sans introduction ni conclusion
+""",
+
+    "reduce_synthesis": """
+Sur la base du contexte de la mission d'audit et des résumés de ses constats, rédige une synthèse executive :
+
+Contexte de la mission :
+{mission_context}
+
+Résumés des constats ({constat_count} constats au total) :
+{summaries}
+
+La synthèse doit inclure :
+1. Contexte et périmètre de la mission
+2. Méthodologie appliquée
+3. Principaux constats (points forts et faiblesses)
+4. Niveau de conformité global
+5. Recommandations prioritaires
+6. Conclusion
+
 Longueur : 300-500 mots
 Ton : Professionnel et objectif
 """
-}
\ No newline at end of file
+}
@@ -0,0 +1,50 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Optional
+
+from ..core.config import settings
+
+def artifact_key(kind: str, version: Any, payload: Any) -> str:
+    """Clé d'un export : type, version du modèle et empreinte des données."""
+    digest = hashlib.sha256(
+        json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+    return f"{kind}:v{version}:{digest}"
+
+class ArtifactCache:
+    """Cache LRU en mémoire des fichiers générés, borné en octets."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        data = self._entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+        self._entries[key] = data
+        self._size += len(data)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+artifact_cache = ArtifactCache(settings.ARTIFACT_CACHE_MAX_BYTES)
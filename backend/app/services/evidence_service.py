@@ -0,0 +1,281 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from ..core.config import settings
+from ..core.executors import BoundedExecutor
+
+# Taille des blocs lus lors du hachage et de la copie des fichiers
+READ_BLOCK_SIZE = 1024 * 1024
+
+TEXT_EXTENSIONS = {".log", ".txt", ".json", ".xml", ".conf", ".cfg", ".ini", ".md"}
+
+
+# ---------------------------------------------------------------------------
+# Lecteurs en flux (exécutés dans les processus du pool)
+# ---------------------------------------------------------------------------
+
+def _iter_text_lines(binary: io.BufferedIOBase) -> Iterator[str]:
+    """Itère ligne par ligne sans charger le fichier en mémoire."""
+    stream = io.TextIOWrapper(binary, encoding="utf-8", errors="replace", newline="")
+    for line in stream:
+        yield line.rstrip("\r\n")
+
+
+def _iter_csv_lines(binary: io.BufferedIOBase) -> Iterator[str]:
+    stream = io.TextIOWrapper(binary, encoding="utf-8", errors="replace", newline="")
+    for row in csv.reader(stream):
+        cells = [cell.strip() for cell in row if cell and cell.strip()]
+        if cells:
+            yield " | ".join(cells)
+
+
+def _iter_xlsx_lines(binary: io.BufferedIOBase) -> Iterator[str]:
+    from openpyxl import load_workbook
+
+    # Le mode read_only lit les feuilles en flux au lieu de construire tout le classeur
+    workbook = load_workbook(binary, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            yield f"[{worksheet.title}]"
+            for row in worksheet.iter_rows(values_only=True):
+                cells = [str(value) for value in row if value is not None and str(value).strip()]
+                if cells:
+                    yield " | ".join(cells)
+    finally:
+        workbook.close()
+
+
+def _iter_pdf_lines(binary: io.BufferedIOBase) -> Iterator[str]:
+    from pypdf import PdfReader
+
+    reader = PdfReader(binary)
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        for line in text.splitlines():
+            yield line
+
+
+def _iter_zip_lines(binary: io.BufferedIOBase) -> Iterator[str]:
+    with zipfile.ZipFile(binary) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            reader = _reader_for(info.filename)
+            if reader is None:
+                continue
+            yield f"[{info.filename}]"
+            with archive.open(info) as member:
+                yield from reader(member)
+
+
+def _iter_gzip_lines(binary: io.BufferedIOBase) -> Iterator[str]:
+    with gzip.GzipFile(fileobj=binary) as member:
+        yield from _iter_text_lines(member)
+
+
+def _reader_for(filename: str):
+    name = filename.lower()
+    if name.endswith(".gz"):
+        return _iter_gzip_lines
+    extension = os.path.splitext(name)[1]
+    if extension == ".csv":
+        return _iter_csv_lines
+    if extension in (".xlsx", ".xlsm"):
+        return _iter_xlsx_lines
+    if extension == ".pdf":
+        return _iter_pdf_lines
+    if extension == ".zip":
+        return _iter_zip_lines
+    if extension in TEXT_EXTENSIONS:
+        return _iter_text_lines
+    return None
+
+
+def _write_chunks(lines: Iterable[str], target_dir: str, chunk_chars: int, max_chars: int) -> Dict[str, Any]:
+    """Découpe le texte extrait en blocs de taille bornée écrits sur disque."""
+    buffer: List[str] = []
+    buffered = 0
+    chunks = 0
+    total = 0
+    truncated = False
+
+    def flush():
+        nonlocal buffer, buffered, chunks
+        if not buffer:
+            return
+        path = os.path.join(target_dir, f"chunk_{chunks:05d}.txt")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("\n".join(buffer))
+        chunks += 1
+        buffer = []
+        buffered = 0
+
+    for line in lines:
+        if not line:
+            continue
+        room = max_chars - total
+        if len(line) + 1 > room:
+            line = line[:max(room - 1, 0)]
+            truncated = True
+        if line:
+            buffer.append(line)
+            buffered += len(line) + 1
+            total += len(line) + 1
+        if buffered >= chunk_chars:
+            flush()
+        if truncated:
+            break
+    flush()
+
+    return {"chunks": chunks, "chars": total, "truncated": truncated}
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(READ_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def ingest_evidence_file(
+    upload_path: str,
+    filename: str,
+    evidence_dir: str,
+    chunk_chars: int,
+    max_chars: int
+) -> Dict[str, Any]:
+    """Hache, déduplique et extrait le texte d'un fichier de preuve.
+
+    Exécutée dans un processus du pool : toute la lecture se fait en flux,
+    la mémoire du worker reste donc constante quelle que soit la taille du fichier.
+    """
+    sha256 = _hash_file(upload_path)
+    size = os.path.getsize(upload_path)
+
+    files_dir = os.path.join(evidence_dir, "files")
+    text_root = os.path.join(evidence_dir, "text")
+    os.makedirs(files_dir, exist_ok=True)
+    os.makedirs(text_root, exist_ok=True)
+
+    stored_path = os.path.join(files_dir, sha256)
+    if os.path.exists(stored_path):
+        os.remove(upload_path)
+    else:
+        os.replace(upload_path, stored_path)
+
+    text_dir = os.path.join(text_root, sha256)
+    manifest_path = os.path.join(text_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as handle:
+            manifest = json.load(handle)
+        manifest["cached"] = True
+        return manifest
+
+    manifest = {"sha256": sha256, "size": size, "chunks": 0, "chars": 0, "truncated": False, "error": None}
+
+    # Écriture dans un répertoire temporaire puis renommage atomique
+    work_dir = f"{text_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+    try:
+        reader = _reader_for(filename)
+        if reader is None:
+            manifest["error"] = "Format de fichier non supporté"
+        else:
+            with open(stored_path, "rb") as handle:
+                manifest.update(_write_chunks(reader(handle), work_dir, chunk_chars, max_chars))
+    except Exception as e:
+        manifest["error"] = f"Extraction impossible: {e}"
+
+    with open(os.path.join(work_dir, "manifest.json"), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle)
+    try:
+        os.replace(work_dir, text_dir)
+    except OSError:
+        # Un autre processus a déjà extrait le même fichier
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    manifest["cached"] = False
+    return manifest
+
+
+# ---------------------------------------------------------------------------
+# Service
+# ---------------------------------------------------------------------------
+
+# Pool de processus d'extraction : un worker qui meurt (mémoire, fichier
+# malformé) fait échouer son envoi avec WorkerCrashed et le pool est remplacé
+evidence_executor = BoundedExecutor(
+    "evidence",
+    "process",
+    settings.EVIDENCE_WORKERS,
+    settings.EVIDENCE_QUEUE_DEPTH
+)
+
+class EvidenceService:
+    @property
+    def evidence_dir(self) -> str:
+        return os.path.abspath(settings.EVIDENCE_DIR)
+
+    def new_upload_path(self) -> str:
+        uploads_dir = os.path.join(self.evidence_dir, "uploads")
+        os.makedirs(uploads_dir, exist_ok=True)
+        return os.path.join(uploads_dir, os.urandom(16).hex())
+
+    async def ingest(self, upload_path: str, filename: str) -> Dict[str, Any]:
+        """Extrait le texte d'un fichier déjà écrit sur disque, hors de la boucle d'événements.
+
+        Lève ExecutorBusy si le pool est saturé, WorkerCrashed si le worker meurt.
+        """
+        manifest = await evidence_executor.run(
+            ingest_evidence_file,
+            upload_path,
+            filename,
+            self.evidence_dir,
+            settings.EVIDENCE_CHUNK_CHARS,
+            settings.EVIDENCE_MAX_CHARS_PER_FILE
+        )
+        manifest["filename"] = filename
+        return manifest
+
+    def read_text(self, sha256: str, max_chars: int) -> str:
+        """Lit le texte extrait en cache, bloc par bloc, dans la limite de max_chars."""
+        text_dir = os.path.join(self.evidence_dir, "text", sha256)
+        parts: List[str] = []
+        remaining = max_chars
+        index = 0
+        while remaining > 0:
+            path = os.path.join(text_dir, f"chunk_{index:05d}.txt")
+            if not os.path.exists(path):
+                break
+            with open(path, encoding="utf-8") as handle:
+                part = handle.read(remaining)
+            parts.append(part)
+            remaining -= len(part)
+            index += 1
+        return "\n".join(parts)
+
+    def build_prompt_context(self, evidence: List[Dict[str, Any]], max_chars: Optional[int] = None) -> str:
+        """Assemble des extraits de preuves pour un prompt, budget réparti entre les fichiers."""
+        usable = [item for item in evidence if item.get("chunks")]
+        if not usable:
+            return ""
+
+        budget = max_chars or settings.EVIDENCE_PROMPT_CHARS
+        per_file = max(budget // len(usable), 1)
+        sections = []
+        for item in usable:
+            excerpt = self.read_text(item["sha256"], per_file)
+            if excerpt:
+                sections.append(f"--- {item.get('filename', item['sha256'])} ---\n{excerpt}")
+        return "\n\n".join(sections)
+
+evidence_service = EvidenceService()
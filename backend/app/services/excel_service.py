@@ -1,143 +1,191 @@
-import pandas as pd
+import asyncio
 from io import BytesIO
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 import os
 from datetime import datetime
 
+from ..core.config import settings
+from ..core.executors import render_executor
+from ..core.timing import span
+from .artifact_cache import artifact_cache, artifact_key
+from .excel_templates import (
+    TEMPLATE_VERSION,
+    CADRAGE_TITLE, CADRAGE_WIDTHS,
+    CHECKLIST_TITLE, CHECKLIST_COLUMNS, CHECKLIST_COLUMN_NAMES, CHECKLIST_WIDTHS,
+    CONSTAT_TITLE, CONSTAT_WIDTHS,
+    get_template, cadrage_rows, checklist_rows, constat_rows
+)
+from .xlsx_stream import SheetSpec, safe_sheet_name, stream_workbook
+
+def mission_workbook_sheets(mission_data: Dict[str, Any]) -> Iterator[SheetSpec]:
+    """Feuilles du classeur consolidé : cadrage, checklist, registre puis une fiche par constat."""
+    used_names = {'cadrage', 'checklist', 'registre des constats'}
+    constats = mission_data.get('constats', [])
+    detail_names = [
+        safe_sheet_name(f"Constat {i} {constat.get('reference', '')}", used_names)
+        for i, constat in enumerate(constats, 1)
+    ]
+
+    yield get_template('cadrage').sheet(cadrage_rows(mission_data.get('cadrage', {})))
+    yield get_template('checklist').sheet(checklist_rows(mission_data.get('checklist', [])))
+    yield get_template('register').sheet(
+        [i, c.get('reference', ''), c.get('intitule', ''), c.get('entite', ''),
+         c.get('criticite', ''), c.get('normes', ''), name]
+        for i, (c, name) in enumerate(zip(constats, detail_names), 1)
+    )
+    constat_template = get_template('constat')
+    for constat, name in zip(constats, detail_names):
+        rows = constat_rows(constat)
+        yield constat_template.sheet(rows, footer=['Total', len(rows)], name=name)
+
 class ExcelService:
-    
+
     @staticmethod
     async def generate_cadrage_excel(cadrage_data: Dict[str, Any]) -> BytesIO:
+        return await ExcelService._render_cached('cadrage', ExcelService.build_cadrage_excel, cadrage_data)
+
+    @staticmethod
+    async def generate_checklist_excel(checklist_data: List[Dict[str, str]]) -> BytesIO:
+        return await ExcelService._render_cached('checklist', ExcelService.build_checklist_excel, checklist_data)
+
+    @staticmethod
+    async def generate_constat_excel(constat_data: Dict[str, Any]) -> BytesIO:
+        return await ExcelService._render_cached('constat', ExcelService.build_constat_excel, constat_data)
+
+    @staticmethod
+    async def _render_cached(kind: str, build, data: Any) -> BytesIO:
+        # L'empreinte des données est calculée hors de la boucle d'événements
+        with span("export.key"):
+            key = await asyncio.to_thread(
+                artifact_key, f"{kind}.{settings.EXCEL_WRITER_MODE}", TEMPLATE_VERSION, data
+            )
+        cached = artifact_cache.get(key)
+        if cached is not None:
+            return BytesIO(cached)
+
+        with span("export.excel"):
+            output = await render_executor.run(build, data)
+        artifact_cache.put(key, output.getvalue())
+        return output
+
+    @staticmethod
+    def stream_mission_workbook(mission_data: Dict[str, Any]) -> Iterator[bytes]:
+        """Classeur consolidé de la mission, produit au fil de l'écriture"""
+        return stream_workbook(mission_workbook_sheets(mission_data))
+
+    @staticmethod
+    def build_cadrage_excel(cadrage_data: Dict[str, Any]) -> BytesIO:
+        if settings.EXCEL_WRITER_MODE == "pandas":
+            return ExcelService._cadrage_pandas(cadrage_data)
+        return get_template('cadrage').render(cadrage_rows(cadrage_data))
+
+    @staticmethod
+    def build_checklist_excel(checklist_data: List[Dict[str, str]]) -> BytesIO:
+        if settings.EXCEL_WRITER_MODE == "pandas":
+            return ExcelService._checklist_pandas(checklist_data)
+        return get_template('checklist').render(checklist_rows(checklist_data))
+
+    @staticmethod
+    def build_constat_excel(constat_data: Dict[str, Any]) -> BytesIO:
+        if settings.EXCEL_WRITER_MODE == "pandas":
+            return ExcelService._constat_pandas(constat_data)
+        rows = constat_rows(constat_data)
+        return get_template('constat').render(rows, footer=['Total', len(rows)])
+
+    @staticmethod
+    def _cadrage_pandas(cadrage_data: Dict[str, Any]) -> BytesIO:
+        import pandas as pd
+
         # Créer un DataFrame pour le cadrage
+        rows = cadrage_rows(cadrage_data)
         data = {
-            'Champ': [
-                'Domaine(s) concerné(s)',
-                'Processus inclus',
-                'Exclusions éventuelles',
-                'Référentiels pris en compte'
-            ],
-            'Détail à compléter': [
-                cadrage_data.get('domaines', ''),
-                cadrage_data.get('processus', ''),
-                cadrage_data.get('exclusions', ''),
-                cadrage_data.get('referentiels', '')
-            ]
+            'Champ': [row[0] for row in rows],
+            'Détail à compléter': [row[1] for row in rows]
         }
-        
-        # Ajouter les objectifs
-        objectifs = cadrage_data.get('objectifs', [])
-        for i, obj in enumerate(objectifs, 1):
-            data['Champ'].append(f'Objectif {i}')
-            data['Détail à compléter'].append(obj)
-        
+
         df = pd.DataFrame(data)
-        
+
         # Créer le fichier Excel
         output = BytesIO()
         with pd.ExcelWriter(output, engine='openpyxl') as writer:
             # Ajouter le titre
-            title_df = pd.DataFrame([['Trame – Étape 1 : Cadrage de la mission d\'audit']])
+            title_df = pd.DataFrame([[CADRAGE_TITLE]])
             title_df.to_excel(writer, sheet_name='Cadrage', index=False, header=False)
-            
+
             # Ajouter le contenu principal
             df.to_excel(writer, sheet_name='Cadrage', index=False, startrow=2)
-            
+
             # Formater le fichier
             worksheet = writer.sheets['Cadrage']
-            worksheet.column_dimensions['A'].width = 30
-            worksheet.column_dimensions['B'].width = 50
-        
+            for column, width in CADRAGE_WIDTHS.items():
+                worksheet.column_dimensions[column].width = width
+
         output.seek(0)
         return output
 
     @staticmethod
-    async def generate_checklist_excel(checklist_data: List[Dict[str, str]]) -> BytesIO:
+    def _checklist_pandas(checklist_data: List[Dict[str, str]]) -> BytesIO:
+        import pandas as pd
+
         # Créer le DataFrame pour la checklist
         df = pd.DataFrame(checklist_data)
-        
+
         # Réorganiser les colonnes
-        columns = ['section', 'exigence', 'assigne_a', 'conforme', 'date_maj']
-        column_names = {
-            'section': 'SECTION/CATÉGORIE',
-            'exigence': 'EXIGENCES/TÂCHES',
-            'assigne_a': 'ATTRIBUÉ À',
-            'conforme': 'EN CONFORMITÉ ?',
-            'date_maj': 'DATE DE LA DERNIÈRE MISE À JOUR'
-        }
-        
-        df = df[columns]
-        df.rename(columns=column_names, inplace=True)
-        
+        df = df[CHECKLIST_COLUMNS]
+        df.rename(columns=CHECKLIST_COLUMN_NAMES, inplace=True)
+
         # Créer le fichier Excel
         output = BytesIO()
         with pd.ExcelWriter(output, engine='openpyxl') as writer:
             # Ajouter le titre
-            title_df = pd.DataFrame([['MODÈLE DE LISTE DE VÉRIFICATION POUR LES CONTRÔLES ISO 27001']])
+            title_df = pd.DataFrame([[CHECKLIST_TITLE]])
             title_df.to_excel(writer, sheet_name='Checklist', index=False, header=False)
-            
+
             # Ajouter le contenu
             df.to_excel(writer, sheet_name='Checklist', index=False, startrow=2)
-            
+
             # Formater
             worksheet = writer.sheets['Checklist']
-            worksheet.column_dimensions['A'].width = 35
-            worksheet.column_dimensions['B'].width = 50
-            worksheet.column_dimensions['C'].width = 20
-            worksheet.column_dimensions['D'].width = 15
-            worksheet.column_dimensions['E'].width = 25
-        
+            for column, width in CHECKLIST_WIDTHS.items():
+                worksheet.column_dimensions[column].width = width
+
         output.seek(0)
         return output
 
     @staticmethod
-    async def generate_constat_excel(constat_data: Dict[str, Any]) -> BytesIO:
+    def _constat_pandas(constat_data: Dict[str, Any]) -> BytesIO:
+        import pandas as pd
+
         # Créer le DataFrame pour le constat
+        rows = constat_rows(constat_data)
         data = {
-            'Champ': [
-                'Référence du constat',
-                'Intitulé du constat',
-                'Entité auditée',
-                'Description du constat',
-                'Criticité',
-                'Norme(s) de référence',
-                'Preuves',
-                'Recommandations'
-            ],
-            'Détail': [
-                constat_data.get('reference', ''),
-                constat_data.get('intitule', ''),
-                constat_data.get('entite', ''),
-                constat_data.get('description', ''),
-                constat_data.get('criticite', ''),
-                constat_data.get('normes', ''),
-                constat_data.get('preuves', ''),
-                constat_data.get('recommandations', '')
-            ]
+            'Champ': [row[0] for row in rows],
+            'Détail': [row[1] for row in rows]
         }
-        
+
         df = pd.DataFrame(data)
-        
+
         # Créer le fichier Excel
         output = BytesIO()
         with pd.ExcelWriter(output, engine='openpyxl') as writer:
             # Ajouter le titre
-            title_df = pd.DataFrame([['FICHE DE CONSTAT D\'AUDIT']])
+            title_df = pd.DataFrame([[CONSTAT_TITLE]])
             title_df.to_excel(writer, sheet_name='Constat', index=False, header=False)
-            
+
             # Ajouter le contenu
             df.to_excel(writer, sheet_name='Constat', index=False, startrow=2)
-            
+
             # Formater
             worksheet = writer.sheets['Constat']
-            worksheet.column_dimensions['A'].width = 30
-            worksheet.column_dimensions['B'].width = 60
-            
+            for column, width in CONSTAT_WIDTHS.items():
+                worksheet.column_dimensions[column].width = width
+
             # Ajouter le total à la fin
             total_row = len(df) + 4
             worksheet.cell(row=total_row, column=1, value='Total')
             worksheet.cell(row=total_row, column=2, value=len(data['Champ']))
-        
+
         output.seek(0)
         return output
 
-excel_service = ExcelService()
\ No newline at end of file
+excel_service = ExcelService()
@@ -0,0 +1,146 @@
+from functools import lru_cache
+from io import BytesIO
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .xlsx_stream import (
+    STYLE_CELL, STYLE_DEFAULT, STYLE_HEADER, STYLE_TITLE,
+    SheetSpec, rows_xml, stream_workbook, worksheet_prefix
+)
+
+# À incrémenter à chaque modification de mise en forme : la version fait
+# partie des clés du cache d'exports, les anciens fichiers ne sont donc plus servis
+TEMPLATE_VERSION = 1
+
+# Trames des exports : titres, colonnes et largeurs
+CADRAGE_TITLE = 'Trame – Étape 1 : Cadrage de la mission d\'audit'
+CADRAGE_HEADER = ['Champ', 'Détail à compléter']
+CADRAGE_WIDTHS = {'A': 30, 'B': 50}
+CADRAGE_FIELDS = [
+    ('domaines', 'Domaine(s) concerné(s)'),
+    ('processus', 'Processus inclus'),
+    ('exclusions', 'Exclusions éventuelles'),
+    ('referentiels', 'Référentiels pris en compte')
+]
+
+CHECKLIST_TITLE = 'MODÈLE DE LISTE DE VÉRIFICATION POUR LES CONTRÔLES ISO 27001'
+CHECKLIST_COLUMNS = ['section', 'exigence', 'assigne_a', 'conforme', 'date_maj']
+CHECKLIST_COLUMN_NAMES = {
+    'section': 'SECTION/CATÉGORIE',
+    'exigence': 'EXIGENCES/TÂCHES',
+    'assigne_a': 'ATTRIBUÉ À',
+    'conforme': 'EN CONFORMITÉ ?',
+    'date_maj': 'DATE DE LA DERNIÈRE MISE À JOUR'
+}
+CHECKLIST_WIDTHS = {'A': 35, 'B': 50, 'C': 20, 'D': 15, 'E': 25}
+CONFORMITY_VALUES = ['Oui', 'Non', 'Partiel', 'Non applicable']
+
+CONSTAT_TITLE = 'FICHE DE CONSTAT D\'AUDIT'
+CONSTAT_HEADER = ['Champ', 'Détail']
+CONSTAT_WIDTHS = {'A': 30, 'B': 60}
+CONSTAT_FIELDS = [
+    ('reference', 'Référence du constat'),
+    ('intitule', 'Intitulé du constat'),
+    ('entite', 'Entité auditée'),
+    ('description', 'Description du constat'),
+    ('criticite', 'Criticité'),
+    ('normes', 'Norme(s) de référence'),
+    ('preuves', 'Preuves'),
+    ('recommandations', 'Recommandations')
+]
+
+REGISTER_TITLE = 'REGISTRE DES CONSTATS D\'AUDIT'
+REGISTER_HEADER = ['N°', 'Référence', 'Intitulé', 'Entité auditée', 'Criticité', 'Norme(s) de référence', 'Feuille']
+REGISTER_WIDTHS = {'A': 6, 'B': 15, 'C': 50, 'D': 25, 'E': 15, 'F': 30, 'G': 20}
+CRITICITY_VALUES = ['Critique', 'Majeure', 'Mineure', 'Observation']
+
+class SheetTemplate:
+    """Modèle de feuille mis en forme, rendu une seule fois en XML.
+
+    Le début de feuille (volets figés, largeurs) et les lignes de titre et
+    d'en-têtes sont pré-rendus à la construction ; chaque export réutilise
+    ces fragments puis n'écrit que les cellules de données.
+    """
+
+    def __init__(
+        self,
+        sheet_name: str,
+        title: str,
+        header: Sequence[str],
+        widths: Dict[str, float],
+        validations: Sequence[tuple] = ()
+    ):
+        self.sheet_name = sheet_name
+        self.version = TEMPLATE_VERSION
+        self.validations = tuple(validations)
+        self.prefix = worksheet_prefix(widths, freeze_row=3)
+        self.head = rows_xml([
+            ([title], STYLE_TITLE),
+            ([], STYLE_DEFAULT),
+            (list(header), STYLE_HEADER)
+        ])
+
+    def sheet(
+        self,
+        rows: Iterable[Sequence[Any]],
+        footer: Optional[Sequence[Any]] = None,
+        name: Optional[str] = None
+    ) -> SheetSpec:
+        """Copie du modèle prête à recevoir les lignes de données."""
+        return SheetSpec(
+            name or self.sheet_name,
+            rows,
+            prefix=self.prefix,
+            head=self.head,
+            head_rows=3,
+            data_style=STYLE_CELL,
+            footer=footer,
+            validations=self.validations
+        )
+
+    def render(self, rows: Iterable[Sequence[Any]], footer: Optional[Sequence[Any]] = None) -> BytesIO:
+        """Classeur d'une seule feuille construit à partir du modèle."""
+        output = BytesIO()
+        for chunk in stream_workbook([self.sheet(rows, footer)]):
+            output.write(chunk)
+        output.seek(0)
+        return output
+
+def _column_of(key: str) -> str:
+    return chr(ord('A') + CHECKLIST_COLUMNS.index(key))
+
+_TEMPLATE_DEFINITIONS = {
+    'cadrage': lambda: SheetTemplate('Cadrage', CADRAGE_TITLE, CADRAGE_HEADER, CADRAGE_WIDTHS),
+    'checklist': lambda: SheetTemplate(
+        'Checklist',
+        CHECKLIST_TITLE,
+        [CHECKLIST_COLUMN_NAMES[key] for key in CHECKLIST_COLUMNS],
+        CHECKLIST_WIDTHS,
+        validations=[(_column_of('conforme'), CONFORMITY_VALUES)]
+    ),
+    'constat': lambda: SheetTemplate('Constat', CONSTAT_TITLE, CONSTAT_HEADER, CONSTAT_WIDTHS),
+    'register': lambda: SheetTemplate(
+        'Registre des constats',
+        REGISTER_TITLE,
+        REGISTER_HEADER,
+        REGISTER_WIDTHS,
+        validations=[('E', CRITICITY_VALUES)]
+    ),
+}
+
+@lru_cache(maxsize=None)
+def get_template(key: str) -> SheetTemplate:
+    """Modèle chargé au premier usage puis conservé en mémoire."""
+    return _TEMPLATE_DEFINITIONS[key]()
+
+def cadrage_rows(cadrage_data: Dict[str, Any]) -> List[List[Any]]:
+    rows = [[label, cadrage_data.get(key, '')] for key, label in CADRAGE_FIELDS]
+    for i, obj in enumerate(cadrage_data.get('objectifs', []), 1):
+        rows.append([f'Objectif {i}', obj])
+    return rows
+
+def checklist_rows(checklist_data: Iterable[Dict[str, str]]) -> Iterable[List[Any]]:
+    for item in checklist_data:
+        yield [item.get(key, '') for key in CHECKLIST_COLUMNS]
+
+def constat_rows(constat_data: Dict[str, Any]) -> List[List[Any]]:
+    return [[label, constat_data.get(key, '')] for key, label in CONSTAT_FIELDS]
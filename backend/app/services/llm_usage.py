@@ -0,0 +1,295 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func, insert, select
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..core.metrics import Counter, Histogram, registry
+from ..models.usage import LLMUsage
+
+# Au-delà de ce nombre de lots en attente (base indisponible), les plus
+# anciens enregistrements sont abandonnés plutôt que de saturer la mémoire
+MAX_PENDING_BATCHES = 50
+
+# Colonnes de regroupement acceptées par report()
+REPORT_GROUPS = {
+    "user": LLMUsage.user_id,
+    "mission": LLMUsage.mission_id,
+    "template": LLMUsage.template,
+    "model": LLMUsage.model,
+    "day": func.date(LLMUsage.created_at),
+}
+
+llm_tokens = registry.register(Counter(
+    "llm_tokens_total", "LLM tokens consumed by prompt template and kind (prompt or completion).",
+    ("template", "kind")
+))
+llm_call_duration = registry.register(Histogram(
+    "llm_call_duration_seconds", "LLM call latency by prompt template and status, in seconds.",
+    ("template", "status")
+))
+
+
+class LLMQuotaExceeded(Exception):
+    """Quota journalier de tokens atteint : l'appel n'est pas envoyé."""
+
+    def __init__(self, user_id: int, used: int, quota: int):
+        super().__init__(f"Daily LLM token quota reached ({used}/{quota} tokens)")
+        self.user_id = user_id
+        self.used = used
+        self.quota = quota
+
+    @property
+    def retry_after(self) -> int:
+        """Secondes jusqu'à la remise à zéro du quota (minuit UTC)."""
+        return max(1, int((next_quota_reset() - datetime.utcnow()).total_seconds()))
+
+
+class UsageScope:
+    """Utilisateur et mission auxquels les appels LLM en cours sont imputés."""
+
+    __slots__ = ("user_id", "quota", "mission_id")
+
+    def __init__(self, user_id: Optional[int], quota: Optional[int], mission_id: Optional[str]):
+        self.user_id = user_id
+        self.quota = quota
+        self.mission_id = mission_id
+
+
+_current_scope: ContextVar[Optional[UsageScope]] = ContextVar("llm_usage_scope", default=None)
+
+
+@contextmanager
+def usage_scope(user, mission_id: Optional[str] = None):
+    """Impute les appels LLM du bloc à user (et à la mission) et applique son quota.
+
+        with usage_scope(current_user, mission_id=mission_id):
+            constat = await get_mistral_service().generate_constat(...)
+
+    Hors de tout bloc (scripts, tâches de fond), les appels sont enregistrés
+    sans utilisateur et ne sont soumis à aucun quota.
+    """
+    token = _current_scope.set(UsageScope(user.id, getattr(user, "llm_daily_token_quota", None), mission_id))
+    try:
+        yield
+    finally:
+        _current_scope.reset(token)
+
+
+def effective_quota(user_quota: Optional[int]) -> Optional[int]:
+    """Quota journalier applicable, None si illimité."""
+    quota = settings.LLM_DAILY_TOKEN_QUOTA if user_quota is None else user_quota
+    return quota if quota > 0 else None
+
+
+def _today() -> date:
+    return datetime.utcnow().date()
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, dtime.min)
+
+
+def next_quota_reset() -> datetime:
+    """Prochaine remise à zéro des quotas journaliers (minuit UTC, heure naïve)."""
+    return _day_start(_today()) + timedelta(days=1)
+
+
+class LLMUsageLedger:
+    """Journal des appels LLM, écrit par lots, et compteurs de quota par utilisateur.
+
+    record() ne fait qu'ajouter une ligne en mémoire : l'insertion a lieu
+    quand LLM_USAGE_BATCH_SIZE lignes sont en attente ou toutes les
+    LLM_USAGE_FLUSH_INTERVAL secondes, en une seule requête. Le total du
+    jour de chaque utilisateur est relu en base au plus toutes les
+    LLM_USAGE_QUOTA_REFRESH secondes et complété localement entre-temps.
+    Le quota est donc approché : les appels déjà en cours et ceux des
+    autres workers non encore relus peuvent le dépasser légèrement.
+    """
+
+    def __init__(self):
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_tasks = set()
+        # user_id -> [jour, tokens consommés ce jour, instant de la dernière lecture en base],
+        # pour le jour _used_day seulement
+        self._used: Dict[int, list] = {}
+        self._used_day: Optional[date] = None
+
+    def record(
+        self,
+        template: str,
+        model: str,
+        latency_ms: float,
+        usage: Any = None,
+        ttft_ms: Optional[float] = None,
+        status: str = "ok"
+    ):
+        """Enregistre un appel (usage : objet UsageInfo de la réponse, ou None)."""
+        scope = _current_scope.get()
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        total_tokens = getattr(usage, "total_tokens", None) or prompt_tokens + completion_tokens
+        now = datetime.utcnow()
+        user_id = scope.user_id if scope else None
+        self._pending.append({
+            "created_at": now,
+            "user_id": user_id,
+            "mission_id": scope.mission_id if scope else None,
+            "template": template,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens,
+            "latency_ms": latency_ms,
+            "ttft_ms": ttft_ms,
+            "status": status,
+        })
+
+        if user_id is not None:
+            entry = self._used.get(user_id)
+            if entry is not None and entry[0] == now.date():
+                entry[1] += total_tokens
+
+        llm_tokens.inc((template, "prompt"), prompt_tokens)
+        llm_tokens.inc((template, "completion"), completion_tokens)
+        llm_call_duration.observe((template, status), latency_ms / 1000)
+
+        if len(self._pending) >= settings.LLM_USAGE_BATCH_SIZE:
+            try:
+                task = asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                return  # Pas de boucle (script) : écrit au prochain flush()
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task):
+        self._flush_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"LLM usage flush error: {task.exception()}")
+
+    async def flush(self) -> int:
+        """Insère les lignes en attente ; renvoie leur nombre."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, []
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(insert(LLMUsage), batch)
+                    await db.commit()
+            except Exception:
+                # Remises en tête pour le prochain essai, dans la limite du tampon
+                self._pending[:0] = batch
+                overflow = len(self._pending) - MAX_PENDING_BATCHES * settings.LLM_USAGE_BATCH_SIZE
+                if overflow > 0:
+                    del self._pending[:overflow]
+                    print(f"LLM usage buffer full, dropped {overflow} records")
+                raise
+            return len(batch)
+
+    async def flush_loop(self, stop: asyncio.Event):
+        """Vide le tampon toutes les LLM_USAGE_FLUSH_INTERVAL secondes, puis une dernière fois à l'arrêt."""
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.LLM_USAGE_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"LLM usage flush error: {e}")
+
+    async def tokens_used_today(self, user_id: int) -> int:
+        """Tokens consommés par l'utilisateur depuis minuit UTC."""
+        today = _today()
+        if self._used_day != today:
+            # Nouveau jour : les totaux de la veille ne servent plus
+            self._used.clear()
+            self._used_day = today
+        entry = self._used.get(user_id)
+        if (
+            entry is None
+            or entry[0] != today
+            or time.monotonic() - entry[2] > settings.LLM_USAGE_QUOTA_REFRESH
+        ):
+            since = _day_start(today)
+            # Sous le verrou, aucune ligne n'est entre le tampon et la base
+            async with self._flush_lock:
+                async with AsyncSessionLocal() as db:
+                    stored = await db.scalar(
+                        select(func.coalesce(func.sum(LLMUsage.total_tokens), 0)).where(
+                            LLMUsage.user_id == user_id,
+                            LLMUsage.created_at >= since
+                        )
+                    )
+                pending = sum(
+                    row["total_tokens"] for row in self._pending
+                    if row["user_id"] == user_id and row["created_at"] >= since
+                )
+                entry = self._used[user_id] = [today, stored + pending, time.monotonic()]
+        return entry[1]
+
+    def invalidate(self, user_id: int):
+        """Force la relecture du total de l'utilisateur au prochain contrôle."""
+        self._used.pop(user_id, None)
+
+    async def check_quota(self):
+        """Lève LLMQuotaExceeded si l'utilisateur courant a épuisé son quota du jour."""
+        scope = _current_scope.get()
+        if scope is None or scope.user_id is None:
+            return
+        quota = effective_quota(scope.quota)
+        if quota is None:
+            return
+        used = await self.tokens_used_today(scope.user_id)
+        if used >= quota:
+            raise LLMQuotaExceeded(scope.user_id, used, quota)
+
+    async def report(
+        self,
+        group_by: str,
+        since: datetime,
+        until: Optional[datetime] = None,
+        user_id: Optional[int] = None,
+        mission_id: Optional[str] = None,
+        template: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Agrégats (appels, erreurs, tokens, latences) par utilisateur, mission, modèle ou jour."""
+        # Les appels encore en mémoire font partie du rapport
+        await self.flush()
+        key = REPORT_GROUPS[group_by]
+        query = select(
+            key.label("key"),
+            func.count().label("calls"),
+            func.sum(case((LLMUsage.status != "ok", 1), else_=0)).label("errors"),
+            func.sum(LLMUsage.prompt_tokens).label("prompt_tokens"),
+            func.sum(LLMUsage.completion_tokens).label("completion_tokens"),
+            func.sum(LLMUsage.total_tokens).label("total_tokens"),
+            func.avg(LLMUsage.latency_ms).label("avg_latency_ms"),
+            func.max(LLMUsage.latency_ms).label("max_latency_ms"),
+            func.avg(LLMUsage.ttft_ms).label("avg_ttft_ms"),
+        ).where(LLMUsage.created_at >= since)
+        if until is not None:
+            query = query.where(LLMUsage.created_at < until)
+        if user_id is not None:
+            query = query.where(LLMUsage.user_id == user_id)
+        if mission_id is not None:
+            query = query.where(LLMUsage.mission_id == mission_id)
+        if template is not None:
+            query = query.where(LLMUsage.template == template)
+        order = key if group_by == "day" else func.sum(LLMUsage.total_tokens).desc()
+        query = query.group_by(key).order_by(order).limit(limit)
+
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(query)).mappings().all()
+        return [dict(row) for row in rows]
+
+
+llm_usage_ledger = LLMUsageLedger()
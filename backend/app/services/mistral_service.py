@@ -1,30 +1,67 @@
-from mistralai.client import MistralClient
-from mistralai.models.chat_completion import ChatMessage
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import asyncio
 import json
+import time
 from ..core.config import settings
+from ..core.timing import span
 from ..prompts.templates import PROMPT_TEMPLATES
+from .llm_usage import llm_usage_ledger
+
+def _chat_message(role: str, content: str):
+    # Le client Mistral (et httpx) n'est importé qu'au premier appel
+    from mistralai.models.chat_completion import ChatMessage
+    return ChatMessage(role=role, content=content)
 
 class MistralService:
     def __init__(self):
-        self.client = MistralClient(api_key=settings.MISTRAL_API_KEY)
+        self._client = None
         self.model = settings.MISTRAL_MODEL
 
+    @property
+    def client(self):
+        if self._client is None:
+            from mistralai.client import MistralClient
+            self._client = MistralClient(api_key=settings.MISTRAL_API_KEY)
+        return self._client
+
+    async def _complete(self, messages: list, temperature: float, template: str):
+        # Le quota est vérifié avant l'envoi : un utilisateur au-delà de son
+        # quota du jour ne consomme plus de tokens
+        await llm_usage_ledger.check_quota()
+        start = time.perf_counter()
+        usage = None
+        call_status = "error"
+        try:
+            # Durée de l'appel à l'API, reportée dans l'en-tête Server-Timing.
+            # Le client est synchrone : l'appel passe par un thread pour ne
+            # pas bloquer la boucle, et plusieurs appels peuvent se chevaucher
+            with span("mistral"):
+                response = await asyncio.to_thread(
+                    self.client.chat,
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature
+                )
+            usage = getattr(response, "usage", None)
+            call_status = "ok"
+            return response
+        finally:
+            # Appels en erreur compris, avec leur latence
+            llm_usage_ledger.record(
+                template, self.model, (time.perf_counter() - start) * 1000, usage, status=call_status
+            )
+
     async def generate_questions(self, mission_description: str) -> List[str]:
         prompt = PROMPT_TEMPLATES["generate_questions"].format(
             mission_description=mission_description
         )
         
         messages = [
-            ChatMessage(role="system", content="Tu es un expert en audit qui aide à définir le périmètre exact des missions d'audit. Sois concis et précis."),
-            ChatMessage(role="user", content=prompt)
+            _chat_message(role="system", content="Tu es un expert en audit qui aide à définir le périmètre exact des missions d'audit. Sois concis et précis."),
+            _chat_message(role="user", content=prompt)
         ]
         
-        response = self.client.chat(
-            model=self.model,
-            messages=messages,
-            temperature=0.3
-        )
+        response = await self._complete(messages, temperature=0.3, template="generate_questions")
         
         questions = response.choices[0].message.content.strip().split('\n')
         # Nettoyer et filtrer les questions
@@ -48,15 +85,11 @@ class MistralService:
         )
         
         messages = [
-            ChatMessage(role="system", content="Tu es un expert en audit. Génère un cadrage de mission structuré."),
-            ChatMessage(role="user", content=prompt)
+            _chat_message(role="system", content="Tu es un expert en audit. Génère un cadrage de mission structuré."),
+            _chat_message(role="user", content=prompt)
         ]
         
-        response = self.client.chat(
-            model=self.model,
-            messages=messages,
-            temperature=0.3
-        )
+        response = await self._complete(messages, temperature=0.3, template="generate_cadrage")
         
         return self._parse_cadrage_response(response.choices[0].message.content)
 
@@ -66,15 +99,11 @@ class MistralService:
         )
         
         messages = [
-            ChatMessage(role="system", content="Tu es un expert en audit ISO 27001. Génère une checklist détaillée."),
-            ChatMessage(role="user", content=prompt)
+            _chat_message(role="system", content="Tu es un expert en audit ISO 27001. Génère une checklist détaillée."),
+            _chat_message(role="user", content=prompt)
         ]
         
-        response = self.client.chat(
-            model=self.model,
-            messages=messages,
-            temperature=0.3
-        )
+        response = await self._complete(messages, temperature=0.3, template="generate_checklist")
         
         return self._parse_checklist_response(response.choices[0].message.content)
 
@@ -85,15 +114,11 @@ class MistralService:
         )
         
         messages = [
-            ChatMessage(role="system", content="Tu es un expert en audit de sécurité. Génère un constat détaillé."),
-            ChatMessage(role="user", content=prompt)
+            _chat_message(role="system", content="Tu es un expert en audit de sécurité. Génère un constat détaillé."),
+            _chat_message(role="user", content=prompt)
         ]
         
-        response = self.client.chat(
-            model=self.model,
-            messages=messages,
-            temperature=0.3
-        )
+        response = await self._complete(messages, temperature=0.3, template="generate_constat")
         
         return self._parse_constat_response(response.choices[0].message.content)
 
@@ -103,38 +128,80 @@ class MistralService:
         )
         
         messages = [
-            ChatMessage(role="system", content="Tu es un expert en audit. Génère une synthèse executive."),
-            ChatMessage(role="user", content=prompt)
+            _chat_message(role="system", content="Tu es un expert en audit. Génère une synthèse executive."),
+            _chat_message(role="user", content=prompt)
         ]
         
-        response = self.client.chat(
-            model=self.model,
-            messages=messages,
-            temperature=0.5
+        response = await self._complete(messages, temperature=0.5, template="generate_synthesis")
+
+        return response.choices[0].message.content
+
+    # Synthèse hiérarchique (app.services.synthesis_service) : résumé d'un
+    # lot de constats, fusion de résumés, puis synthèse executive finale
+
+    async def summarize_constats(self, mission_title: str, constats: str) -> str:
+        prompt = PROMPT_TEMPLATES["summarize_constats"].format(
+            mission_title=mission_title,
+            constats=constats
         )
-        
+
+        messages = [
+            _chat_message(role="system", content="Tu es un expert en audit. Résume des constats d'audit de façon concise."),
+            _chat_message(role="user", content=prompt)
+        ]
+
+        response = await self._complete(messages, temperature=0.3, template="synthesis_batch")
+
+        return response.choices[0].message.content.strip()
+
+    async def merge_summaries(self, mission_title: str, summaries: str) -> str:
+        prompt = PROMPT_TEMPLATES["merge_summaries"].format(
+            mission_title=mission_title,
+            summaries=summaries
+        )
+
+        messages = [
+            _chat_message(role="system", content="Tu es un expert en audit. Fusionne des résumés de constats d'audit."),
+            _chat_message(role="user", content=prompt)
+        ]
+
+        response = await self._complete(messages, temperature=0.3, template="synthesis_merge")
+
+        return response.choices[0].message.content.strip()
+
+    async def reduce_synthesis(self, mission_context: Dict[str, Any], summaries: str, constat_count: int) -> str:
+        prompt = PROMPT_TEMPLATES["reduce_synthesis"].format(
+            mission_context=json.dumps(mission_context, ensure_ascii=False),
+            summaries=summaries,
+            constat_count=constat_count
+        )
+
+        messages = [
+            _chat_message(role="system", content="Tu es un expert en audit. Génère une synthèse executive."),
+            _chat_message(role="user", content=prompt)
+        ]
+
+        response = await self._complete(messages, temperature=0.5, template="synthesis_reduce")
+
         return response.choices[0].message.content
-    
+
     async def chat(self, message: str, conversation_history: List[Dict[str, str]] = None) -> str:
         """General chat method for conversations"""
-        messages = [
-            ChatMessage(role="system", content="Tu es un assistant IA expert en audit et sécurité informatique. Tu aides les utilisateurs avec leurs questions. Réponds de manière professionnelle et utile.")
-        ]
-        
-        # Add conversation history if provided
-        if conversation_history:
-            for msg in conversation_history[-10:]:  # Keep last 10 messages for context
-                role = "user" if msg.get("type") == "user" else "assistant"
-                messages.append(ChatMessage(role=role, content=msg.get("message", "")))
+        with span("mistral.prompt"):
+            messages = [
+                _chat_message(role="system", content="Tu es un assistant IA expert en audit et sécurité informatique. Tu aides les utilisateurs avec leurs questions. Réponds de manière professionnelle et utile.")
+            ]
+            
+            # Add conversation history if provided
+            if conversation_history:
+                for msg in conversation_history[-10:]:  # Keep last 10 messages for context
+                    role = "user" if msg.get("type") == "user" else "assistant"
+                    messages.append(_chat_message(role=role, content=msg.get("message", "")))
+            
+            # Add current message
+            messages.append(_chat_message(role="user", content=message))
         
-        # Add current message
-        messages.append(ChatMessage(role="user", content=message))
-        
-        response = self.client.chat(
-            model=self.model,
-            messages=messages,
-            temperature=0.7
-        )
+        response = await self._complete(messages, temperature=0.7, template="chat")
         
         return response.choices[0].message.content.strip()
 
@@ -222,4 +289,11 @@ class MistralService:
         
         return constat
 
-mistral_service = MistralService()
\ No newline at end of file
+_mistral_service: Optional[MistralService] = None
+
+def get_mistral_service() -> MistralService:
+    """Return the shared MistralService, created on first use."""
+    global _mistral_service
+    if _mistral_service is None:
+        _mistral_service = MistralService()
+    return _mistral_service
\ No newline at end of file
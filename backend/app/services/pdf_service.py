@@ -1,57 +1,151 @@
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch, cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.platypus.tableofcontents import TableOfContents
 from io import BytesIO
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, BinaryIO, Optional
+import os
+import tempfile
+import uuid
+
+from ..core.config import settings
+from ..core.executors import BoundedExecutor
+from ..core.timing import span
+
+# Champs du détail d'un constat (mode grand rapport)
+CONSTAT_DETAIL_FIELDS = [
+    ('Intitulé', 'intitule'),
+    ('Description', 'description'),
+    ('Criticité', 'criticite'),
+    ('Preuves', 'preuves'),
+    ('Recommandations', 'recommandations')
+]
+
+_report_styles: Optional[Dict[str, Any]] = None
+
+def get_report_styles() -> Dict[str, Any]:
+    """Styles du rapport, construits une fois par processus."""
+    global _report_styles
+    if _report_styles is None:
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        
+        styles = getSampleStyleSheet()
+        
+        # Styles personnalisés
+        _report_styles = {
+            'title': ParagraphStyle(
+                'CustomTitle',
+                parent=styles['Title'],
+                fontSize=24,
+                textColor=colors.HexColor('#1a1a1a'),
+                spaceAfter=30,
+                alignment=1  # Centre
+            ),
+            'heading1': ParagraphStyle(
+                'CustomHeading1',
+                parent=styles['Heading1'],
+                fontSize=16,
+                textColor=colors.HexColor('#2c3e50'),
+                spaceAfter=12,
+                spaceBefore=20
+            ),
+            'heading2': ParagraphStyle(
+                'CustomHeading2',
+                parent=styles['Heading2'],
+                fontSize=14,
+                textColor=colors.HexColor('#34495e'),
+                spaceAfter=10,
+                spaceBefore=15
+            ),
+            'normal': ParagraphStyle(
+                'CustomNormal',
+                parent=styles['Normal'],
+                fontSize=11,
+                leading=14,
+                alignment=4  # Justifié
+            )
+        }
+    return _report_styles
+
+def warm_pdf_worker():
+    """Initialisation des processus de rendu : reportlab, polices et styles chargés d'avance."""
+    from reportlab.pdfbase import pdfmetrics
+    
+    for font_name in ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique', 'Helvetica-BoldOblique'):
+        pdfmetrics.getFont(font_name)
+    get_report_styles()
+
+def render_ancs_report_bytes(mission_data: Dict[str, Any]) -> BytesIO:
+    """Rendu en mémoire, pour les appelants qui ont besoin du contenu complet."""
+    return PDFService.build_ancs_report(mission_data, BytesIO())
+
+def render_ancs_report_file(mission_data: Dict[str, Any], output_dir: str) -> str:
+    """Rendu dans un fichier ; seul le chemin revient au processus appelant."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"rapport_{uuid.uuid4().hex}.pdf")
+    try:
+        with open(path, "wb") as handle:
+            PDFService.build_ancs_report(mission_data, handle)
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return path
+
+# Pool de processus de rendu PDF, préchargés par warm_pdf_worker
+pdf_executor = BoundedExecutor(
+    "pdf",
+    "process",
+    settings.PDF_WORKERS or os.cpu_count() or 1,
+    settings.PDF_QUEUE_DEPTH,
+    initializer=warm_pdf_worker,
+    timeout=settings.PDF_JOB_TIMEOUT
+)
 
 class PDFService:
     
     @staticmethod
     async def generate_ancs_report(mission_data: Dict[str, Any]) -> BytesIO:
-        output = BytesIO()
-        doc = SimpleDocTemplate(output, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Styles personnalisés
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Title'],
-            fontSize=24,
-            textColor=colors.HexColor('#1a1a1a'),
-            spaceAfter=30,
-            alignment=1  # Centre
-        )
-        
-        heading1_style = ParagraphStyle(
-            'CustomHeading1',
-            parent=styles['Heading1'],
-            fontSize=16,
-            textColor=colors.HexColor('#2c3e50'),
-            spaceAfter=12,
-            spaceBefore=20
-        )
+        with span("export.pdf"):
+            return await pdf_executor.run(render_ancs_report_bytes, mission_data)
+    
+    @staticmethod
+    async def generate_ancs_report_file(mission_data: Dict[str, Any]) -> str:
+        with span("export.pdf"):
+            return await pdf_executor.run(
+                render_ancs_report_file, mission_data, os.path.abspath(settings.PDF_OUTPUT_DIR)
+            )
+    
+    @staticmethod
+    def build_ancs_report(
+        mission_data: Dict[str, Any],
+        output: Optional[BinaryIO] = None,
+        large: Optional[bool] = None
+    ) -> BinaryIO:
+        """Construit le rapport ANCS dans output.
         
-        heading2_style = ParagraphStyle(
-            'CustomHeading2',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#34495e'),
-            spaceAfter=10,
-            spaceBefore=15
+        Le mode grand rapport (large, activé automatiquement à partir de
+        PDF_LARGE_REPORT_THRESHOLD constats) découpe le registre en LongTable
+        bornées et rend par défaut dans un fichier temporaire plutôt qu'en mémoire.
+        """
+        # reportlab n'est chargé qu'au premier rendu
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import inch, cm
+        from reportlab.platypus import (
+            SimpleDocTemplate, Paragraph, Spacer, Table, LongTable, TableStyle, PageBreak
         )
         
-        normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=styles['Normal'],
-            fontSize=11,
-            leading=14,
-            alignment=4  # Justifié
-        )
+        if large is None:
+            large = len(mission_data.get('constats', [])) >= settings.PDF_LARGE_REPORT_THRESHOLD
+        if output is None:
+            # En mode grand rapport, le PDF bascule sur disque au-delà de PDF_SPOOL_MAX_BYTES
+            output = tempfile.SpooledTemporaryFile(max_size=settings.PDF_SPOOL_MAX_BYTES) if large else BytesIO()
+        doc = SimpleDocTemplate(output, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
+        story = []
+        styles = get_report_styles()
+        title_style = styles['title']
+        heading1_style = styles['heading1']
+        heading2_style = styles['heading2']
+        normal_style = styles['normal']
         
         # Page de garde
         story.append(Spacer(1, 2*inch))
@@ -141,17 +235,12 @@ class PDFService:
         # Tableau récapitulatif des constats
         constats = mission_data.get('constats', [])
         if constats:
-            constat_data = [['Réf.', 'Intitulé', 'Criticité', 'Clause ISO']]
-            for c in constats:
-                constat_data.append([
-                    c.get('reference', ''),
-                    c.get('intitule', ''),
-                    c.get('criticite', ''),
-                    c.get('normes', '')
-                ])
-            
-            constat_table = Table(constat_data, colWidths=[2*cm, 8*cm, 3*cm, 3*cm])
-            constat_table.setStyle(TableStyle([
+            header = ['Réf.', 'Intitulé', 'Criticité', 'Clause ISO']
+            rows = [
+                [c.get('reference', ''), c.get('intitule', ''), c.get('criticite', ''), c.get('normes', '')]
+                for c in constats
+            ]
+            table_style = TableStyle([
                 ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
                 ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -159,22 +248,43 @@ class PDFService:
                 ('FONTSIZE', (0, 0), (-1, -1), 10),
                 ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
                 ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(constat_table)
+            ])
+            
+            if large:
+                # Tableaux de taille bornée, en-tête répété sur chaque page :
+                # la découpe entre pages ne remesure jamais tout le registre
+                chunk_size = settings.PDF_FINDINGS_PER_CHUNK
+                for start in range(0, len(rows), chunk_size):
+                    constat_table = LongTable(
+                        [header] + rows[start:start + chunk_size],
+                        colWidths=[2*cm, 8*cm, 3*cm, 3*cm],
+                        repeatRows=1
+                    )
+                    constat_table.setStyle(table_style)
+                    story.append(constat_table)
+            else:
+                constat_table = Table([header] + rows, colWidths=[2*cm, 8*cm, 3*cm, 3*cm])
+                constat_table.setStyle(table_style)
+                story.append(constat_table)
         
         story.append(PageBreak())
         
         # Détail des constats
         for i, constat in enumerate(constats, 1):
             story.append(Paragraph(f"4.{i} Constat {constat.get('reference', '')}", heading2_style))
-            detail_text = f"""
-            <b>Intitulé:</b> {constat.get('intitule', '')}<br/>
-            <b>Description:</b> {constat.get('description', '')}<br/>
-            <b>Criticité:</b> {constat.get('criticite', '')}<br/>
-            <b>Preuves:</b> {constat.get('preuves', '')}<br/>
-            <b>Recommandations:</b> {constat.get('recommandations', '')}
-            """
-            story.append(Paragraph(detail_text, normal_style))
+            if large:
+                # Un paragraphe par champ plutôt qu'un seul bloc par constat
+                for label, key in CONSTAT_DETAIL_FIELDS:
+                    story.append(Paragraph(f"<b>{label}:</b> {constat.get(key, '')}", normal_style))
+            else:
+                detail_text = f"""
+                <b>Intitulé:</b> {constat.get('intitule', '')}<br/>
+                <b>Description:</b> {constat.get('description', '')}<br/>
+                <b>Criticité:</b> {constat.get('criticite', '')}<br/>
+                <b>Preuves:</b> {constat.get('preuves', '')}<br/>
+                <b>Recommandations:</b> {constat.get('recommandations', '')}
+                """
+                story.append(Paragraph(detail_text, normal_style))
             story.append(Spacer(1, 0.2*inch))
         
         # 5. Recommandations
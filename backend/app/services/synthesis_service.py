@@ -0,0 +1,183 @@
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List
+
+from ..core.config import settings
+from ..core.storage import get_storage
+from .artifact_cache import artifact_key
+from .mistral_service import get_mistral_service
+
+# Version des prompts de synthèse : la changer invalide les résumés en cache
+SYNTHESIS_VERSION = 1
+
+# Champs d'un constat repris dans les prompts (les preuves, longues, n'y sont pas)
+CONSTAT_FIELDS = (
+    ("reference", "Référence"),
+    ("intitule", "Intitulé"),
+    ("entite", "Entité"),
+    ("criticite", "Criticité"),
+    ("description", "Description"),
+    ("normes", "Normes"),
+    ("recommandations", "Recommandations"),
+)
+
+# Longueur maximale d'un champ de constat dans un prompt
+CONSTAT_FIELD_MAX_CHARS = 1000
+
+
+def format_constats(constats: List[Dict[str, Any]], first: int) -> str:
+    """Texte d'un lot de constats, numérotés à partir de first."""
+    blocks = []
+    for number, constat in enumerate(constats, start=first):
+        lines = [f"Constat {number}"]
+        for key, label in CONSTAT_FIELDS:
+            value = str(constat.get(key) or "").strip()
+            if value:
+                lines.append(f"{label} : {value[:CONSTAT_FIELD_MAX_CHARS]}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def format_summaries(summaries: List[str]) -> str:
+    if not summaries:
+        return "Aucun constat."
+    return "\n\n".join(f"Résumé {number} :\n{summary}" for number, summary in enumerate(summaries, start=1))
+
+
+def mission_context(mission: Dict[str, Any]) -> Dict[str, Any]:
+    """Contexte de la synthèse finale, de taille bornée : la checklist est résumée par ses taux de conformité."""
+    checklist = mission.get("checklist") or []
+    conformite = Counter(str(item.get("conforme") or "non évalué") for item in checklist)
+    return {
+        "titre": mission.get("title"),
+        "description": mission.get("description"),
+        "entite": mission.get("entite"),
+        "referentiel": mission.get("referentiel"),
+        "cadrage": mission.get("cadrage", {}),
+        "checklist": {"points": len(checklist), "conformite": dict(conformite)},
+    }
+
+
+async def _gather(calls: List[Awaitable[str]]) -> List[str]:
+    # Tous les appels vont à leur terme avant de propager une erreur, pour
+    # que les résumés obtenus soient mis en cache
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+class SynthesisRun:
+    """Un calcul de synthèse : résumés en cache, résumés produits et compteurs."""
+
+    def __init__(self, cached: Dict[str, str], concurrency: int):
+        self.cached = cached
+        self.parts: Dict[str, str] = {}
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.llm_calls = 0
+        self.reused = 0
+
+    async def node(self, kind: str, payload: Any, compute: Callable[[], Awaitable[str]]) -> str:
+        """Résumé d'un nœud de l'arbre, repris du cache si son contenu n'a pas changé."""
+        key = artifact_key(f"synthesis-{kind}", SYNTHESIS_VERSION, payload)
+        if key in self.parts:
+            return self.parts[key]
+        if key in self.cached:
+            self.reused += 1
+            summary = self.cached[key]
+        else:
+            async with self.semaphore:
+                summary = await compute()
+            self.llm_calls += 1
+        self.parts[key] = summary
+        return summary
+
+
+class SynthesisService:
+    """Synthèse executive hiérarchique (map-reduce) d'une mission.
+
+    Les constats sont découpés en lots de SYNTHESIS_BATCH_SIZE résumés en
+    parallèle, puis les résumés sont fusionnés par groupes de
+    SYNTHESIS_FANIN jusqu'à tenir dans le prompt de la synthèse finale.
+    Chaque prompt a ainsi une taille bornée, quel que soit le nombre de
+    constats.
+
+    Chaque résumé est mis en cache dans la mission (synthesis_parts, champ
+    privé que le stockage ne renvoie pas avec la mission) sous l'empreinte
+    de son contenu. Les lots suivant l'ordre des constats,
+    ajouter un constat ne recalcule que le dernier lot, les fusions qui le
+    contiennent et la synthèse finale.
+    """
+
+    def __init__(self):
+        self.batch_size = max(1, settings.SYNTHESIS_BATCH_SIZE)
+        self.fanin = max(2, settings.SYNTHESIS_FANIN)
+        self.concurrency = max(1, settings.SYNTHESIS_CONCURRENCY)
+
+    async def synthesize(self, mission: Dict[str, Any]) -> Dict[str, Any]:
+        """Générer la synthèse de la mission et l'enregistrer avec les résumés intermédiaires."""
+        mistral = get_mistral_service()
+        storage = get_storage()
+        title = mission.get("title") or ""
+        constats = mission.get("constats") or []
+        # Les résumés en cache ne sont pas renvoyés avec la mission
+        stored = await storage.get_mission(mission["_id"], include_private=True) or {}
+        run = SynthesisRun(stored.get("synthesis_parts") or {}, self.concurrency)
+
+        try:
+            # Map : un résumé par lot de constats
+            level = await _gather([
+                run.node(
+                    "batch",
+                    {"model": mistral.model, "mission": title, "constats": constats[start:start + self.batch_size]},
+                    lambda start=start: mistral.summarize_constats(
+                        title, format_constats(constats[start:start + self.batch_size], start + 1)
+                    )
+                )
+                for start in range(0, len(constats), self.batch_size)
+            ])
+            batches = len(level)
+
+            # Fusions successives jusqu'à SYNTHESIS_FANIN résumés au plus
+            levels = 1 if batches else 0
+            while len(level) > self.fanin:
+                groups = [level[start:start + self.fanin] for start in range(0, len(level), self.fanin)]
+                level = await _gather([
+                    run.node(
+                        "merge",
+                        {"model": mistral.model, "mission": title, "summaries": group},
+                        lambda group=group: mistral.merge_summaries(title, format_summaries(group))
+                    )
+                    for group in groups
+                ])
+                levels += 1
+
+            # Reduce : synthèse executive
+            context = mission_context(mission)
+            synthesis = await run.node(
+                "reduce",
+                {"model": mistral.model, "context": context, "summaries": level, "constats": len(constats)},
+                lambda: mistral.reduce_synthesis(context, format_summaries(level), len(constats))
+            )
+        except Exception:
+            # Les résumés déjà obtenus sont gardés : une nouvelle tentative ne les repaie pas
+            await storage.update_mission(mission["_id"], {"synthesis_parts": {**run.cached, **run.parts}})
+            raise
+
+        # Seuls les résumés de l'arbre courant sont gardés
+        await storage.update_mission(mission["_id"], {"synthesis": synthesis, "synthesis_parts": run.parts})
+
+        return {
+            "synthesis": synthesis,
+            "stats": {
+                "constats": len(constats),
+                "batches": batches,
+                "levels": levels,
+                "llm_calls": run.llm_calls,
+                "reused": run.reused,
+            }
+        }
+
+
+synthesis_service = SynthesisService()
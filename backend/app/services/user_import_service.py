@@ -0,0 +1,146 @@
+import asyncio
+import csv
+import io
+import json
+from typing import Any, Dict, List
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.executors import bulk_hash_executor
+from ..core.passwords import hash_passwords
+from ..models.schemas import UserImportRow
+from ..models.user import User
+
+# Nombre maximal de mots de passe envoyés ensemble à un processus
+MAX_HASH_CHUNK = 100
+
+
+def parse_import_file(content: bytes, file_format: str) -> List[Dict[str, Any]]:
+    """Lit une liste d'utilisateurs au format CSV (ligne d'en-têtes) ou JSON."""
+    # utf-8-sig : les CSV exportés depuis Excel commencent par un BOM
+    text = content.decode("utf-8-sig")
+    if file_format == "json":
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data.get("users")
+        if not isinstance(data, list):
+            raise ValueError("JSON attendu : une liste d'utilisateurs ou {\"users\": [...]}")
+        return [row if isinstance(row, dict) else {} for row in data]
+
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or "email" not in [name.strip() for name in reader.fieldnames]:
+        raise ValueError("CSV attendu avec une ligne d'en-têtes (email, firstname, lastname, password, role)")
+    return [
+        {(key or "").strip(): (value or "").strip() for key, value in row.items()}
+        for row in reader
+    ]
+
+
+class UserImportService:
+    """Création d'utilisateurs en masse : validation, hachage parallèle, insertion par lots."""
+
+    async def _hash_all(self, passwords: List[str]) -> List[str]:
+        # Des paquets de mots de passe plutôt qu'un appel par ligne (moins d'échanges entre processus)
+        workers = bulk_hash_executor.workers
+        chunk_size = max(1, min(MAX_HASH_CHUNK, -(-len(passwords) // (workers * 4))))
+        chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+        semaphore = asyncio.Semaphore(workers)
+
+        async def run(chunk: List[str]) -> List[str]:
+            async with semaphore:
+                return await bulk_hash_executor.run(hash_passwords, chunk)
+
+        hashed = await asyncio.gather(*(run(chunk) for chunk in chunks))
+        return [value for chunk in hashed for value in chunk]
+
+    async def _insert_batch(self, db: AsyncSession, batch: List[tuple], report: List[Dict[str, Any]]):
+        db.add_all([user for _, user in batch])
+        try:
+            await db.commit()
+            for index, _ in batch:
+                report[index].update(status="created")
+            return
+        except IntegrityError:
+            await db.rollback()
+
+        # Conflit inattendu (création concurrente) : ligne par ligne pour isoler les fautives
+        for index, user in batch:
+            db.add(User(
+                email=user.email,
+                firstname=user.firstname,
+                lastname=user.lastname,
+                hashed_password=user.hashed_password,
+                role=user.role,
+                is_active=True
+            ))
+            try:
+                await db.commit()
+                report[index].update(status="created")
+            except IntegrityError:
+                await db.rollback()
+                report[index].update(status="skipped", detail="Email already registered")
+
+    async def import_users(self, db: AsyncSession, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        report = [{"row": i, "email": row.get("email") or None, "status": "error", "detail": None}
+                  for i, row in enumerate(rows, 1)]
+
+        # 1. Validation et doublons internes au fichier
+        valid = []
+        seen = set()
+        for i, row in enumerate(rows):
+            try:
+                item = UserImportRow.model_validate(row)
+            except ValidationError as e:
+                error = e.errors()[0]
+                field = ".".join(str(part) for part in error.get("loc", ()))
+                report[i]["detail"] = f"{field}: {error['msg']}" if field else error["msg"]
+                continue
+            if item.email in seen:
+                report[i].update(status="skipped", detail="Duplicate email in file")
+                continue
+            seen.add(item.email)
+            valid.append((i, item))
+
+        # 2. Une seule requête pour les adresses déjà enregistrées
+        if valid:
+            result = await db.execute(select(User.email).where(User.email.in_([item.email for _, item in valid])))
+            existing = set(result.scalars().all())
+            # Pas de connexion retenue pendant le hachage
+            await db.close()
+            for i, item in valid:
+                if item.email in existing:
+                    report[i].update(status="skipped", detail="Email already registered")
+            valid = [(i, item) for i, item in valid if item.email not in existing]
+
+        # 3. Hachage en parallèle sur le pool de processus
+        hashed = await self._hash_all([item.password for _, item in valid]) if valid else []
+
+        # 4. Insertion par lots, une transaction par lot
+        new_users = [
+            (i, User(
+                email=item.email,
+                firstname=item.firstname,
+                lastname=item.lastname,
+                hashed_password=password_hash,
+                role=item.role,
+                is_active=True
+            ))
+            for (i, item), password_hash in zip(valid, hashed)
+        ]
+        batch_size = settings.BULK_IMPORT_BATCH_SIZE
+        for start in range(0, len(new_users), batch_size):
+            await self._insert_batch(db, new_users[start:start + batch_size], report)
+
+        return {
+            "created": sum(1 for r in report if r["status"] == "created"),
+            "skipped": sum(1 for r in report if r["status"] == "skipped"),
+            "failed": sum(1 for r in report if r["status"] == "error"),
+            "rows": report
+        }
+
+
+user_import_service = UserImportService()
@@ -0,0 +1,286 @@
+import math
+import re
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+# Nombre de lignes écrites entre deux envois au client
+ROWS_PER_FLUSH = 500
+
+# Index des styles déclarés dans STYLES_XML
+STYLE_DEFAULT = 0
+STYLE_HEADER = 1
+STYLE_TITLE = 2
+STYLE_CELL = 3
+
+INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+ILLEGAL_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+CONTENT_TYPES_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+)
+
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+# Feuille de styles partagée par tous les classeurs : titre, en-têtes sur fond
+# bleu et cellules de données encadrées avec retour à la ligne
+STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="3">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="14"/><color rgb="FF1F4E78"/><name val="Calibri"/><family val="2"/></font>'
+    '</fonts>'
+    '<fills count="3"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FF1F4E78"/><bgColor indexed="64"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="2">'
+    '<border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/>'
+    '<bottom style="thin"/><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="1" xfId="0" applyFont="1" applyFill="1" '
+    'applyBorder="1" applyAlignment="1"><alignment horizontal="center" vertical="top" wrapText="1"/></xf>'
+    '<xf numFmtId="0" fontId="2" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="1" xfId="0" applyBorder="1" '
+    'applyAlignment="1"><alignment vertical="top" wrapText="1"/></xf>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+def column_letter(index: int) -> str:
+    """Convertit un index de colonne (1 = A) en lettres Excel."""
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def _cell_xml(reference: str, value: Any, style: int) -> str:
+    style_attr = f' s="{style}"' if style else ""
+    if isinstance(value, bool):
+        return f'<c r="{reference}" t="b"{style_attr}><v>{int(value)}</v></c>'
+    # NaN et les infinis n'ont pas de valeur numérique Excel : écrits en texte
+    if isinstance(value, int) or (isinstance(value, float) and math.isfinite(value)):
+        return f'<c r="{reference}"{style_attr}><v>{value}</v></c>'
+    text = escape(ILLEGAL_XML_CHARS.sub("", str(value)))
+    return (
+        f'<c r="{reference}" t="inlineStr"{style_attr}>'
+        f'<is><t xml:space="preserve">{text}</t></is></c>'
+    )
+
+def row_xml(row_number: int, values: Sequence[Any], style: int = STYLE_DEFAULT) -> str:
+    cells = [
+        _cell_xml(f"{column_letter(column)}{row_number}", value, style)
+        for column, value in enumerate(values, 1)
+        if value is not None and value != ""
+    ]
+    return f'<row r="{row_number}">{"".join(cells)}</row>'
+
+class _ChunkSink:
+    """Destination non positionnable pour ZipFile : accumule les octets à envoyer."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.pending = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.pending += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.pending = 0
+        return data
+
+def rows_xml(rows: Iterable[tuple], start: int = 1) -> bytes:
+    """Rend une suite de lignes (valeurs, style) à partir de la ligne start."""
+    return "".join(
+        row_xml(row_number, values, style)
+        for row_number, (values, style) in enumerate(rows, start)
+    ).encode("utf-8")
+
+def worksheet_prefix(widths: Dict[str, float], freeze_row: Optional[int] = None) -> bytes:
+    """Début du XML d'une feuille : volets figés et largeurs de colonnes."""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    ]
+    if freeze_row:
+        parts.append(
+            '<sheetViews><sheetView workbookViewId="0">'
+            f'<pane ySplit="{freeze_row}" topLeftCell="A{freeze_row + 1}" activePane="bottomLeft" state="frozen"/>'
+            '</sheetView></sheetViews>'
+        )
+    if widths:
+        cols = "".join(
+            f'<col min="{_column_index(letter)}" max="{_column_index(letter)}" '
+            f'width="{width}" customWidth="1"/>'
+            for letter, width in sorted(widths.items(), key=lambda item: _column_index(item[0]))
+        )
+        parts.append(f"<cols>{cols}</cols>")
+    return "".join(parts).encode("utf-8")
+
+def validations_xml(validations: Sequence[tuple], first_row: int, last_row: int) -> bytes:
+    """Listes déroulantes (colonne, valeurs) appliquées aux lignes de données."""
+    if not validations or last_row < first_row:
+        return b""
+    items = []
+    for letter, values in validations:
+        formula = escape('"' + ",".join(values) + '"', {'"': "&quot;"})
+        items.append(
+            f'<dataValidation type="list" allowBlank="1" showErrorMessage="1" '
+            f'sqref="{letter}{first_row}:{letter}{last_row}"><formula1>{formula}</formula1></dataValidation>'
+        )
+    return f'<dataValidations count="{len(items)}">{"".join(items)}</dataValidations>'.encode("utf-8")
+
+class SheetSpec:
+    """Une feuille à écrire.
+
+    prefix et head sont des fragments XML déjà rendus (ceux d'un modèle en
+    cache) ; rows sont les lignes de données, produites à la demande et
+    écrites avec data_style ; footer est une ligne finale optionnelle.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rows: Iterable[Sequence[Any]],
+        prefix: bytes,
+        head: bytes = b"",
+        head_rows: int = 0,
+        data_style: int = STYLE_DEFAULT,
+        footer: Optional[Sequence[Any]] = None,
+        validations: Sequence[tuple] = ()
+    ):
+        self.name = name
+        self.rows = rows
+        self.prefix = prefix
+        self.head = head
+        self.head_rows = head_rows
+        self.data_style = data_style
+        self.footer = footer
+        self.validations = validations
+
+def safe_sheet_name(name: str, used: set) -> str:
+    """Nom de feuille valide (31 caractères max, sans caractères interdits) et unique."""
+    base = INVALID_SHEET_CHARS.sub(" ", name).strip()[:31] or "Feuille"
+    candidate = base
+    suffix = 2
+    while candidate.lower() in used:
+        tail = f" ({suffix})"
+        candidate = base[:31 - len(tail)] + tail
+        suffix += 1
+    used.add(candidate.lower())
+    return candidate
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for char in letters:
+        index = index * 26 + ord(char) - 64
+    return index
+
+def stream_workbook(sheets: Iterable[SheetSpec], rows_per_flush: int = ROWS_PER_FLUSH) -> Iterator[bytes]:
+    """Produit un classeur XLSX morceau par morceau.
+
+    Les feuilles sont écrites directement dans l'archive zip au fil de
+    l'itération ; seuls les noms des feuilles sont conservés jusqu'à la fin
+    pour écrire workbook.xml. La mémoire utilisée ne dépend donc pas du
+    nombre de lignes ni du nombre de feuilles.
+    """
+    sink = _ChunkSink()
+    archive = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED)
+    sheet_names: List[str] = []
+
+    for sheet in sheets:
+        sheet_names.append(sheet.name)
+        part = f"xl/worksheets/sheet{len(sheet_names)}.xml"
+        with archive.open(part, "w") as entry:
+            entry.write(sheet.prefix)
+            entry.write(b"<sheetData>")
+            entry.write(sheet.head)
+
+            row_number = sheet.head_rows
+            for values in sheet.rows:
+                row_number += 1
+                entry.write(row_xml(row_number, values, sheet.data_style).encode("utf-8"))
+                if row_number % rows_per_flush == 0 and sink.pending:
+                    yield sink.drain()
+            last_data_row = row_number
+
+            if sheet.footer is not None:
+                row_number += 1
+                entry.write(row_xml(row_number, sheet.footer).encode("utf-8"))
+
+            entry.write(b"</sheetData>")
+            entry.write(validations_xml(sheet.validations, sheet.head_rows + 1, last_data_row))
+            entry.write(b"</worksheet>")
+        if sink.pending:
+            yield sink.drain()
+
+    sheets_xml = "".join(
+        f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+        for i, name in enumerate(sheet_names, 1)
+    )
+    archive.writestr(
+        "xl/workbook.xml",
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets>{sheets_xml}</sheets></workbook>'
+    )
+
+    relationships = "".join(
+        f'<Relationship Id="rId{i}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, len(sheet_names) + 1)
+    )
+    styles_id = len(sheet_names) + 1
+    archive.writestr(
+        "xl/_rels/workbook.xml.rels",
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'{relationships}'
+        f'<Relationship Id="rId{styles_id}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'
+    )
+    archive.writestr("xl/styles.xml", STYLES_XML)
+
+    overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, len(sheet_names) + 1)
+    )
+    archive.writestr("[Content_Types].xml", f"{CONTENT_TYPES_HEAD}{overrides}</Types>")
+    archive.writestr("_rels/.rels", ROOT_RELS)
+    archive.close()
+
+    yield sink.drain()
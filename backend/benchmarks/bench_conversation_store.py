@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Measure message appends and reads as a conversation grows, for each storage backend.
+
+Appends --messages messages to one conversation through the storage
+interface (app.core.storage) and reports the mean append time for each
+block of --window messages, then the time to read the last 10 messages
+(the chat context) and one page of 50 from the middle. With bounded
+message storage the append time stays flat instead of growing with the
+conversation. Run from the backend directory:
+
+    python benchmarks/bench_conversation_store.py --messages 5000 --window 1000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from app.core.database import async_engine, init_db
+from app.core.document_storage import DocumentStorage
+from app.core.sql_storage import SQLStorage
+
+CONTENT = "Merci pour ces précisions sur le périmètre de l'audit. " * 8
+
+
+async def bench(storage, messages: int, window: int) -> list:
+    await storage.open()
+    conversation = await storage.create_conversation(1, name="benchmark")
+    conversation_id = conversation["_id"]
+    rows = []
+    start = time.perf_counter()
+    for i in range(messages):
+        await storage.append_message(conversation_id, "user" if i % 2 == 0 else "assistant", CONTENT)
+        if (i + 1) % window == 0:
+            now = time.perf_counter()
+            rows.append((f"append {i + 2 - window}-{i + 1}", (now - start) / window * 1e6))
+            start = now
+
+    reads = 200
+    start = time.perf_counter()
+    for _ in range(reads):
+        await storage.recent_messages(conversation_id, 10)
+    rows.append(("read last 10", (time.perf_counter() - start) / reads * 1e6))
+    start = time.perf_counter()
+    for _ in range(reads):
+        await storage.list_messages(conversation_id, messages // 2, 50)
+    rows.append(("read page of 50", (time.perf_counter() - start) / reads * 1e6))
+    await storage.close()
+    return rows
+
+
+async def main(args):
+    init_db()
+    results = {}
+    for storage in (SQLStorage(), DocumentStorage()):
+        results[storage.name] = await bench(storage, args.messages, args.window)
+    await async_engine.dispose()
+
+    names = list(results)
+    print(f"{'operation (us/op)':<24}" + "".join(f"{name:>12}" for name in names))
+    for i, (label, _) in enumerate(results[names[0]]):
+        print(f"{label:<24}" + "".join(f"{results[name][i][1]:>12.1f}" for name in names))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--window", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
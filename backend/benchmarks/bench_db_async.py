@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Compare blocking and async database access under concurrent auth/profile traffic.
+
+Each simulated request runs the queries of one API call on the event loop:
+a profile read (user by id), a login lookup (user by email) or a refresh
+token rotation (delete + insert + commit). "sync" is the former layer, a
+blocking Session used from async code; "async" is the AsyncSession used by
+the API now. A probe measures event-loop lag, which is what every other
+in-flight request (chat streams included) waits on. Run from the backend
+directory:
+
+    python benchmarks/bench_db_async.py --requests 3000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+
+from app.core.database import AsyncSessionLocal, SessionLocal, async_engine, init_db
+from app.models.user import RefreshToken, User
+
+USERS = 200
+
+
+def seed():
+    init_db()
+    db = SessionLocal()
+    db.add_all([
+        User(email=f"user{i}@example.com", firstname="U", lastname=str(i), hashed_password="x")
+        for i in range(USERS)
+    ])
+    db.commit()
+    db.close()
+
+
+def new_token(user_id: int, n: int) -> RefreshToken:
+    return RefreshToken(
+        token_hash=f"{user_id}-{n}-{time.perf_counter_ns()}",
+        user_id=user_id,
+        expires_at=datetime.utcnow() + timedelta(days=7)
+    )
+
+
+async def sync_request(n: int):
+    user_id = n % USERS + 1
+    db = SessionLocal()
+    try:
+        if n % 3 == 0:
+            db.get(User, user_id)
+        elif n % 3 == 1:
+            db.execute(select(User).where(User.email == f"user{user_id - 1}@example.com")).scalars().first()
+        else:
+            db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
+            db.add(new_token(user_id, n))
+            db.commit()
+    finally:
+        db.close()
+
+
+async def async_request(n: int):
+    user_id = n % USERS + 1
+    async with AsyncSessionLocal() as db:
+        if n % 3 == 0:
+            await db.get(User, user_id)
+        elif n % 3 == 1:
+            (await db.execute(select(User).where(User.email == f"user{user_id - 1}@example.com"))).scalars().first()
+        else:
+            await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
+            db.add(new_token(user_id, n))
+            await db.commit()
+
+
+async def loop_lag(stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        samples.append((time.perf_counter() - start - 0.005) * 1000)
+
+
+async def run_mode(handler, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(n: int):
+        async with semaphore:
+            await handler(n)
+
+    lag = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(loop_lag(stop, lag))
+    start = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    lag.sort()
+    return {
+        "throughput": requests / elapsed,
+        "lag_p50": statistics.median(lag) if lag else 0.0,
+        "lag_p99": lag[int(0.99 * (len(lag) - 1))] if lag else 0.0,
+        "lag_max": lag[-1] if lag else 0.0,
+        "lag_samples": len(lag),
+    }
+
+
+async def main_async(args):
+    seed()
+    results = {}
+    for mode, handler in (("sync", sync_request), ("async", async_request)):
+        await run_mode(handler, min(200, args.requests), args.concurrency)  # warm-up
+        results[mode] = await run_mode(handler, args.requests, args.concurrency)
+    await async_engine.dispose()
+
+    print(f"{args.requests} requests at concurrency {args.concurrency} (1/3 profile, 1/3 login lookup, 1/3 token rotation)")
+    print(f"{'mode':<6} {'req/s':>8} {'loop lag p50 (ms)':>18} {'p99 (ms)':>9} {'max (ms)':>9} {'probes':>7}")
+    for mode, r in results.items():
+        print(f"{mode:<6} {r['throughput']:>8.0f} {r['lag_p50']:>18.2f} {r['lag_p99']:>9.2f} {r['lag_max']:>9.2f} {r['lag_samples']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Compare the streaming (styled template) and pandas Excel writers.
+
+"unstyled" runs the streaming writer without template styles, to show
+what the styling itself costs.
+
+Each measurement runs in a fresh process so that peak RSS reflects only
+the export being measured. Run from the backend directory:
+
+    python benchmarks/bench_excel_writer.py --rows 100000
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+
+def make_checklist(rows: int):
+    return [
+        {
+            "section": f"{5 + i % 14}. Contrôle d'accès",
+            "exigence": f"Vérifier la revue périodique des droits d'accès n°{i}",
+            "assigne_a": "RSSI",
+            "conforme": "Oui" if i % 3 else "Non",
+            "date_maj": "01/01/2025",
+        }
+        for i in range(rows)
+    ]
+
+
+def run_export(mode: str, rows: int, queue) -> None:
+    from app.core.config import settings
+    from app.services.excel_service import ExcelService
+    from app.services.excel_templates import checklist_rows, get_template
+    from app.services.xlsx_stream import STYLE_DEFAULT, SheetSpec, stream_workbook
+
+    data = make_checklist(rows)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    if mode == "unstyled":
+        # Same streaming writer without the template styles or validations
+        template = get_template("checklist")
+        sheet = SheetSpec("Checklist", checklist_rows(data), prefix=template.prefix, data_style=STYLE_DEFAULT)
+        output = io.BytesIO(b"".join(stream_workbook([sheet])))
+    else:
+        settings.EXCEL_WRITER_MODE = mode
+        output = ExcelService.build_checklist_excel(data)
+    elapsed = time.perf_counter() - start
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({
+        "mode": mode,
+        "seconds": elapsed,
+        "peak_rss_mb": peak_kb / 1024,
+        "export_rss_mb": (peak_kb - baseline_kb) / 1024,
+        "size_kb": len(output.getbuffer()) / 1024,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for mode in ("pandas", "streaming", "unstyled"):
+        queue = context.Queue()
+        process = context.Process(target=run_export, args=(mode, args.rows, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    print(f"Checklist export, {args.rows} rows")
+    print(f"{'mode':<10} {'time (s)':>10} {'peak RSS (MB)':>14} {'export RSS (MB)':>16} {'size (KB)':>10}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['seconds']:>10.2f} {r['peak_rss_mb']:>14.1f} {r['export_rss_mb']:>16.1f} {r['size_kb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Measure login throughput and the latency of other endpoints during a login storm.
+
+A probe client polls /health and /user/profile while --logins concurrent
+logins hit /auth/login. With bcrypt running on the password executor the
+probe latency should stay close to its idle baseline.
+
+The login rate limiter is disabled unless --rate-limit is given; with it,
+the storm behaves like a credential-stuffing burst from one address and the
+CPU time shows how much bcrypt work the limiter lets through. Run from the
+backend directory:
+
+    python benchmarks/bench_login_storm.py --logins 200 --concurrency 50
+    python benchmarks/bench_login_storm.py --logins 200 --rate-limit
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+import httpx
+
+EMAIL = "admin@example.com"
+PASSWORD = "admin123"
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def probe(client: httpx.AsyncClient, headers: dict, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        for path in ("/health", "/user/profile"):
+            start = time.perf_counter()
+            await client.get(path, headers=headers)
+            samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def measure_probe(client: httpx.AsyncClient, headers: dict, seconds: float) -> list:
+    samples = []
+    stop = asyncio.Event()
+    task = asyncio.create_task(probe(client, headers, stop, samples))
+    await asyncio.sleep(seconds)
+    stop.set()
+    await task
+    return samples
+
+
+async def login_storm(client: httpx.AsyncClient, logins: int, concurrency: int) -> tuple:
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses = {}
+
+    async def login():
+        async with semaphore:
+            response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    return time.perf_counter() - start, statuses
+
+
+async def run(args):
+    from app.core.database import init_db
+    from app.core.seed import create_admin_user
+    from app.main import app
+
+    init_db()
+    create_admin_user()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        token = (await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})).json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        idle = await measure_probe(client, headers, 2.0)
+
+        samples = []
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, headers, stop, samples))
+        cpu_start = resource.getrusage(resource.RUSAGE_SELF)
+        elapsed, statuses = await login_storm(client, args.logins, args.concurrency)
+        cpu_end = resource.getrusage(resource.RUSAGE_SELF)
+        stop.set()
+        await probe_task
+
+    cpu_seconds = (cpu_end.ru_utime - cpu_start.ru_utime) + (cpu_end.ru_stime - cpu_start.ru_stime)
+    print(f"Logins: {args.logins} at concurrency {args.concurrency} in {elapsed:.2f}s "
+          f"({args.logins / elapsed:.1f}/s), statuses {statuses}, CPU {cpu_seconds:.2f}s, "
+          f"rate limit {'on' if args.rate_limit else 'off'}")
+    print(f"{'probe':<8} {'requests':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9}")
+    for label, values in (("idle", idle), ("storm", samples)):
+        print(f"{label:<8} {len(values):>9} {statistics.median(values):>9.1f} "
+              f"{percentile(values, 0.95):>9.1f} {max(values):>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rate-limit", action="store_true", help="keep the login rate limiter enabled")
+    args = parser.parse_args()
+    os.environ["LOGIN_RATE_LIMIT_ENABLED"] = "true" if args.rate_limit else "false"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Measure the in-memory document store (app.core.mock_database) as collections grow.
+
+For each collection size, times find_one by _id, find_one on an indexed
+field, find_one on an unindexed field (a full scan), update_one with
+$set on an indexed field and $push, and to_list(10) on a cursor matching
+every document. All of these except the scan should stay flat as the
+collection grows. Run from the backend directory:
+
+    python benchmarks/bench_mock_store.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.core.mock_database import MockDatabase
+
+
+async def timed(label: str, operations: int, make_call):
+    start = time.perf_counter()
+    for i in range(operations):
+        await make_call(i)
+    elapsed = time.perf_counter() - start
+    return label, elapsed / operations * 1e6
+
+
+async def run_size(size: int, operations: int, scans: int) -> list:
+    db = MockDatabase(indexes={"missions": ["user_id"]})
+    missions = db.missions
+    result = await missions.insert_many(
+        {"title": f"Mission {i}", "user_id": i % 1000, "ref": f"M-{i}", "constats": []}
+        for i in range(size)
+    )
+    ids = result.inserted_ids
+    rng = random.Random(size)
+
+    results = [
+        await timed("find_one _id", operations, lambda i: missions.find_one({"_id": rng.choice(ids)})),
+        await timed("find_one indexed", operations, lambda i: missions.find_one({"user_id": rng.randrange(1000)})),
+        await timed("find_one scan", scans, lambda i: missions.find_one({"ref": f"M-{size - 1}"})),
+        await timed("update $set indexed", operations, lambda i: missions.update_one(
+            {"_id": rng.choice(ids)}, {"$set": {"user_id": rng.randrange(1000)}}
+        )),
+        await timed("update $push", operations, lambda i: missions.update_one(
+            {"_id": ids[i % len(ids)]}, {"$push": {"constats": {"n": i}}}
+        )),
+        await timed("find().to_list(10)", operations, lambda i: missions.find({}).to_list(10)),
+    ]
+    return results
+
+
+async def main(args):
+    rows = {}
+    for size in args.sizes:
+        for label, micros in await run_size(size, args.operations, args.scans):
+            rows.setdefault(label, []).append(micros)
+
+    print(f"{'operation (us/op)':<22}" + "".join(f"{size:>12}" for size in args.sizes))
+    for label, values in rows.items():
+        print(f"{label:<22}" + "".join(f"{value:>12.1f}" for value in values))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--operations", type=int, default=2000, help="operations per measurement")
+    parser.add_argument("--scans", type=int, default=5, help="full-scan lookups per size")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Compare the standard and large-report PDF modes for growing constat counts.
+
+Each measurement runs in a fresh process so that peak RSS reflects only
+the report being measured. Run from the backend directory:
+
+    python benchmarks/bench_pdf_report.py --constats 10 100 1000
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+
+def make_mission(constats: int):
+    return {
+        "nom": "Mission de benchmark",
+        "entite": "Organisme audité",
+        "date_debut": "01/01/2025",
+        "cadrage": {
+            "domaines": "Sécurité des systèmes d'information",
+            "objectifs": ["Évaluer la conformité ISO 27001"],
+        },
+        "constats": [
+            {
+                "reference": f"C-{i:04d}",
+                "intitule": f"Revue des droits d'accès non formalisée n°{i}",
+                "description": "Les droits d'accès aux applications critiques ne font pas l'objet "
+                               "d'une revue périodique documentée. " * 4,
+                "criticite": ("Critique", "Majeure", "Mineure", "Observation")[i % 4],
+                "normes": "ISO 27001 A.5.18",
+                "preuves": "Entretien avec le RSSI, extraction des comptes actifs.",
+                "recommandations": "Mettre en place une revue semestrielle tracée des habilitations.",
+            }
+            for i in range(constats)
+        ],
+    }
+
+
+def run_report(large: bool, constats: int, queue) -> None:
+    from app.services.pdf_service import PDFService, warm_pdf_worker
+
+    warm_pdf_worker()
+    data = make_mission(constats)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    output = PDFService.build_ancs_report(data, large=large)
+    elapsed = time.perf_counter() - start
+
+    output.seek(0, os.SEEK_END)
+    size = output.tell()
+    output.close()
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({
+        "mode": "large" if large else "standard",
+        "constats": constats,
+        "seconds": elapsed,
+        "peak_rss_mb": peak_kb / 1024,
+        "report_rss_mb": (peak_kb - baseline_kb) / 1024,
+        "size_kb": size / 1024,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--constats", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for constats in args.constats:
+        for large in (False, True):
+            queue = context.Queue()
+            process = context.Process(target=run_report, args=(large, constats, queue))
+            process.start()
+            results.append(queue.get())
+            process.join()
+
+    print(f"{'mode':<10} {'constats':>9} {'time (s)':>10} {'peak RSS (MB)':>14} {'report RSS (MB)':>16} {'size (KB)':>10}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['constats']:>9} {r['seconds']:>10.2f} {r['peak_rss_mb']:>14.1f} {r['report_rss_mb']:>16.1f} {r['size_kb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Write/read contention on SQLite under each DB_PROFILE.
+
+Writer threads rotate refresh tokens (delete + insert + commit, as a login
+does) while reader threads look users up by id, all on separate pooled
+connections, for a fixed duration. Each profile runs in a fresh process
+against a fresh database file. Run from the backend directory:
+
+    python benchmarks/bench_sqlite_profiles.py --writers 4 --readers 8 --seconds 10
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USERS = 500
+
+
+def run_profile(profile: str, args, queue) -> None:
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    os.environ["DB_PROFILE"] = profile
+    os.environ["DB_POOL_SIZE"] = str(args.writers + args.readers)
+
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import delete
+    from sqlalchemy.exc import OperationalError
+
+    from app.core.database import SessionLocal, init_db
+    from app.models.user import RefreshToken, User
+
+    init_db()
+    db = SessionLocal()
+    db.add_all([
+        User(email=f"user{i}@example.com", firstname="U", lastname=str(i), hashed_password="x")
+        for i in range(USERS)
+    ])
+    db.commit()
+    db.close()
+
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+    write_latency = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def writer(worker: int):
+        n = 0
+        while time.perf_counter() < deadline:
+            user_id = (worker * 7919 + n) % USERS + 1
+            n += 1
+            session = SessionLocal()
+            start = time.perf_counter()
+            try:
+                session.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
+                session.add(RefreshToken(
+                    token_hash=f"{worker}-{n}-{time.perf_counter_ns()}",
+                    user_id=user_id,
+                    expires_at=datetime.utcnow() + timedelta(days=7)
+                ))
+                session.commit()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    counts["writes"] += 1
+                    write_latency.append(elapsed)
+            except OperationalError:
+                session.rollback()
+                with lock:
+                    counts["locked"] += 1
+            finally:
+                session.close()
+
+    def reader(worker: int):
+        n = 0
+        while time.perf_counter() < deadline:
+            session = SessionLocal()
+            try:
+                session.get(User, (worker * 31 + n) % USERS + 1)
+                session.rollback()
+                with lock:
+                    counts["reads"] += 1
+            except OperationalError:
+                with lock:
+                    counts["locked"] += 1
+            finally:
+                session.close()
+            n += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    write_latency.sort()
+    queue.put({
+        "profile": profile,
+        "writes_per_s": counts["writes"] / args.seconds,
+        "reads_per_s": counts["reads"] / args.seconds,
+        "locked": counts["locked"],
+        "write_p99_ms": write_latency[int(0.99 * (len(write_latency) - 1))] * 1000 if write_latency else 0.0,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--profiles", nargs="+", default=["default", "durable", "performance"])
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for profile in args.profiles:
+        queue = context.Queue()
+        process = context.Process(target=run_profile, args=(profile, args, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:.0f}s per profile")
+    print(f"{'profile':<12} {'writes/s':>9} {'reads/s':>9} {'write p99 (ms)':>15} {'locked errors':>14}")
+    for r in results:
+        print(f"{r['profile']:<12} {r['writes_per_s']:>9.0f} {r['reads_per_s']:>9.0f} "
+              f"{r['write_p99_ms']:>15.1f} {r['locked']:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Measure the hierarchical mission synthesis against missions of growing size.
+
+For each mission size, stores a mission with that many constats, then
+generates its synthesis three times through app.services.synthesis_service
+with a stub LLM of fixed latency: cold, again unchanged, and after adding
+one constat. Reports the LLM calls, wall time and largest prompt of each
+run, next to the prompt size of the former single-prompt synthesis
+(the whole mission as JSON). Run from the backend directory:
+
+    python benchmarks/bench_synthesis.py --sizes 10,100,1000 --llm-latency 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from app.core.database import async_engine, init_db
+from app.core.storage import get_storage
+from app.services.llm_usage import llm_usage_ledger
+from app.services.mistral_service import get_mistral_service
+from app.services.synthesis_service import synthesis_service
+
+LLM_REPLY = (
+    "Les constats portent principalement sur la gestion des accès privilégiés, "
+    "la journalisation et les sauvegardes. "
+) * 6
+
+
+class StubMistralClient:
+    """Stands in for MistralClient, counting calls and the largest prompt."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self.max_prompt_chars = 0
+
+    def chat(self, model, messages, temperature=None, **kwargs):
+        time.sleep(self.latency)
+        self.calls += 1
+        prompt = "".join(str(m.content) for m in messages)
+        self.max_prompt_chars = max(self.max_prompt_chars, len(prompt))
+        # Replies differ with the prompt, as real summaries would
+        message = types.SimpleNamespace(content=f"{LLM_REPLY}[{zlib.crc32(prompt.encode()):08x}]")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=None)
+
+
+def make_constat(number: int) -> dict:
+    return {
+        "reference": f"C-{number:04d}",
+        "intitule": f"Contrôle d'accès insuffisant sur le système {number}",
+        "entite": "Direction des systèmes d'information",
+        "description": "Les comptes à privilèges ne sont pas revus périodiquement et "
+                       "plusieurs comptes génériques restent actifs. " * 3,
+        "criticite": ("Critique", "Majeure", "Mineure", "Observation")[number % 4],
+        "normes": "ISO 27001 A.9.2.5, A.9.2.6",
+        "preuves": "Extraction de l'annuaire du 12/03, entretien avec l'administrateur.",
+        "recommandations": "Mettre en place une revue trimestrielle des habilitations.",
+    }
+
+
+async def run(client: StubMistralClient, mission_id: str) -> tuple:
+    mission = await get_storage().get_mission(mission_id)
+    client.calls = client.max_prompt_chars = 0
+    start = time.perf_counter()
+    await synthesis_service.synthesize(mission)
+    return client.calls, time.perf_counter() - start, client.max_prompt_chars
+
+
+async def main(args):
+    init_db()
+    storage = get_storage()
+    await storage.open()
+    client = StubMistralClient(args.llm_latency / 1000)
+    get_mistral_service()._client = client
+
+    print(f"{'constats':>8} {'run':<12} {'calls':>6} {'seconds':>8} {'max prompt':>11} {'single prompt':>14}")
+    for size in [int(size) for size in args.sizes.split(",")]:
+        mission = await storage.create_mission(1, f"Audit {size}", "Audit de la sécurité du SI")
+        await storage.update_mission(mission["_id"], {"constats": [make_constat(i) for i in range(size)]})
+        single_prompt = len(json.dumps(await storage.get_mission(mission["_id"]), ensure_ascii=False))
+
+        for label in ("cold", "unchanged", "one added"):
+            if label == "one added":
+                await storage.append_to_mission(mission["_id"], "constats", make_constat(size))
+            calls, seconds, max_prompt = await run(client, mission["_id"])
+            print(f"{size:>8} {label:<12} {calls:>6} {seconds:>8.2f} {max_prompt:>11} {single_prompt:>14}")
+
+    await llm_usage_ledger.flush()
+    await storage.close()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--llm-latency", type=float, default=200.0, help="stub LLM latency in ms")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Time the admin bulk import against one /auth/register call per user.
+
+Both paths run over an in-process ASGI transport on a fresh database; the
+register path is timed on a sample and extrapolated, since it takes one
+full-cost bcrypt hash and one commit per user. The login rate limiter is
+disabled. Run from the backend directory:
+
+    python benchmarks/bench_user_import.py --users 5000 --register-sample 20
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ["LOGIN_RATE_LIMIT_ENABLED"] = "false"
+
+import httpx
+
+
+def make_csv(users: int) -> bytes:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["email", "firstname", "lastname", "password", "role"])
+    for i in range(users):
+        writer.writerow([f"auditeur{i}@client.example.com", "Auditeur", f"N{i}", f"motdepasse-{i}", "user"])
+    return output.getvalue().encode()
+
+
+async def run(args):
+    from app.core.database import async_engine, init_db
+    from app.core.executors import bulk_hash_executor
+    from app.core.seed import create_admin_user
+    from app.main import app
+
+    init_db()
+    create_admin_user()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        token = (await client.post("/auth/login", json={"email": "admin@example.com", "password": "admin123"})).json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        start = time.perf_counter()
+        for i in range(args.register_sample):
+            await client.post("/auth/register", json={
+                "email": f"inscrit{i}@client.example.com",
+                "password": f"motdepasse-{i}",
+                "firstname": "Inscrit",
+                "lastname": f"N{i}",
+            })
+        per_register = (time.perf_counter() - start) / max(args.register_sample, 1)
+
+        await bulk_hash_executor.warm_up()
+        content = make_csv(args.users)
+        start = time.perf_counter()
+        response = await client.post("/user/import", content=content, headers={**headers, "Content-Type": "text/csv"})
+        import_seconds = time.perf_counter() - start
+        report = response.json()
+
+    bulk_hash_executor.shutdown()
+    await async_engine.dispose()
+
+    print(f"Bulk import of {args.users} users: {import_seconds:.1f}s "
+          f"({args.users / import_seconds:.0f} users/s), created {report['created']}, "
+          f"skipped {report['skipped']}, failed {report['failed']}, "
+          f"{bulk_hash_executor.workers} hashing processes")
+    print(f"/auth/register: {per_register * 1000:.0f} ms per user over {args.register_sample} calls, "
+          f"about {per_register * args.users / 60:.1f} min for {args.users} users")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--register-sample", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
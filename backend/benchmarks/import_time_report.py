@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Report the cold-start cost of importing the API.
+
+Runs ``python -X importtime -c "import app.main"`` in a fresh interpreter,
+then prints the top-level packages with the most import time, which heavy
+libraries were loaded eagerly, and the resident memory right after import.
+Run from the backend directory:
+
+    python benchmarks/import_time_report.py --top 15
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that should only be loaded on first use
+HEAVY_MODULES = ["pandas", "openpyxl", "reportlab", "mistralai", "pypdf", "numpy"]
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run(args, env):
+    return subprocess.run(
+        [sys.executable] + args, cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("MISTRAL_API_KEY", "benchmark")
+    env.setdefault("SECRET_KEY", "benchmark")
+
+    # Wall time and memory without the importtime instrumentation overhead
+    probe = json.loads(run(["-c", PROBE], env).stdout.strip().splitlines()[-1])
+
+    # Self import time summed per top-level package (microseconds)
+    trace = run(["-X", "importtime", "-c", "import app.main"], env).stderr
+    packages = defaultdict(int)
+    for line in trace.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us)
+
+    print(f"import app.main: {probe['seconds'] * 1000:.0f} ms, RSS {probe['rss_mb']:.1f} MB")
+    print(f"heavy libraries loaded at import: {', '.join(probe['loaded']) or 'none'}")
+    print()
+    print(f"{'package':<30} {'self time (ms)':>16}")
+    for name, micros in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:<30} {micros / 1000:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
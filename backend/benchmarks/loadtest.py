@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of the API with scripted user sessions and a stubbed LLM.
+
+Virtual users log in, then pick operations from a weighted mix (chat,
+history, missions, exports...) for --duration seconds. The report gives
+throughput and p50/p95/p99 latency per operation; --save writes it as a
+JSON baseline and --baseline compares a run against one.
+
+The app runs in this process over httpx's ASGI transport by default. That
+mode is quick to start but shares one event loop with the client, so a
+request that blocks the loop delays the client too and the stall barely
+shows in other requests' latencies. --server uvicorn starts a local
+uvicorn in a separate process and measures what real clients would see.
+The stub LLM replaces the Mistral client in the server and, like the
+real one, blocks for --llm-latency ms per call. Run from the backend
+directory:
+
+    python benchmarks/loadtest.py --mix mixed --users 20 --duration 30 --save baseline.json
+    python benchmarks/loadtest.py --mix chat --server uvicorn --baseline baseline.json --max-regression 20
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/loadtest.db")
+# Every virtual user logs in from the same address
+os.environ.setdefault("LOGIN_RATE_LIMIT_ENABLED", "false")
+
+import httpx
+
+PASSWORD = "loadtest123"
+
+# Operation weights per scenario; every virtual user logs in first
+MIXES = {
+    "chat": {
+        "chat_create": 1, "chat_message": 6, "chat_history": 4, "chat_list": 2, "profile": 1,
+    },
+    "exports": {
+        "mission_create": 1, "mission_update": 2, "export_cadrage": 3, "export_checklist": 3,
+        "export_constat": 2, "export_workbook": 2, "export_report": 1,
+    },
+    "mixed": {
+        "login": 1, "profile": 2, "chat_create": 1, "chat_message": 4, "chat_history": 3,
+        "chat_list": 1, "mission_create": 1, "mission_update": 1, "mission_list": 1,
+        "export_checklist": 1, "export_workbook": 1, "export_report": 1,
+    },
+}
+
+LLM_REPLY = (
+    "Voici les points de contrôle à vérifier pour ce périmètre : gestion des accès "
+    "privilégiés, journalisation, sauvegardes et plan de continuité. "
+) * 4
+
+
+class StubMistralClient:
+    """Stands in for MistralClient: blocks like the real synchronous client."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def chat(self, model, messages, temperature=None, **kwargs):
+        time.sleep(self.latency)
+        message = types.SimpleNamespace(content=LLM_REPLY)
+        # Rough token counts, so the usage ledger records realistic rows
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        completion_tokens = len(LLM_REPLY) // 4
+        usage = types.SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens
+        )
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=usage)
+
+
+def install_stub_llm(latency_ms: float):
+    from app.services.mistral_service import get_mistral_service
+
+    get_mistral_service()._client = StubMistralClient(latency_ms / 1000)
+
+
+def seed_users(count: int) -> list:
+    """Create the virtual users' accounts, hashing their shared password once."""
+    from app.core.auth import get_password_hash
+    from app.core.database import SessionLocal, init_db
+    from app.models.user import User
+
+    init_db()
+    hashed = get_password_hash(PASSWORD)
+    emails = [f"loadtest{i}@example.com" for i in range(count)]
+    db = SessionLocal()
+    try:
+        existing = {email for (email,) in db.query(User.email).filter(User.email.in_(emails))}
+        db.add_all(
+            User(email=email, firstname="Load", lastname=f"Test {i}", hashed_password=hashed, role="user")
+            for i, email in enumerate(emails) if email not in existing
+        )
+        db.commit()
+    finally:
+        db.close()
+    return emails
+
+
+def mission_payload(constats: int) -> dict:
+    return {
+        "cadrage": {
+            "domaines": "Systèmes d'information", "processus": "Gestion des accès",
+            "exclusions": "Aucune", "referentiels": "ISO 27001, ANCS",
+            "objectifs": ["Évaluer la gestion des accès", "Vérifier la journalisation"],
+        },
+        "checklist": [
+            {"section": f"{5 + i % 14}. Contrôle d'accès", "exigence": f"Exigence n°{i}",
+             "assigne_a": "RSSI", "conforme": "Oui" if i % 3 else "Non", "date_maj": "01/01/2025"}
+            for i in range(40)
+        ],
+        "constats": [
+            {"reference": f"C{i}", "intitule": f"Constat {i}", "entite": "DSI",
+             "description": "Les comptes à privilèges ne sont pas revus périodiquement. " * 3,
+             "criticite": "Majeure", "normes": "ISO 27001 A.9.2.5",
+             "preuves": "Extraction de l'annuaire", "recommandations": "Mettre en place une revue trimestrielle."}
+            for i in range(constats)
+        ],
+    }
+
+
+class VirtualUser:
+    """One scripted session: its token, chats and missions."""
+
+    def __init__(self, client: httpx.AsyncClient, email: str, stats, rng: random.Random, constats: int):
+        self.client = client
+        self.email = email
+        self.stats = stats
+        self.rng = rng
+        self.constats = constats
+        self.headers = {}
+        self.chats = []
+        self.missions = []
+        self.updated_missions = []
+
+    async def call(self, operation: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(operation, time.perf_counter() - start, ok=False)
+            raise
+        self.stats.record(operation, time.perf_counter() - start, ok=response.status_code < 400)
+        return response
+
+    async def login(self):
+        response = await self.call("login", "POST", "/auth/login", json={"email": self.email, "password": PASSWORD})
+        if response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    async def profile(self):
+        await self.call("profile", "GET", "/user/profile")
+
+    async def chat_create(self):
+        response = await self.call("chat_create", "POST", "/chat/create", json={"chatName": "Audit"})
+        if response.status_code == 200:
+            self.chats.append(response.json()["chat"]["_id"])
+
+    async def chat_message(self):
+        if not self.chats:
+            return await self.chat_create()
+        await self.call(
+            "chat_message", "POST", "/chat/message",
+            json={"chatId": self.rng.choice(self.chats), "prompt": "Quels contrôles pour la gestion des accès ?"}
+        )
+
+    async def chat_history(self):
+        if not self.chats:
+            return await self.chat_create()
+        await self.call("chat_history", "POST", "/chat/messages", json={"chatId": self.rng.choice(self.chats)})
+
+    async def chat_list(self):
+        await self.call("chat_list", "GET", "/chat/list")
+
+    async def mission_create(self):
+        response = await self.call(
+            "mission_create", "POST", "/api/missions/",
+            json={"title": "Audit SI", "description": "Audit de la gestion des accès"}
+        )
+        if response.status_code == 200:
+            self.missions.append(response.json()["mission_id"])
+
+    async def mission_list(self):
+        await self.call("mission_list", "GET", "/api/missions/")
+
+    async def mission_update(self):
+        if not self.missions:
+            return await self.mission_create()
+        mission_id = self.rng.choice(self.missions)
+        response = await self.call(
+            "mission_update", "PATCH", f"/api/missions/{mission_id}", json=mission_payload(self.constats)
+        )
+        if response.status_code == 200 and mission_id not in self.updated_missions:
+            self.updated_missions.append(mission_id)
+
+    async def export(self, operation: str, path: str):
+        if not self.updated_missions:
+            return await self.mission_update()
+        mission_id = self.rng.choice(self.updated_missions)
+        await self.call(operation, "GET", f"/api/missions/{mission_id}/export/{path}")
+
+    async def run_operation(self, operation: str):
+        if operation.startswith("export_"):
+            kind = operation[len("export_"):]
+            return await self.export(operation, "constats/0" if kind == "constat" else kind)
+        await getattr(self, operation)()
+
+
+class Stats:
+    """Latency samples per operation, ignored while warming up."""
+
+    def __init__(self):
+        self.recording = False
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, operation: str, seconds: float, ok: bool):
+        if not self.recording:
+            return
+        self.samples.setdefault(operation, []).append(seconds * 1000)
+        if not ok:
+            self.errors[operation] = self.errors.get(operation, 0) + 1
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(values: list, errors: int, duration: float) -> dict:
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput": len(values) / duration,
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "max_ms": max(values),
+    }
+
+
+async def user_loop(user: VirtualUser, weights: dict, stop: asyncio.Event):
+    await user.login()
+    operations, operation_weights = list(weights), list(weights.values())
+    while not stop.is_set():
+        operation = user.rng.choices(operations, weights=operation_weights)[0]
+        try:
+            await user.run_operation(operation)
+        except httpx.HTTPError:
+            await asyncio.sleep(0.1)
+        # In-process requests can complete without ever suspending; yield so
+        # one user cannot monopolize the loop (and delay the stop timer)
+        await asyncio.sleep(0)
+
+
+async def drive(client: httpx.AsyncClient, args) -> tuple:
+    stats = Stats()
+    stop = asyncio.Event()
+    users = [
+        VirtualUser(client, email, stats, random.Random(args.seed + i), args.constats)
+        for i, email in enumerate(args.emails)
+    ]
+    tasks = [asyncio.create_task(user_loop(user, MIXES[args.mix], stop)) for user in users]
+    await asyncio.sleep(args.warmup)
+    stats.recording = True
+    start = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    stats.recording = False
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return stats, elapsed
+
+
+async def run_in_process(args) -> tuple:
+    from app.main import app
+
+    install_stub_llm(args.llm_latency)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+            return await drive(client, args)
+
+
+def serve(port: int, llm_latency: float):
+    """Uvicorn server process: the API with the stub LLM installed."""
+    import uvicorn
+    from app.main import app
+
+    install_stub_llm(llm_latency)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 30):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            if time.perf_counter() > deadline:
+                raise
+        await asyncio.sleep(0.2)
+
+
+async def run_with_uvicorn(args) -> tuple:
+    context = multiprocessing.get_context("spawn")
+    # Not a daemon: the server starts its own worker pools (PDF, evidence)
+    server = context.Process(target=serve, args=(args.port, args.llm_latency))
+    server.start()
+    try:
+        limits = httpx.Limits(max_connections=len(args.emails), max_keepalive_connections=len(args.emails))
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=120, limits=limits) as client:
+            await wait_until_up(client)
+            return await drive(client, args)
+    finally:
+        server.terminate()
+        server.join()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def build_report(args, stats: Stats, elapsed: float) -> dict:
+    operations = {
+        operation: summarize(values, stats.errors.get(operation, 0), elapsed)
+        for operation, values in sorted(stats.samples.items())
+    }
+    all_values = [value for values in stats.samples.values() for value in values]
+    return {
+        "meta": {
+            "mix": args.mix,
+            "server": args.server,
+            "users": args.users,
+            "duration_s": elapsed,
+            "warmup_s": args.warmup,
+            "llm_latency_ms": args.llm_latency,
+            "constats": args.constats,
+            "seed": args.seed,
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "operations": operations,
+        "total": summarize(all_values, sum(stats.errors.values()), elapsed) if all_values else {},
+    }
+
+
+def print_report(report: dict):
+    meta = report["meta"]
+    print(f"Mix {meta['mix']}, {meta['users']} users, {meta['duration_s']:.1f}s, server {meta['server']}, "
+          f"LLM {meta['llm_latency_ms']:.0f} ms, revision {meta['revision']}")
+    print(f"{'operation':<18} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 (ms)':>9} "
+          f"{'p95 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9}")
+    rows = list(report["operations"].items()) + ([("TOTAL", report["total"])] if report["total"] else [])
+    for operation, s in rows:
+        print(f"{operation:<18} {s['requests']:>9} {s['errors']:>7} {s['throughput']:>8.1f} {s['p50_ms']:>9.1f} "
+              f"{s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f} {s['max_ms']:>9.1f}")
+
+
+def compare(report: dict, baseline: dict, max_regression: float, min_requests: int) -> list:
+    """Print p95 and throughput changes against a baseline; return the regressed operations."""
+    print(f"\nAgainst baseline {baseline['meta'].get('revision', '?')} ({baseline['meta'].get('date', '?')})")
+    print(f"{'operation':<18} {'p95 (ms)':>9} {'baseline':>9} {'change':>8} {'req/s':>8} {'baseline':>9}")
+    regressions = []
+    for operation, s in report["operations"].items():
+        base = baseline["operations"].get(operation)
+        if not base:
+            continue
+        change = (s["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100 if base["p95_ms"] else 0.0
+        flag = ""
+        if s["requests"] >= min_requests and base["requests"] >= min_requests and change > max_regression:
+            regressions.append(operation)
+            flag = "  REGRESSION"
+        print(f"{operation:<18} {s['p95_ms']:>9.1f} {base['p95_ms']:>9.1f} {change:>+7.1f}% "
+              f"{s['throughput']:>8.1f} {base['throughput']:>9.1f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds run before measuring")
+    parser.add_argument("--llm-latency", type=float, default=200.0, help="stub LLM latency in ms")
+    parser.add_argument("--constats", type=int, default=10, help="findings per mission (export size)")
+    parser.add_argument("--server", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a JSON file written by --save")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="exit with status 1 if an operation's p95 grew by more than this percentage")
+    parser.add_argument("--min-requests", type=int, default=20,
+                        help="operations with fewer samples are not checked for regressions")
+    args = parser.parse_args()
+
+    args.emails = seed_users(args.users)
+    runner = run_with_uvicorn if args.server == "uvicorn" else run_in_process
+    stats, elapsed = asyncio.run(runner(args))
+
+    report = build_report(args, stats, elapsed)
+    print_report(report)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved to {args.save}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(
+            report, baseline,
+            args.max_regression if args.max_regression is not None else float("inf"),
+            args.min_requests
+        )
+        if regressions:
+            print(f"\np95 regressed by more than {args.max_regression}% for: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,37 @@
 #!/usr/bin/env python3
 """
-Initialize the SQLite database and create tables.
-Run this script to set up the database before starting the server.
+Bring the database schema up to date and create the admin user.
+Run this script to set up or upgrade the database before starting the server:
+
+    python init_db.py
+
+Schema changes are Alembic migrations (migrations/versions); this is the
+same as `alembic upgrade head` followed by the admin user seed.
 """
 
 import os
 import sys
 
-# Add the app directory to Python path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app.core.database import init_db, engine
+from app.core.database import current_schema_version, schema_head, upgrade_schema
 from app.core.seed import create_admin_user
-from app.models.user import User, RefreshToken
 
 def main():
-    """Initialize database and create admin user."""
-    print("Initializing SQLite database...")
-    
-    # Create all tables
-    init_db()
-    print("✅ Database tables created successfully!")
+    """Apply pending migrations and create the admin user."""
+    current, head = current_schema_version(), schema_head()
+    if current == head:
+        print(f"✅ Database schema already at revision {head}")
+    else:
+        print(f"Upgrading database schema from {current or 'no revision'} to {head}...")
+        upgrade_schema()
+        print("✅ Database schema up to date!")
     
     # Create admin user
     print("Creating admin user...")
     create_admin_user()
     print("✅ Admin user setup complete!")
-    
-    # Show database file location
-    db_file = "audit_automation.db"
-    if os.path.exists(db_file):
-        print(f"✅ Database file created at: {os.path.abspath(db_file)}")
-    else:
-        print("⚠️  Database file not found, but tables should be created when app starts")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,46 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.core.database import Base, engine
+from app.models import mission, usage, user  # noqa: F401  (registers the tables on Base.metadata)
+
+config = context.config
+
+# Only the alembic CLI loads logging from alembic.ini; when the API runs the
+# migrations on startup, its own logging configuration is left untouched
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def run_migrations_offline():
+    """Emit the migration SQL instead of running it (alembic upgrade --sql)."""
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    # Same engine (and SQLite pragmas) as the application
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite cannot ALTER most columns: autogenerate table rebuilds
+            render_as_batch=True,
+            # Commit each revision on its own, so a long index build does
+            # not hold the earlier revisions' changes in one transaction
+            transaction_per_migration=True,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,81 @@
+"""Store refresh tokens as SHA-256 digests and index their expiry
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:10:00
+
+Existing plaintext tokens are re-inserted under their digest, so open
+sessions survive the upgrade. Databases that already have the token_hash
+column (created by create_all or the old create_db scripts) only get the
+missing indexes.
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def create_refresh_tokens_table(token_column: sa.Column):
+    op.create_table(
+        "refresh_tokens",
+        sa.Column("id", sa.Integer(), nullable=False),
+        token_column,
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_refresh_tokens_id", "refresh_tokens", ["id"], if_not_exists=True)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if op.get_context().as_sql:
+        # Offline SQL (alembic upgrade --sql) cannot read or hash the existing
+        # tokens: the table is rebuilt empty and every session is logged out
+        columns, rows = {"token"}, []
+    else:
+        columns = {column["name"] for column in sa.inspect(bind).get_columns("refresh_tokens")}
+        rows = bind.execute(
+            sa.text("SELECT token, user_id, expires_at, created_at FROM refresh_tokens")
+        ).all() if "token_hash" not in columns else []
+
+    if "token_hash" not in columns:
+        op.drop_table("refresh_tokens")
+        create_refresh_tokens_table(sa.Column("token_hash", sa.String(length=64), nullable=False))
+        if rows:
+            bind.execute(
+                sa.text(
+                    "INSERT INTO refresh_tokens (token_hash, user_id, expires_at, created_at) "
+                    "VALUES (:token_hash, :user_id, :expires_at, :created_at)"
+                ),
+                [
+                    {
+                        "token_hash": hashlib.sha256(row.token.encode()).hexdigest(),
+                        "user_id": row.user_id,
+                        "expires_at": row.expires_at,
+                        "created_at": row.created_at
+                    }
+                    for row in rows
+                ]
+            )
+
+    op.create_index("ix_refresh_tokens_token_hash", "refresh_tokens", ["token_hash"], unique=True, if_not_exists=True)
+    # Expiry purge and per-user revocation
+    op.create_index("ix_refresh_tokens_expires_at", "refresh_tokens", ["expires_at"], if_not_exists=True)
+    op.create_index(
+        "ix_refresh_tokens_user_id_expires_at", "refresh_tokens", ["user_id", "expires_at"], if_not_exists=True
+    )
+
+
+def downgrade():
+    # Digests cannot be turned back into tokens: every session is logged out
+    op.drop_table("refresh_tokens")
+    create_refresh_tokens_table(sa.Column("token", sa.String(), nullable=False))
+    op.create_index("ix_refresh_tokens_token", "refresh_tokens", ["token"], unique=True)
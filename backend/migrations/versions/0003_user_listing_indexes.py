@@ -0,0 +1,65 @@
+"""Indexes for the admin user listing and the user_counts table
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:20:00
+
+The indexes are built outside a transaction, and concurrently on
+PostgreSQL, so they can be added to a live database without blocking
+writes to users for the length of the build.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+USER_INDEXES = [
+    # Keyset pagination of the admin listing, optionally filtered
+    ("ix_users_created_at_id", ["created_at", "id"]),
+    ("ix_users_role_created_at_id", ["role", "created_at", "id"]),
+    ("ix_users_is_active_created_at_id", ["is_active", "created_at", "id"]),
+    # Case-insensitive prefix search (range scans on lower(column))
+    ("ix_users_email_lower", [sa.text("lower(email)")]),
+    ("ix_users_firstname_lower", [sa.text("lower(firstname)")]),
+    ("ix_users_lastname_lower", [sa.text("lower(lastname)")]),
+]
+
+
+# Same keys as app.models.user.user_count_keys at this revision
+USER_COUNT_QUERIES = [
+    "SELECT 'all', COUNT(*) FROM users",
+    "SELECT 'role:' || role, COUNT(*) FROM users GROUP BY role",
+    "SELECT 'active:' || CAST(is_active AS INTEGER), COUNT(*) FROM users GROUP BY is_active",
+    "SELECT 'role:' || role || '|active:' || CAST(is_active AS INTEGER), COUNT(*) "
+    "FROM users GROUP BY role, is_active",
+]
+
+
+def upgrade():
+    # Offline SQL (alembic upgrade --sql) starts from revision 0002's schema
+    if op.get_context().as_sql or not sa.inspect(op.get_bind()).has_table("user_counts"):
+        op.create_table(
+            "user_counts",
+            sa.Column("key", sa.String(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("key"),
+        )
+
+    op.execute("DELETE FROM user_counts")
+    for query in USER_COUNT_QUERIES:
+        op.execute(f"INSERT INTO user_counts (key, count) {query}")
+
+    with op.get_context().autocommit_block():
+        for name, columns in USER_INDEXES:
+            op.create_index(name, "users", columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(USER_INDEXES):
+            op.drop_index(name, table_name="users", postgresql_concurrently=True)
+    op.drop_table("user_counts")
@@ -0,0 +1,46 @@
+"""LLM usage ledger and per-user daily token quotas
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 14:10:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "llm_usage",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("mission_id", sa.String(), nullable=True),
+        sa.Column("template", sa.String(), nullable=False),
+        sa.Column("model", sa.String(), nullable=False),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False),
+        sa.Column("completion_tokens", sa.Integer(), nullable=False),
+        sa.Column("total_tokens", sa.Integer(), nullable=False),
+        sa.Column("latency_ms", sa.Float(), nullable=False),
+        sa.Column("ttft_ms", sa.Float(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_llm_usage_created_at", "llm_usage", ["created_at"])
+    op.create_index("ix_llm_usage_user_id_created_at", "llm_usage", ["user_id", "created_at"])
+    op.create_index("ix_llm_usage_mission_id_created_at", "llm_usage", ["mission_id", "created_at"])
+
+    # NULL = the LLM_DAILY_TOKEN_QUOTA default applies. Plain ALTER TABLE
+    # rather than a batch rebuild, which would lose the lower() indexes
+    op.add_column("users", sa.Column("llm_daily_token_quota", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    # ALTER TABLE ... DROP COLUMN needs SQLite 3.35+
+    op.drop_column("users", "llm_daily_token_quota")
+    op.drop_table("llm_usage")
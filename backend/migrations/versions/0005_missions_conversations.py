@@ -0,0 +1,65 @@
+"""Missions, conversations and conversation messages
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 16:40:00
+
+Tables of the SQLite storage backend; missions and chats were only kept
+in process memory before this revision.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "missions",
+        sa.Column("id", sa.String(length=32), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("conversation_id", sa.String(length=32), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_missions_user_id_created_at", "missions", ["user_id", "created_at"])
+
+    op.create_table(
+        "conversations",
+        sa.Column("id", sa.String(length=32), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("mission_id", sa.String(length=32), nullable=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("message_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_conversations_user_id_created_at", "conversations", ["user_id", "created_at"])
+    op.create_index("ix_conversations_mission_id", "conversations", ["mission_id"])
+
+    op.create_table(
+        "conversation_messages",
+        sa.Column("conversation_id", sa.String(length=32), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("role", sa.String(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("files", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("conversation_id", "position"),
+    )
+
+
+def downgrade():
+    op.drop_table("conversation_messages")
+    op.drop_table("conversations")
+    op.drop_table("missions")
@@ -0,0 +1,92 @@
+"""Keep user_counts in step with users through triggers
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-20 09:00:00
+
+The counters were maintained by ORM events, which Core and bulk
+INSERT/UPDATE/DELETE statements on users bypass. Database triggers now
+update them for every write, whatever issued it (SQLite triggers, or a
+PL/pgSQL trigger function on PostgreSQL), and the counts are rebuilt
+from the users table to reconcile any drift so far.
+"""
+from alembic import op
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+# Same keys as app.models.user.user_count_keys, for a row of users
+def _count_keys(row: str) -> list:
+    active = f"'active:' || CAST({row}.is_active AS INTEGER)"
+    return ["'all'", f"'role:' || {row}.role", active, f"'role:' || {row}.role || '|' || {active}"]
+
+
+def _add_to_counts(row: str, delta: int, keys: slice = slice(None)) -> str:
+    return "".join(
+        f"INSERT INTO user_counts (key, count) VALUES ({key}, {delta}) "
+        f"ON CONFLICT (key) DO UPDATE SET count = user_counts.count + {delta};\n"
+        for key in _count_keys(row)[keys]
+    )
+
+
+# "all" does not change on update
+SQLITE_TRIGGERS = {
+    "tr_users_count_insert": f"AFTER INSERT ON users\nBEGIN\n{_add_to_counts('NEW', 1)}END",
+    "tr_users_count_delete": f"AFTER DELETE ON users\nBEGIN\n{_add_to_counts('OLD', -1)}END",
+    "tr_users_count_update": (
+        "AFTER UPDATE OF role, is_active ON users\n"
+        "WHEN OLD.role IS NOT NEW.role OR OLD.is_active IS NOT NEW.is_active\n"
+        f"BEGIN\n{_add_to_counts('OLD', -1, slice(1, None))}{_add_to_counts('NEW', 1, slice(1, None))}END"
+    ),
+}
+
+POSTGRESQL_FUNCTION = f"""CREATE OR REPLACE FUNCTION users_count_change() RETURNS trigger AS $$
+BEGIN
+IF TG_OP = 'INSERT' THEN
+{_add_to_counts('NEW', 1)}ELSIF TG_OP = 'DELETE' THEN
+{_add_to_counts('OLD', -1)}ELSIF OLD.role IS DISTINCT FROM NEW.role OR OLD.is_active IS DISTINCT FROM NEW.is_active THEN
+{_add_to_counts('OLD', -1, slice(1, None))}{_add_to_counts('NEW', 1, slice(1, None))}END IF;
+RETURN NULL;
+END
+$$ LANGUAGE plpgsql"""
+
+
+def _dialect() -> str:
+    name = op.get_context().dialect.name
+    if name not in ("sqlite", "postgresql"):
+        raise NotImplementedError(f"user_counts triggers are only written for SQLite and PostgreSQL, not {name}")
+    return name
+
+
+def upgrade():
+    if _dialect() == "sqlite":
+        for name, body in SQLITE_TRIGGERS.items():
+            op.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    else:
+        op.execute(POSTGRESQL_FUNCTION)
+        op.execute("DROP TRIGGER IF EXISTS tr_users_count ON users")
+        op.execute(
+            "CREATE TRIGGER tr_users_count AFTER INSERT OR DELETE OR UPDATE OF role, is_active ON users "
+            "FOR EACH ROW EXECUTE FUNCTION users_count_change()"
+        )
+
+    # Rebuilt from the same key expressions as the triggers ("all" is a
+    # constant, counted without GROUP BY so an empty table still gets 0)
+    op.execute("DELETE FROM user_counts")
+    total_key, *grouped_keys = _count_keys("users")
+    op.execute(f"INSERT INTO user_counts (key, count) SELECT {total_key}, COUNT(*) FROM users")
+    for key in grouped_keys:
+        op.execute(f"INSERT INTO user_counts (key, count) SELECT {key}, COUNT(*) FROM users GROUP BY {key}")
+
+
+def downgrade():
+    if _dialect() == "sqlite":
+        for name in SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    else:
+        op.execute("DROP TRIGGER IF EXISTS tr_users_count ON users")
+        op.execute("DROP FUNCTION IF EXISTS users_count_change()")